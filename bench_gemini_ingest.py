@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from synth_corpus import build_corpus
+
+# Benchmark for cli_stats Gemini ingestion: builds a synthetic ~/.gemini corpus (synth_corpus.py)
+# in a temporary home and reports wall time plus bytes read (from /proc/self/io where available)
+# relative to the corpus size. By default a third of the projects are left out of
+# trustedFolders.json and can't be resolved at all (as on Linux and macOS, where no Windows path
+# turns up in the prompts); the earlier two-pass version read every session of those projects
+# twice, single-pass ingestion reads each file once (~1.0x).
+
+
+def bytes_read():
+    """Bytes read by this process so far, or None where /proc/self/io is not available."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cli_stats Gemini session ingestion.")
+    parser.add_argument("--scale", type=float, default=5.0, help="corpus size multiplier (see synth_corpus.py, default: 5)")
+    parser.add_argument("--messages", type=int, default=20, help="model replies per session")
+    parser.add_argument("--payload-kb", type=int, default=4, help="prompt/response text per message, in KB")
+    parser.add_argument("--untrusted", type=float, default=1 / 3,
+                        help="share of projects missing from trustedFolders.json (default: a third)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        os.environ["USERPROFILE"] = home
+        os.environ["XDG_CACHE_HOME"] = os.path.join(home, ".cache")
+        stats = build_corpus(home, args.scale, args.messages, args.payload_kb, readers=("gemini",),
+                             untrusted=args.untrusted)["gemini"]
+        corpus = stats["bytes"]
+
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import cli_stats
+
+        before = bytes_read()
+        start = time.perf_counter()
+        cli_stats.collect_usage()
+        elapsed = time.perf_counter() - start
+        after = bytes_read()
+
+    print(f"Corpus:     {stats['files']:,} files, {corpus / 2**20:,.1f} MB")
+    print(f"Wall time:  {elapsed:.2f}s")
+    if before is not None and after is not None:
+        print(f"Bytes read: {(after - before) / 2**20:,.1f} MB ({(after - before) / corpus:.2f}x corpus)")
+    else:
+        print("Bytes read: n/a (no /proc/self/io on this platform)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from synth_corpus import READERS, build_corpus
+
+# End-to-end ingestion benchmark for generate_dashboard's readers: writes a synthetic corpus
+# (see synth_corpus.py) into a temporary home, then runs each reader in its own process, once
+# against an empty scan cache (cold) and once more against the cache that run left (warm).
+# Reports files/s, events/s, MB/s and peak RSS per reader, and compares them with a baseline
+# saved by an earlier run (--save-baseline / --baseline). Exits 1 on a regression beyond
+# --tolerance, or when a reader finds a different number of events than the corpus holds.
+# With --trace DIR every run also writes a Chrome trace (see profiler.py) to DIR/<reader>-<run>.json.
+
+RATES = ("files_per_s", "events_per_s", "mb_per_s")
+
+
+def _unit_functions():
+    import generate_dashboard as gd
+    return {
+        "gemini": gd.gemini_units,
+        "codex": gd.codex_units,
+        "opencode": gd.opencode_units,
+        "ampcode": gd.ampcode_units,
+        "cline": gd.cline_family_units,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where resource is unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return rss / 2**20 if sys.platform == "darwin" else rss / 1024
+
+
+def run_worker(reader, workers, trace=None):
+    """One reader pass in this process (HOME etc. set by the parent); prints a JSON result line.
+    With trace set, the pass is traced and the trace saved to that path."""
+    from scan_cache import ScanCache
+    from profiler import Profile
+    from generate_dashboard import reader_version, run_units, storage_roots
+
+    cache = ScanCache(reader_version=reader_version())
+    profile = Profile(storage_roots(), trace=True) if trace else None
+    find = lambda: _unit_functions()[reader](cache)
+    start = time.perf_counter()
+    units = profile.discover(reader, find) if profile else find()
+    discovered = time.perf_counter()
+    events = sum(len(unit_events) for unit_events in run_units(units, cache, workers, profile))
+    parsed = time.perf_counter()
+    cache.save()
+    if profile:
+        profile.finish()
+        profile.write_trace(trace)
+
+    paths = {path for unit in units for path in unit.paths if os.path.exists(path)}
+    size = sum(os.path.getsize(path) for path in paths)
+    print(json.dumps({
+        "files": len(paths), "bytes": size, "events": events,
+        "discover_s": discovered - start, "parse_s": parsed - discovered,
+        "hits": cache.hits, "misses": cache.misses, "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def measure(reader, home, cache_dir, workers, trace=None):
+    env = dict(os.environ, HOME=home, USERPROFILE=home, XDG_CACHE_HOME=cache_dir,
+               APPDATA=os.path.join(home, "AppData", "Roaming"))
+    command = [sys.executable, os.path.abspath(__file__), "--worker", reader, "--workers", str(workers)]
+    if trace:
+        command += ["--trace", os.path.abspath(trace)]
+    proc = subprocess.run(command, env=env, cwd=home, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{reader} run failed:\n{proc.stderr.strip()}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    total = result["discover_s"] + result["parse_s"]
+    result["seconds"] = total
+    result["files_per_s"] = result["files"] / total if total else 0.0
+    result["events_per_s"] = result["events"] / total if total else 0.0
+    result["mb_per_s"] = result["bytes"] / 2**20 / total if total else 0.0
+    return result
+
+
+def run_suite(home, readers, workers, repeat, trace_dir=None):
+    """{reader: {"cold": result, "warm": result}}, keeping the fastest of `repeat` runs of each."""
+    results = {}
+    for reader in readers:
+        best = {}
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                for phase in ("cold", "warm"):
+                    trace = os.path.join(trace_dir, f"{reader}-{phase}.json") if trace_dir else None
+                    result = measure(reader, home, cache_dir, workers, trace)
+                    if phase not in best or result["seconds"] < best[phase]["seconds"]:
+                        best[phase] = result
+        results[reader] = best
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages: rates below baseline * (1 - tolerance), peak RSS above baseline * (1 + tolerance)."""
+    problems = []
+    for reader, phases in results.items():
+        for phase, result in phases.items():
+            old = baseline.get(reader, {}).get(phase)
+            if not old:
+                continue
+            for metric in RATES:
+                if old.get(metric) and result[metric] < old[metric] * (1 - tolerance):
+                    problems.append(f"{reader} {phase} {metric}: {result[metric]:,.1f} vs {old[metric]:,.1f} baseline")
+            if old.get("peak_rss_mb") and result["peak_rss_mb"] and \
+                    result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+                problems.append(f"{reader} {phase} peak_rss_mb: {result['peak_rss_mb']:,.1f} vs "
+                                f"{old['peak_rss_mb']:,.1f} baseline")
+    return problems
+
+
+def _change(value, old):
+    if not old:
+        return ""
+    return f" ({(value / old - 1) * 100:+.0f}%)"
+
+
+def print_results(results, baseline):
+    print(f"{'reader':<10} {'run':<5} {'files':>7} {'MB':>7} {'events':>8} {'seconds':>8} "
+          f"{'files/s':>15} {'events/s':>17} {'MB/s':>13} {'peak RSS MB':>17}")
+    for reader, phases in results.items():
+        for phase, r in phases.items():
+            old = baseline.get(reader, {}).get(phase, {})
+            rss = f"{r['peak_rss_mb']:,.1f}{_change(r['peak_rss_mb'], old.get('peak_rss_mb'))}" \
+                if r["peak_rss_mb"] is not None else "n/a"
+            print(f"{reader:<10} {phase:<5} {r['files']:>7,} {r['bytes'] / 2**20:>7,.1f} {r['events']:>8,} "
+                  f"{r['seconds']:>8.2f} "
+                  f"{r['files_per_s']:>9,.0f}{_change(r['files_per_s'], old.get('files_per_s')):>6} "
+                  f"{r['events_per_s']:>11,.0f}{_change(r['events_per_s'], old.get('events_per_s')):>6} "
+                  f"{r['mb_per_s']:>7,.1f}{_change(r['mb_per_s'], old.get('mb_per_s')):>6} {rss:>17}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_dashboard ingestion per reader, cold and warm.")
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size multiplier (see synth_corpus.py)")
+    parser.add_argument("--messages", type=int, default=20, help="model replies per session")
+    parser.add_argument("--payload-kb", type=int, default=2, help="prompt/response text per message, in KB")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--readers", default=",".join(READERS), help=f"comma-separated subset of {', '.join(READERS)}")
+    parser.add_argument("--workers", type=int, default=1, help="parser processes per reader (default: 1, serial)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per reader; the fastest is reported")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against results saved with --save-baseline")
+    parser.add_argument("--save-baseline", metavar="FILE", help="write this run's results to FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown / RSS growth against the baseline (default: 0.2 = 20%%)")
+    parser.add_argument("--trace", metavar="DIR", help="also write a Chrome trace of every run into DIR")
+    parser.add_argument("--worker", metavar="READER", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.workers, args.trace)
+        return 0
+
+    readers = [r for r in args.readers.split(",") if r]
+    unknown = [r for r in readers if r not in READERS]
+    if unknown:
+        parser.error(f"unknown reader {unknown[0]!r}")
+    corpus_args = {"scale": args.scale, "messages": args.messages, "payload_kb": args.payload_kb, "seed": args.seed}
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("corpus") != corpus_args:
+            print(f"[WARN] Baseline was taken on a different corpus ({saved.get('corpus')}); rates may not compare")
+        baseline = saved.get("results", {})
+
+    with tempfile.TemporaryDirectory() as home:
+        start = time.perf_counter()
+        expected = build_corpus(home, readers=readers, **corpus_args)
+        files = sum(s["files"] for s in expected.values())
+        size = sum(s["bytes"] for s in expected.values())
+        print(f"Corpus: {files:,} files, {size / 2**20:,.1f} MB, written in {time.perf_counter() - start:.1f}s\n")
+        if args.trace:
+            os.makedirs(args.trace, exist_ok=True)
+        results = run_suite(home, readers, args.workers, args.repeat, args.trace)
+
+    print_results(results, baseline)
+
+    failed = False
+    for reader, phases in results.items():
+        for phase, result in phases.items():
+            if result["events"] != expected[reader]["events"]:
+                print(f"[ERROR] {reader} {phase}: {result['events']:,} events found, "
+                      f"{expected[reader]['events']:,} in the corpus")
+                failed = True
+    if args.baseline:
+        problems = compare(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"[REGRESSION] {problem}")
+        if not problems:
+            print(f"\n[OK] No regressions beyond {args.tolerance:.0%} of the baseline")
+        failed = failed or bool(problems)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"corpus": corpus_args, "python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"[OK] Baseline saved to {args.save_baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-import json, os, glob
+import json, json_backend, os, glob
 
 appdata = os.environ.get("APPDATA")
 
@@ -28,7 +28,7 @@ total = 0
 total_out = 0
 
 for f in files:
-    data = json.load(open(f, 'r', encoding='utf-8'))
+    data = json_backend.load_file(f)
     # Check the structure of the first file
     if total == 0:
         print('Sample message structure:', json.dumps(data[0], indent=2)[:500] if data else 'empty')
@@ -1,4 +1,4 @@
-import json, os
+import json_backend, os
 
 appdata = os.environ.get("APPDATA")
 
@@ -30,11 +30,11 @@ for tid in task_ids:
     ui = os.path.join(base, tid, 'ui_messages.json')
     if not os.path.exists(ui):
         continue
-    msgs = json.load(open(ui, 'r', encoding='utf-8'))
+    msgs = json_backend.load_file(ui)
     for m in msgs:
         if m.get('say') in ('api_req_started', 'deleted_api_reqs', 'subagent_usage'):
             try:
-                data = json.loads(m.get('text', '{}'))
+                data = json_backend.loads(m.get('text', '{}'))
                 total_in += data.get('tokensIn', 0) or 0
                 total_out += data.get('tokensOut', 0) or 0
             except:
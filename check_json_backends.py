@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+# Equivalence check for json_backend: builds a synthetic corpus (synth_corpus.py) and computes
+# every report from it once per installed JSON backend, each in a fresh process with
+# AI_CLI_STATS_JSON set: generate_data's dashboard data, cli_stats.collect_usage and the
+# usage_tracker group-bys. Every backend has to produce output identical to the stdlib's.
+# The corpus gets one extra Gemini session with inputs the fast decoders reject (an integer
+# beyond 64 bits, a lone surrogate), so the fallback to the stdlib is exercised too.
+# Exits with status 1 on any difference, or when a backend asked for with --backends is missing.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def add_odd_session(home):
+    """A Gemini session the fast decoders can't decode as-is."""
+    chats = os.path.join(home, ".gemini", "tmp", "0" * 64, "chats")
+    os.makedirs(chats, exist_ok=True)
+    with open(os.path.join(chats, "session-odd.json"), "w", encoding="utf-8") as f:
+        f.write('{"sessionId": "odd", "messages": [{"type": "user", "content": "lone \\ud800 surrogate"}, '
+                '{"type": "gemini", "id": 123456789012345678901234567890, "model": "gemini-2.5-pro", '
+                '"timestamp": "2025-03-01T10:00:00Z", "tokens": {"input": 1200, "output": 80, "cached": 100}}]}')
+
+
+def run_worker():
+    """Compute every report with the backend selected by AI_CLI_STATS_JSON; prints them as JSON."""
+    sys.path.insert(0, HERE)
+    import json_backend
+    import cli_stats
+    import usage_tracker
+    import generate_dashboard
+
+    store = usage_tracker.read_store()
+    store.price(usage_tracker.get_pricing)
+    stats_by_day, stats_by_project = cli_stats.collect_usage()
+    print(json.dumps({
+        "backend": json_backend.BACKEND,
+        "generate_data": generate_dashboard.generate_data(use_cache=False, workers=1),
+        "cli_stats": [stats_by_day, stats_by_project],
+        "usage_tracker": {dims: {str(key): totals for key, totals in store.group_by(dims).items()}
+                          for dims in ("day", "project", "model", "session")},
+    }, sort_keys=True))
+
+
+def report(home, backend):
+    env = dict(os.environ, HOME=home, USERPROFILE=home, APPDATA=os.path.join(home, "AppData", "Roaming"),
+               XDG_CACHE_HOME=os.path.join(home, ".cache"), AI_CLI_STATS_JSON=backend)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker"], env=env, cwd=home,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{backend} run failed:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def differences(expected, actual, path=""):
+    """Paths (at most a few) where actual differs from expected."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        found = [f"{path}/{key}: missing" for key in expected.keys() - actual.keys()]
+        found += [f"{path}/{key}: unexpected" for key in actual.keys() - expected.keys()]
+        for key in sorted(expected.keys() & actual.keys()):
+            found += differences(expected[key], actual[key], f"{path}/{key}")
+        return found
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        return [d for idx, (e, a) in enumerate(zip(expected, actual)) for d in differences(e, a, f"{path}[{idx}]")]
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def main():
+    sys.path.insert(0, HERE)
+    import json_backend
+    import synth_corpus
+
+    parser = argparse.ArgumentParser(description="Check that every JSON backend gives identical usage reports.")
+    parser.add_argument("--scale", type=float, default=0.5, help="corpus size multiplier (see synth_corpus.py)")
+    parser.add_argument("--messages", type=int, default=10, help="model replies per session")
+    parser.add_argument("--backends", help=f"comma-separated backends that must be checked (default: every installed "
+                                           f"one of {', '.join(json_backend.BACKENDS)})")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker()
+        return
+
+    required = args.backends.split(",") if args.backends else []
+    backends = [name for name in json_backend.BACKENDS
+                if name != "json" and (name in required or json_backend._find_decoder(name) is not None)]
+    failed = False
+    with tempfile.TemporaryDirectory() as home:
+        synth_corpus.build_corpus(home, scale=args.scale, messages=args.messages)
+        add_odd_session(home)
+        expected = report(home, "json")
+        print(f"[OK] json: reference ({expected['generate_data']['totals']['cost']:,.4f} USD in total)")
+        for backend in backends:
+            actual = report(home, backend)
+            if actual["backend"] != backend:
+                print(f"[FAIL] {backend}: not installed (ran with {actual['backend']})")
+                failed = True
+                continue
+            found = differences(expected, dict(actual, backend="json"))
+            if found:
+                failed = True
+                print(f"[FAIL] {backend}: {len(found)} difference(s) from json")
+                for line in found[:10]:
+                    print(f"       {line}")
+            else:
+                print(f"[OK] {backend}: identical to json")
+    if not backends:
+        print("[WARN] No fast backend installed (pip install orjson or msgspec); nothing to compare")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import os
-import json
+import json_backend
 
 appdata = os.environ.get("APPDATA")
 
@@ -31,13 +31,13 @@ for tid in task_ids:
     # Check task_metadata.json
     meta_file = os.path.join(task_path, 'task_metadata.json')
     if os.path.exists(meta_file):
-        meta = json.load(open(meta_file, 'r', encoding='utf-8'))
+        meta = json_backend.load_file(meta_file)
         print(f'  task_metadata.json keys: {list(meta.keys())}')
     
     # Check api_conversation_history.json for model info
     api_file = os.path.join(task_path, 'api_conversation_history.json')
     if os.path.exists(api_file):
-        api = json.load(open(api_file, 'r', encoding='utf-8'))
+        api = json_backend.load_file(api_file)
         if api:
             first_msg = api[0]
             print(f'  First msg keys: {list(first_msg.keys())}')
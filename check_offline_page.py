@@ -0,0 +1,110 @@
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+# Load-time check for --offline dashboards: builds a synthetic corpus (synth_corpus.py), writes
+# the offline dashboard for it and checks that the page references nothing remote (no script,
+# stylesheet, font or image URL) and that it loads within a time budget. Load time is measured
+# with node: reading the page, compiling every inline script and running the inlined Chart.js
+# until it has defined window.Chart. There is no network wait to add, since nothing is fetched.
+# Exits with status 1 when a remote asset is left or the page is over budget.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Anything the browser would fetch on open
+_REMOTE = re.compile(r'<(?:script|link|img|iframe)\b[^>]*\b(?:src|href)="(?:https?:)?//[^"]*"|url\(["\']?(?:https?:)?//|@import', re.IGNORECASE)
+
+# Run by node with the page as argument; prints the timings as JSON
+LOADER = r"""
+const fs = require("fs"), vm = require("vm");
+const ms = (start) => Number(process.hrtime.bigint() - start) / 1e6;
+const start = process.hrtime.bigint();
+const html = fs.readFileSync(process.argv[1], "utf8");
+const read = ms(start);
+const sources = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)].map((m) => m[1]);
+let mark = process.hrtime.bigint();
+const scripts = sources.map((source, idx) => new vm.Script(source, {filename: `inline-${idx}.js`}));
+const compile = ms(mark);
+const context = vm.createContext({});
+mark = process.hrtime.bigint();
+const chartjs = sources.findIndex((source) => source.includes("Chart.js"));
+if (chartjs >= 0) scripts[chartjs].runInContext(context);
+const evaluate = ms(mark);
+console.log(JSON.stringify({bytes: Buffer.byteLength(html), scripts: scripts.length, read, compile, evaluate,
+                            chart: context.Chart ? context.Chart.version : null, total: ms(start)}));
+"""
+
+
+def run_worker(output_path):
+    """Write the offline dashboard for the corpus under $HOME to output_path."""
+    sys.path.insert(0, HERE)
+    import generate_dashboard
+
+    data = generate_dashboard.generate_data(use_cache=False, workers=1)
+    generate_dashboard.write_dashboard(data, output_path, offline=True)
+
+
+def main():
+    sys.path.insert(0, HERE)
+    import synth_corpus
+
+    parser = argparse.ArgumentParser(description="Check that the --offline dashboard is self-contained and loads within a budget.")
+    parser.add_argument("--scale", type=float, default=0.5, help="corpus size multiplier (see synth_corpus.py)")
+    parser.add_argument("--messages", type=int, default=10, help="model replies per session")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="load time the page must stay under (default: 1000)")
+    parser.add_argument("--worker", metavar="FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args.worker)
+        return
+
+    failed = False
+    with tempfile.TemporaryDirectory() as home:
+        synth_corpus.build_corpus(home, scale=args.scale, messages=args.messages)
+        page = os.path.join(home, "dashboard.html")
+        env = dict(os.environ, HOME=home, USERPROFILE=home, APPDATA=os.path.join(home, "AppData", "Roaming"),
+                   XDG_CACHE_HOME=os.path.join(home, ".cache"))
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", page], env=env, cwd=home,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"[ERROR] Writing the offline dashboard failed:\n{proc.stderr.strip()}")
+            sys.exit(1)
+
+        with open(page, encoding="utf-8") as f:
+            remote = [m.group(0) for m in _REMOTE.finditer(f.read())]
+        if remote:
+            failed = True
+            print(f"[FAIL] {len(remote)} remote asset(s) left in the page:")
+            for tag in remote[:10]:
+                print(f"       {tag}")
+        else:
+            print("[OK] The page loads nothing from the network")
+
+        try:
+            proc = subprocess.run(["node", "-e", LOADER, page], capture_output=True, text=True)
+        except FileNotFoundError:
+            print("[ERROR] node is needed to time the page load")
+            sys.exit(1)
+        if proc.returncode != 0:
+            print(f"[FAIL] Loading the page failed:\n{proc.stderr.strip()}")
+            sys.exit(1)
+        timing = json.loads(proc.stdout)
+        print(f"[INFO] {timing['bytes'] / 1024:,.0f} KB, {timing['scripts']} inline script(s): read "
+              f"{timing['read']:.1f} ms, compile {timing['compile']:.1f} ms, Chart.js {timing['evaluate']:.1f} ms")
+        if timing["chart"] is None:
+            failed = True
+            print("[FAIL] The inlined Chart.js did not define Chart")
+        if timing["total"] > args.budget_ms:
+            failed = True
+            print(f"[FAIL] Page load took {timing['total']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        else:
+            print(f"[OK] Page load took {timing['total']:.1f} ms (budget {args.budget_ms:.0f} ms), Chart.js {timing['chart']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ if (!fs.existsSync(pythonScript)) {
 
 console.log('🚀 Launching Gemini Analytics (via npx)...');
 
-const child = spawn(pythonBin, [pythonScript], {
+// Forward any extra flags (e.g. --no-cache) to the Python script
+const child = spawn(pythonBin, [pythonScript, ...process.argv.slice(2)], {
     stdio: 'inherit',
     shell: true
 });
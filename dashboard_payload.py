@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+# Keeps the dashboard page small however much history there is: breakdowns are cut to the top N
+# by cost plus an "Other" row, the daily series is decimated to a bounded number of points and
+# weekly/monthly rollups are added. The full lists go into detail shards the page only loads
+# when asked to show everything.
+
+# Rows per breakdown before the rest is folded into "Other"
+DEFAULT_TOP = 25
+# Points in the daily cost series before it is decimated
+DEFAULT_MAX_POINTS = 366
+
+# Shard name -> the generate_data() keys it holds (label list first, all sorted alike)
+DETAIL_SHARDS = {
+    "projects": ("projects", "project_costs", "project_tokens"),
+    "models": ("models", "model_costs", "model_inputs", "model_outputs", "model_tokens"),
+    "days": ("days", "daily_costs", "daily_tokens"),
+}
+
+
+def decimate(values, max_points):
+    """Indices of at most max_points of values that keep the shape of the series, picked with
+    largest-triangle-three-buckets; the first and last points are always kept."""
+    n = len(values)
+    if n <= max_points or max_points < 3:
+        return list(range(n))
+    every = (n - 2) / (max_points - 2)
+    picked = [0]
+    prev = 0
+    for bucket in range(max_points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        # The point chosen from this bucket is the one spanning the largest triangle with the
+        # previous pick and the average of the next bucket
+        next_end = min(int((bucket + 2) * every) + 1, n)
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(values[end:next_end]) / (next_end - end)
+        best, best_area = start, -1.0
+        for idx in range(start, end):
+            area = abs((prev - avg_x) * (values[idx] - values[prev]) - (prev - idx) * (avg_y - values[prev]))
+            if area > best_area:
+                best, best_area = idx, area
+        picked.append(best)
+        prev = best
+    picked.append(n - 1)
+    return picked
+
+
+def rollup(days, costs, tokens, period):
+    """Sum a daily series into "week" (labelled by the week's Monday) or "month" ("%Y-%m") buckets."""
+    labels, period_costs, period_tokens = [], [], []
+    for day, cost, token in zip(days, costs, tokens):
+        if period == "week":
+            d = date.fromisoformat(day)
+            label = (d - timedelta(days=d.weekday())).isoformat()
+        else:
+            label = day[:7]
+        if labels and labels[-1] == label:
+            period_costs[-1] += cost
+            period_tokens[-1] += token
+        else:
+            labels.append(label)
+            period_costs.append(cost)
+            period_tokens.append(token)
+    return {"labels": labels, "costs": period_costs, "tokens": period_tokens}
+
+
+def shape_payload(data, top=DEFAULT_TOP, max_points=DEFAULT_MAX_POINTS):
+    """Split generate_data() output into the payload the page embeds and the detail shards.
+
+    Returns (page, shards). page["detail"] maps each shard that was cut down to its full length;
+    shards holds those shards as {key: full list}.
+    """
+    page = dict(data)
+    shards = {}
+    page["weeks"] = rollup(data["days"], data["daily_costs"], data["daily_tokens"], "week")
+    page["months"] = rollup(data["days"], data["daily_costs"], data["daily_tokens"], "month")
+
+    for name in ("projects", "models"):
+        keys = DETAIL_SHARDS[name]
+        count = len(data[keys[0]])
+        if top is None or count <= top:
+            continue
+        shards[name] = {key: data[key] for key in keys}
+        # Lists are sorted by cost, so the top rows are a prefix; the rest is summed into one row
+        page[keys[0]] = data[keys[0]][:top - 1] + [f"Other ({count - top + 1})"]
+        for key in keys[1:]:
+            page[key] = data[key][:top - 1] + [sum(data[key][top - 1:])]
+
+    keys = DETAIL_SHARDS["days"]
+    if max_points is not None and len(data["days"]) > max_points:
+        shards["days"] = {key: data[key] for key in keys}
+        picked = decimate(data["daily_costs"], max_points)
+        for key in keys:
+            page[key] = [data[key][idx] for idx in picked]
+
+    page["detail"] = {name: len(data[DETAIL_SHARDS[name][0]]) for name in shards}
+    return page, shards
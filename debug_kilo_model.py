@@ -1,4 +1,4 @@
-import json, os, re
+import json_backend, os, re
 from collections import Counter
 
 appdata = os.environ.get("APPDATA", os.path.join(os.path.expanduser("~"), "AppData", "Roaming"))
@@ -12,7 +12,7 @@ for tid in dirs:
     ui = os.path.join(base, tid, "ui_messages.json")
     if not os.path.exists(ui):
         continue
-    msgs = json.load(open(ui, "r", encoding="utf-8"))
+    msgs = json_backend.load_file(ui)
     
     task_provider = ""
     task_model = ""
@@ -20,7 +20,7 @@ for tid in dirs:
     for msg in msgs:
         # Check for inferenceProvider
         if msg.get("say") == "api_req_started":
-            data = json.loads(msg.get("text", "{}"))
+            data = json_backend.loads(msg.get("text", "{}"))
             if data.get("inferenceProvider"):
                 task_provider = data["inferenceProvider"]
         
@@ -30,7 +30,7 @@ for tid in dirs:
         if msg.get("modelId"):
             task_model = msg["modelId"]
         if msg.get("say") == "api_req_started":
-            data = json.loads(msg.get("text", "{}"))
+            data = json_backend.loads(msg.get("text", "{}"))
             if data.get("model"):
                 task_model = data["model"]
             if data.get("modelId"):
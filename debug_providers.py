@@ -1,4 +1,4 @@
-import json, os
+import json_backend, os
 
 appdata = os.environ.get("APPDATA", os.path.join(os.path.expanduser("~"), "AppData", "Roaming"))
 
@@ -6,7 +6,7 @@ appdata = os.environ.get("APPDATA", os.path.join(os.path.expanduser("~"), "AppDa
 cache = os.path.join(appdata, "Code", "User", "globalStorage", "kilocode.kilo-code", "cache")
 for f in os.listdir(cache):
     if "endpoint" in f:
-        data = json.load(open(os.path.join(cache, f), "r", encoding="utf-8"))
+        data = json_backend.load_file(os.path.join(cache, f))
         for k, v in data.items():
             name = v.get("displayName", k)
             print(f"  {f} -> {name}")
@@ -19,11 +19,11 @@ for tid in os.listdir(base):
     ui = os.path.join(base, tid, "ui_messages.json")
     if not os.path.exists(ui):
         continue
-    msgs = json.load(open(ui, "r", encoding="utf-8"))
+    msgs = json_backend.load_file(ui)
     provider = None
     for msg in msgs:
         if msg.get("say") == "api_req_started":
-            data = json.loads(msg.get("text", "{}"))
+            data = json_backend.loads(msg.get("text", "{}"))
             provider = data.get("inferenceProvider", "")
             # Check the request field for model
             req = data.get("request", "")
@@ -50,10 +50,10 @@ for ext in ["rooveterinaryinc.roo-cline", "rooveterinaryinc.roo-code-nightly"]:
         ui = os.path.join(roo_base, tid, "ui_messages.json")
         if not os.path.exists(ui):
             continue
-        msgs = json.load(open(ui, "r", encoding="utf-8"))
+        msgs = json_backend.load_file(ui)
         for msg in msgs:
             if msg.get("say") == "api_req_started":
-                data = json.loads(msg.get("text", "{}"))
+                data = json_backend.loads(msg.get("text", "{}"))
                 provider = data.get("inferenceProvider", "(none)")
                 req = data.get("request", "")
                 if isinstance(req, str) and "model" in req:
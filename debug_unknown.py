@@ -1,4 +1,4 @@
-import json, os, glob
+import json_backend, os, glob
 from collections import Counter
 
 appdata = os.environ.get("APPDATA")
@@ -31,7 +31,7 @@ for name, base in all_bases.items():
     # Check taskHistory
     hist = os.path.join(base, "state", "taskHistory.json")
     if os.path.exists(hist):
-        tasks = json.load(open(hist, "r", encoding="utf-8"))
+        tasks = json_backend.load_file(hist)
         models = Counter()
         total_in = 0
         total_out = 0
@@ -58,7 +58,7 @@ for name, base in all_bases.items():
             ui = os.path.join(tasks_dir, tid, "ui_messages.json")
             if not os.path.exists(ui):
                 continue
-            msgs = json.load(open(ui, "r", encoding="utf-8"))
+            msgs = json_backend.load_file(ui)
             task_model = "unknown"
             for msg in msgs:
                 mi = msg.get("modelInfo", {})
@@ -67,7 +67,7 @@ for name, base in all_bases.items():
                 say = msg.get("say", "")
                 if say in ("api_req_started", "deleted_api_reqs", "subagent_usage"):
                     try:
-                        data = json.loads(msg.get("text", "{}"))
+                        data = json_backend.loads(msg.get("text", "{}"))
                         total_in += data.get("tokensIn", 0) or 0
                         total_out += data.get("tokensOut", 0) or 0
                     except:
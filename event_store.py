@@ -0,0 +1,334 @@
+import os
+import json
+from collections import namedtuple
+
+from time_buckets import hours_of
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional: without it the store keeps plain lists and groups in Python
+    np = None
+
+# One usage record as emitted by every reader. `timestamp` is epoch milliseconds (None if the
+# source has none), `day` the "%Y-%m-%d" bucket the dashboard groups by, `ide` the editor a
+# Cline-family extension ran in, and `reported_cost` the cost the tool itself logged (None when
+# the cost has to be priced from tokens). Stored as plain lists in the scan cache.
+UsageEvent = namedtuple("UsageEvent", "cli ide session timestamp day project model "
+                                      "input output cached cache_write reported_cost")
+
+# Dictionary-encoded columns (values are kept once, events store an index into them). "hour" is
+# derived from the timestamp: its hour of day (see time_buckets), None when it is unknown.
+DIMENSIONS = ("cli", "ide", "session", "day", "project", "model", "hour")
+# Integer token columns summed by group_by
+MEASURES = ("input", "output", "cached", "cache_write")
+
+# Bump when the on-disk layout written by EventStore.save changes
+STORE_FORMAT = 2
+
+_FIELD = {name: idx for idx, name in enumerate(UsageEvent._fields)}
+
+
+# Token sums kept by price() for events without a reported cost; billed_input is input minus
+# cached and cache-write tokens, floored at zero per event
+_PRICED = ("billed_input", "priced_output", "priced_cached", "priced_cache_write")
+
+
+def _priced_cost(pricing, billed_input, output, cached, cache_write):
+    """Cost of the token sums at a pricing.py entry's rates (USD per 1M tokens); it is linear in
+    the sums, so pricing them costs the same as pricing each event."""
+    cost = (billed_input / 1_000_000) * pricing["input"] + \
+           (output / 1_000_000) * pricing["output"] + \
+           (cached / 1_000_000) * pricing["cached"]
+    if cache_write > 0:
+        cost += (cache_write / 1_000_000) * pricing.get("cache_write", pricing["input"])
+    return cost
+
+
+class EventStore:
+    """Usage events held column by column, for group-bys over any combination of dimensions.
+
+    Dimension columns are integer codes into `values[dim]` (distinct values in first-seen order);
+    token columns are int64 arrays. With NumPy installed group_by is vectorized and the store
+    can be saved to a directory of .npy files that load() memory-maps.
+    """
+
+    def __init__(self, values, codes, measures, timestamp, reported_cost):
+        self.values = values
+        self.codes = codes
+        self.measures = measures
+        self.timestamp = timestamp          # epoch ms, -1 when unknown
+        self.reported_cost = reported_cost  # NaN (None without NumPy) when not reported
+        self.pricing_for = None             # set by price()
+        self.priced = {}
+        self._none = {dim: self._index_of_none(vals) for dim, vals in values.items()}
+
+    @staticmethod
+    def _index_of_none(vals):
+        for idx, value in enumerate(vals):
+            if value is None:
+                return idx
+        return -1
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def from_events(cls, events):
+        """Build a store from an iterable of UsageEvents (or equivalent sequences)."""
+        columns = list(zip(*events)) or [()] * len(UsageEvent._fields)
+        derived = {"hour": hours_of(columns[_FIELD["timestamp"]])}
+        values, codes = {}, {}
+        for dim in DIMENSIONS:
+            ids = {}
+            column = derived[dim] if dim in derived else columns[_FIELD[dim]]
+            col = [ids.setdefault(value, len(ids)) for value in column]
+            values[dim] = list(ids)
+            codes[dim] = np.array(col, dtype=np.int32) if np is not None else col
+        timestamp = [-1 if ts is None else ts for ts in columns[_FIELD["timestamp"]]]
+        if np is None:
+            measures = {m: list(columns[_FIELD[m]]) for m in MEASURES}
+            return cls(values, codes, measures, timestamp, list(columns[_FIELD["reported_cost"]]))
+        measures = {m: np.array(columns[_FIELD[m]], dtype=np.int64) for m in MEASURES}
+        reported = np.array([np.nan if r is None else r for r in columns[_FIELD["reported_cost"]]],
+                            dtype=np.float64)
+        return cls(values, codes, measures, np.array(timestamp, dtype=np.int64), reported)
+
+    @classmethod
+    def concat(cls, stores):
+        """Build an (unpriced) store holding the events of every store in turn."""
+        if not stores:
+            return cls.from_events([])
+        values, codes = {}, {}
+        for dim in DIMENSIONS:
+            ids = {}
+            parts = []
+            for store in stores:
+                remap = [ids.setdefault(value, len(ids)) for value in store.values[dim]]
+                if np is not None:
+                    parts.append(np.array(remap, dtype=np.int32)[store.codes[dim]])
+                else:
+                    parts.append([remap[code] for code in store.codes[dim]])
+            values[dim] = list(ids)
+            codes[dim] = np.concatenate(parts) if np is not None else [c for part in parts for c in part]
+
+        def join(cols):
+            return np.concatenate(cols) if np is not None else [v for col in cols for v in col]
+
+        return cls(values, codes, {m: join([store.measures[m] for store in stores]) for m in MEASURES},
+                   join([store.timestamp for store in stores]), join([store.reported_cost for store in stores]))
+
+    def slice(self, start, end):
+        """Unpriced store of the events in rows start to end (exclusive), sharing this one's values."""
+        return EventStore(self.values, {dim: self.codes[dim][start:end] for dim in DIMENSIONS},
+                          {m: self.measures[m][start:end] for m in MEASURES},
+                          self.timestamp[start:end], self.reported_cost[start:end])
+
+    def price(self, pricing_for):
+        """Make group_by report costs, pricing tokens with pricing_for(model, day).
+
+        Tokens are summed per group, model and day first and priced once per sum; costs the tools
+        reported themselves are summed separately and take the place of pricing for their
+        events. Calling price() again with another table re-prices without a rescan.
+        """
+        self.pricing_for = pricing_for
+        i, o = self.measures["input"], self.measures["output"]
+        c, cw = self.measures["cached"], self.measures["cache_write"]
+        reported = self.reported_cost
+        if np is None:
+            priced = [not r for r in reported]
+            self.priced = {
+                "billed_input": [max(0, a - b - d) if p else 0 for p, a, b, d in zip(priced, i, c, cw)],
+                "priced_output": [v if p else 0 for p, v in zip(priced, o)],
+                "priced_cached": [v if p else 0 for p, v in zip(priced, c)],
+                "priced_cache_write": [v if p else 0 for p, v in zip(priced, cw)],
+                "reported_cost": [0.0 if p else r for p, r in zip(priced, reported)],
+            }
+            return
+        priced = np.isnan(reported) | (reported == 0)
+        self.priced = {
+            "billed_input": np.where(priced, np.maximum(0, i - c - cw), 0),
+            "priced_output": np.where(priced, o, 0),
+            "priced_cached": np.where(priced, c, 0),
+            "priced_cache_write": np.where(priced, cw, 0),
+            "reported_cost": np.where(priced, 0.0, reported),
+        }
+
+    def filter(self, conditions):
+        """Store with only the events meeting every condition, priced like this one.
+
+        A condition is (dims, accept) and holds when accept(value) is true for the value of any
+        of dims (a name or a tuple of names); accept is called once per distinct value.
+        """
+        keep = None
+        for dims, accept in conditions:
+            match = None
+            for dim in (dims,) if isinstance(dims, str) else dims:
+                allowed = [bool(accept(value)) for value in self.values[dim]]
+                if np is not None:
+                    hit = np.array(allowed, dtype=bool)[self.codes[dim]] if allowed else \
+                        np.zeros(len(self), dtype=bool)
+                    match = hit if match is None else match | hit
+                else:
+                    hit = [allowed[code] for code in self.codes[dim]]
+                    match = hit if match is None else [a or b for a, b in zip(match, hit)]
+            if match is None:
+                continue
+            if np is not None:
+                keep = match if keep is None else keep & match
+            else:
+                keep = match if keep is None else [a and b for a, b in zip(keep, match)]
+        if keep is None:
+            return self
+
+        rows = np.flatnonzero(keep) if np is not None else [row for row, flag in enumerate(keep) if flag]
+
+        def take(col):
+            if np is not None:
+                return np.asarray(col)[rows]
+            return [col[row] for row in rows]
+
+        store = EventStore(self.values, {dim: take(self.codes[dim]) for dim in DIMENSIONS},
+                           {m: take(self.measures[m]) for m in MEASURES},
+                           take(self.timestamp), take(self.reported_cost))
+        store.pricing_for = self.pricing_for
+        store.priced = {name: take(col) for name, col in self.priced.items()}
+        return store
+
+    def group_by(self, dims, dropna=True):
+        """Sum the token columns (plus costs, once priced) per distinct combination of dims.
+
+        dims is a dimension name or a tuple of names. Returns {key: {"input", "output", "cached",
+        "cache_write", "events"[, "cost", "reported_cost"]}}, ordered by each key's first event;
+        key is the value itself for a single dimension and a tuple otherwise. "cost" includes
+        "reported_cost". With dropna, events where any of the dims is None are left out.
+        """
+        single = isinstance(dims, str)
+        dims = (dims,) if single else tuple(dims)
+        drop = dims if dropna else ()
+        columns = [(m, self.measures[m]) for m in MEASURES]
+        if self.pricing_for is None:
+            groups = self._groups(dims, drop, columns)
+        else:
+            # Price per model and day within each group, then fold those back together
+            fine = dims + tuple(dim for dim in ("model", "day") if dim not in dims)
+            model_at, day_at = fine.index("model"), fine.index("day")
+            groups = []
+            merged = {}
+            for key, totals in self._groups(fine, drop, columns + list(self.priced.items())):
+                pricing = self.pricing_for(key[model_at], key[day_at])
+                priced = _priced_cost(pricing, *[totals.pop(name) for name in _PRICED])
+                totals["cost"] = totals["reported_cost"] + priced
+                key = key[:len(dims)]
+                into = merged.get(key)
+                if into is None:
+                    merged[key] = totals
+                    groups.append((key, totals))
+                else:
+                    for name, value in totals.items():
+                        into[name] += value
+        if single:
+            return {key[0]: totals for key, totals in groups}
+        return dict(groups)
+
+    def _groups(self, dims, drop, columns):
+        if np is None:
+            return self._groups_python(dims, drop, columns)
+        return self._groups_numpy(dims, drop, columns)
+
+    def _groups_python(self, dims, drop, columns):
+        skip = [self._none[d] if d in drop else -1 for d in dims]
+        groups = {}
+        for row, key in enumerate(zip(*[self.codes[d] for d in dims])):
+            if any(code == none for code, none in zip(key, skip)):
+                continue
+            totals = groups.get(key)
+            if totals is None:
+                totals = groups[key] = dict.fromkeys([name for name, _ in columns], 0)
+                totals["events"] = 0
+            for name, col in columns:
+                totals[name] += col[row]
+            totals["events"] += 1
+        return [(tuple(self.values[d][code] for d, code in zip(dims, key)), totals)
+                for key, totals in groups.items()]
+
+    def _groups_numpy(self, dims, drop, columns):
+        n = len(self)
+        key = np.zeros(n, dtype=np.int64)
+        radix = 1
+        mask = None
+        for dim in dims:
+            codes = self.codes[dim]
+            size = max(1, len(self.values[dim]))
+            if radix > (2 ** 62) // size:
+                # Re-densify the combined key before it could overflow int64
+                _, key = np.unique(key, return_inverse=True)
+                radix = int(key.max()) + 1 if n else 1
+            key = key * size + codes
+            radix *= size
+            if dim in drop and self._none[dim] >= 0:
+                keep = codes != self._none[dim]
+                mask = keep if mask is None else mask & keep
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(n)
+        key = key[rows]
+        if not len(key):
+            return []
+
+        # Number groups in order of their first event, like dict insertion order
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        group = rank[inverse.ravel()]
+        first_rows = rows[first[order]]
+
+        ngroups = len(order)
+        sort = np.argsort(group, kind="stable")
+        starts = np.searchsorted(group[sort], np.arange(ngroups))
+        sums = {}
+        for name, col in columns:
+            col = np.asarray(col)[rows]
+            if col.dtype.kind == "f":
+                # bincount adds in event order, matching a plain running sum
+                sums[name] = np.bincount(group, weights=col, minlength=ngroups).tolist()
+            else:
+                sums[name] = np.add.reduceat(col[sort], starts).tolist()
+        sums["events"] = np.bincount(group, minlength=ngroups).tolist()
+
+        labels = [[self.values[d][code] for code in self.codes[d][first_rows].tolist()] for d in dims]
+        return [(key, {name: total[g] for name, total in sums.items()})
+                for g, key in enumerate(zip(*labels))]
+
+    def save(self, path):
+        """Write the store to directory `path` as one .npy file per column (requires NumPy)."""
+        if np is None:
+            raise RuntimeError("Saving an event store requires NumPy")
+        os.makedirs(path, exist_ok=True)
+        for dim in DIMENSIONS:
+            np.save(os.path.join(path, f"dim_{dim}.npy"), self.codes[dim])
+        for m in MEASURES:
+            np.save(os.path.join(path, f"{m}.npy"), self.measures[m])
+        np.save(os.path.join(path, "timestamp.npy"), self.timestamp)
+        np.save(os.path.join(path, "reported_cost.npy"), self.reported_cost)
+        with open(os.path.join(path, "values.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": STORE_FORMAT, "values": self.values}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a store written by save(); columns are memory-mapped read-only unless mmap is False."""
+        if np is None:
+            raise RuntimeError("Loading an event store requires NumPy")
+        with open(os.path.join(path, "values.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != STORE_FORMAT:
+            raise ValueError(f"Unsupported event store format in {path}")
+        mode = "r" if mmap else None
+
+        def column(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+
+        return cls(meta["values"],
+                   {dim: column(f"dim_{dim}") for dim in DIMENSIONS},
+                   {m: column(m) for m in MEASURES},
+                   column("timestamp"),
+                   column("reported_cost"))
@@ -1,195 +1,43 @@
 import os
+import sys
 import json
+import argparse
 import glob
+import time
 import hashlib
+import threading
 import webbrowser
-from datetime import datetime
-from collections import defaultdict
-
-# Multi-CLI API Pricing (USD per 1M tokens) - Comprehensive 72+ model coverage
-PRICING = {
-    # ── Google Gemini models ──────────────────────────────────────────────
-    "gemini-3-pro": {"input": 2.00, "output": 12.00, "cached": 0.20},
-    "gemini-3-pro-preview": {"input": 2.00, "output": 12.00, "cached": 0.20},
-    "gemini-3-pro-image-preview": {"input": 2.00, "output": 120.00, "cached": 0.20},
-    "gemini-3-flash": {"input": 0.50, "output": 3.00, "cached": 0.05},
-    "gemini-3-flash-preview": {"input": 0.50, "output": 3.00, "cached": 0.05},
-    "gemini-2.5-pro": {"input": 1.25, "output": 10.00, "cached": 0.125},
-    "gemini-2.5-flash": {"input": 0.30, "output": 1.20, "cached": 0.03},
-    "gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40, "cached": 0.01},
-    "gemini-2.0-flash": {"input": 0.10, "output": 0.40, "cached": 0.025},
-    "gemini-2.0-flash-lite": {"input": 0.075, "output": 0.30, "cached": 0.02},
-    "gemini-1.5-pro": {"input": 1.25, "output": 5.00, "cached": 0.3125},
-    "gemini-1.5-flash": {"input": 0.075, "output": 0.30, "cached": 0.01875},
-
-    # ── OpenAI / Codex CLI models ─────────────────────────────────────────
-    # GPT-5.2 Variants
-    "gpt-5.2": {"input": 1.75, "output": 14.00, "cached": 0.175},
-    "gpt-5.2-instant": {"input": 1.75, "output": 14.00, "cached": 0.175},
-    "gpt-5.2-thinking": {"input": 1.75, "output": 14.00, "cached": 0.175},
-    "gpt-5.2-pro": {"input": 21.00, "output": 168.00, "cached": 2.10},
-    "gpt-5.2-codex": {"input": 1.75, "output": 14.00, "cached": 0.175},
-    # GPT-5.1 Variants
-    "gpt-5.1": {"input": 1.25, "output": 10.00, "cached": 0.125},
-    "gpt-5.1-codex-max": {"input": 1.25, "output": 10.00, "cached": 0.125},
-    "gpt-5.1-codex-mini": {"input": 0.25, "output": 2.00, "cached": 0.025},
-    "gpt-5-nano": {"input": 0.05, "output": 0.40, "cached": 0.005},
-    # Legacy Codex models
-    "gpt-5-codex": {"input": 0.50, "output": 1.50, "cached": 0.025},
-    "gpt-5.3-codex": {"input": 0.30, "output": 1.20, "cached": 0.025},
-    "gpt-4-codex": {"input": 2.00, "output": 6.00, "cached": 0.50},
-    # o-series reasoning models
-    "o3": {"input": 10.00, "output": 40.00, "cached": 2.50},
-    "o3-mini": {"input": 1.10, "output": 4.40, "cached": 0.55},
-    "o3-pro": {"input": 20.00, "output": 80.00, "cached": 5.00},
-    "o4-mini": {"input": 1.10, "output": 4.40, "cached": 0.55},
-    "o1": {"input": 15.00, "output": 60.00, "cached": 7.50},
-    "o1-mini": {"input": 3.00, "output": 12.00, "cached": 1.50},
-    "o1-pro": {"input": 150.00, "output": 600.00, "cached": 75.00},
-    # GPT-4o family
-    "gpt-4o": {"input": 2.50, "output": 10.00, "cached": 1.25},
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached": 0.075},
-    "gpt-4-turbo": {"input": 10.00, "output": 30.00, "cached": 5.00},
-    "gpt-4": {"input": 30.00, "output": 60.00, "cached": 15.00},
-
-    # ── Anthropic / Claude models ─────────────────────────────────────────
-    # cache_write = 1.25x input price, cached (cache_read) = 0.1x input price
-    "claude-opus-4-6": {"input": 5.00, "output": 25.00, "cached": 0.50, "cache_write": 6.25},
-    "claude-opus-4-5": {"input": 5.00, "output": 25.00, "cached": 0.50, "cache_write": 6.25},
-    "claude-sonnet-4-5": {"input": 3.00, "output": 15.00, "cached": 0.30, "cache_write": 3.75},
-    "claude-sonnet-4": {"input": 3.00, "output": 15.00, "cached": 0.30, "cache_write": 3.75},
-    "claude-haiku-4-5": {"input": 1.00, "output": 5.00, "cached": 0.10, "cache_write": 1.25},
-    "claude-opus-4-1": {"input": 15.00, "output": 75.00, "cached": 1.50, "cache_write": 18.75},
-    "claude-3-7-sonnet": {"input": 3.00, "output": 15.00, "cached": 0.30, "cache_write": 3.75},
-    "claude-3-5-sonnet": {"input": 3.00, "output": 15.00, "cached": 0.30, "cache_write": 3.75},
-    "claude-3-5-haiku": {"input": 1.00, "output": 5.00, "cached": 0.10, "cache_write": 1.25},
-    "claude-3-opus": {"input": 15.00, "output": 75.00, "cached": 1.50, "cache_write": 18.75},
-    "claude-3-haiku": {"input": 0.25, "output": 1.25, "cached": 0.03, "cache_write": 0.30},
-
-    # ── Meta Llama models (via API providers) ─────────────────────────────
-    "llama-4-scout": {"input": 0.17, "output": 0.17, "cached": 0.017},
-    "llama-4-maverick": {"input": 0.27, "output": 0.35, "cached": 0.027},
-    "llama-3.3-70b": {"input": 0.18, "output": 0.18, "cached": 0.018},
-    "llama-3.3-70b-instruct": {"input": 0.18, "output": 0.18, "cached": 0.018},
-    "llama-3.1-405b": {"input": 1.79, "output": 1.79, "cached": 0.179},
-    "llama-3.1-405b-instruct": {"input": 1.79, "output": 1.79, "cached": 0.179},
-    "llama-3.1-70b": {"input": 0.18, "output": 0.18, "cached": 0.018},
-    "llama-3.1-70b-instruct": {"input": 0.18, "output": 0.18, "cached": 0.018},
-    "llama-3.1-8b": {"input": 0.06, "output": 0.06, "cached": 0.006},
-    "llama-3.1-8b-instruct": {"input": 0.06, "output": 0.06, "cached": 0.006},
-
-    # ── DeepSeek models ───────────────────────────────────────────────────
-    "deepseek-r1": {"input": 0.55, "output": 2.19, "cached": 0.14},
-    "deepseek-v3": {"input": 0.27, "output": 1.10, "cached": 0.07},
-    "deepseek-chat": {"input": 0.27, "output": 1.10, "cached": 0.07},
-    "deepseek-coder": {"input": 0.14, "output": 0.28, "cached": 0.014},
-    "deepseek-reasoner": {"input": 0.55, "output": 2.19, "cached": 0.14},
-
-    # ── Qwen models (Alibaba Cloud, via OpenRouter pricing) ─────────────
-    "qwen-2.5-coder-32b": {"input": 0.16, "output": 0.16, "cached": 0.016},
-    "qwen-2.5-coder-32b-instruct": {"input": 0.20, "output": 0.20, "cached": 0.02},
-    "qwen-2.5-72b": {"input": 0.30, "output": 0.30, "cached": 0.03},
-    "qwen-2.5-72b-instruct": {"input": 0.36, "output": 0.36, "cached": 0.036},
-    "qwen-2.5-vl-72b-instruct": {"input": 0.40, "output": 0.40, "cached": 0.04},
-    "qwen-2.5-vl-7b-instruct": {"input": 0.10, "output": 0.10, "cached": 0.01},
-    "qwen-2.5-7b-instruct": {"input": 0.05, "output": 0.05, "cached": 0.005},
-    "qwen-qwq-32b": {"input": 0.20, "output": 0.20, "cached": 0.02},
-    "qwen-2.5-max": {"input": 1.60, "output": 6.40, "cached": 0.16},
-    "qwen-2.5-plus": {"input": 0.40, "output": 1.20, "cached": 0.04},
-    "qwen-3-235b": {"input": 0.50, "output": 2.00, "cached": 0.05},
-    "qwen-3-235b-a22b": {"input": 0.20, "output": 0.60, "cached": 0.02},
-    "qwen-3-30b-a3b": {"input": 0.05, "output": 0.15, "cached": 0.005},
-    "qwen-3-32b": {"input": 0.20, "output": 0.20, "cached": 0.02},
-    "qwen-3-8b": {"input": 0.05, "output": 0.05, "cached": 0.005},
-    "qwen-3-4b": {"input": 0.02, "output": 0.02, "cached": 0.002},
-    "qwen-3-0.6b": {"input": 0.01, "output": 0.01, "cached": 0.001},
-    "qwen-max": {"input": 0.80, "output": 2.40, "cached": 0.08},
-
-    # ── GPT-OSS models ───────────────────────────────────────────────────
-    "gpt-oss-120b": {"input": 0, "output": 0, "cached": 0},
-
-    # ── Moonshot AI / Kimi models ─────────────────────────────────────────
-    "kimi-k2-5": {"input": 0.60, "output": 3.00, "cached": 0.15},
-    "kimi-k2.5": {"input": 0.60, "output": 3.00, "cached": 0.15},
-    "kimi-k2.5-free": {"input": 0.60, "output": 3.00, "cached": 0.15},
-    "kimi-k2": {"input": 0.60, "output": 3.00, "cached": 0.15},
-    "kimi-k1.5": {"input": 0.60, "output": 3.00, "cached": 0.15},
-
-    # ── GLM / Zhipu models ────────────────────────────────────────────────
-    "glm-4-7": {"input": 0.60, "output": 2.20, "cached": 0.11},
-    "glm-4.7-free": {"input": 0.60, "output": 2.20, "cached": 0.11},
-    "glm-4-6": {"input": 0.60, "output": 2.20, "cached": 0.11},
-    "glm-4.6": {"input": 0.60, "output": 2.20, "cached": 0.11},
-    "glm-5": {"input": 0.80, "output": 2.56, "cached": 0.08},
-
-    # ── Minimax models ────────────────────────────────────────────────────
-    "minimax-m2.5": {"input": 0.30, "output": 1.20, "cached": 0.03},
-    "minimax-m2.5:free": {"input": 0.30, "output": 1.20, "cached": 0.03},
-    "minimax-m2.1-free": {"input": 0.30, "output": 1.20, "cached": 0.03},
-    "minimax-m2.1": {"input": 0.30, "output": 1.20, "cached": 0.03},
-    "minimax-m2-5": {"input": 0.30, "output": 1.20, "cached": 0.03},
-
-    # ── xAI / Grok models ────────────────────────────────────────────────
-    "grok-code-fast-1": {"input": 0.20, "output": 1.50, "cached": 0.02},
-    "grok-3": {"input": 0.20, "output": 1.50, "cached": 0.02},
-    "grok-3-mini": {"input": 0.10, "output": 0.50, "cached": 0.01},
-    "grok-2": {"input": 2.00, "output": 10.00, "cached": 0.50},
-
-    # ── Mistral models ────────────────────────────────────────────────────
-    "devstral-2512": {"input": 0.05, "output": 0.22, "cached": 0.005},
-    "mistral-large-2411": {"input": 2.00, "output": 6.00, "cached": 0.50},
-    "mistral-large": {"input": 2.00, "output": 6.00, "cached": 0.50},
-    "mistral-small-2501": {"input": 0.10, "output": 0.30, "cached": 0.025},
-    "mistral-small": {"input": 0.10, "output": 0.30, "cached": 0.025},
-    "codestral": {"input": 0.30, "output": 0.90, "cached": 0.075},
-    "mistral-medium": {"input": 2.70, "output": 8.10, "cached": 0.675},
-
-    # ── Cohere models ─────────────────────────────────────────────────────
-    "command-r-plus": {"input": 2.50, "output": 10.00, "cached": 0.625},
-    "command-r": {"input": 0.15, "output": 0.60, "cached": 0.0375},
-
-    # ── Novita hosted models ──────────────────────────────────────────────
-    "novita-devstral-2512": {"input": 0.05, "output": 0.22, "cached": 0.005},
-    "novita-minimax-m2.1": {"input": 0.30, "output": 1.20, "cached": 0.03},
-
-    # ── Stealth / unknown models — no public API pricing ──────────────────
-    "pony-alpha": {"input": 0, "output": 0, "cached": 0},
-    "giga-potato": {"input": 0, "output": 0, "cached": 0},
-}
-DEFAULT_PRICING = {"input": 0, "output": 0, "cached": 0}
+from datetime import date, datetime, timedelta
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import json_backend
+import json_stream
+import profiler
+import time_buckets
+import usage_export
+from scan_cache import ScanCache, file_signature
+from event_store import UsageEvent, EventStore
+from time_index import TimeIndex
+from warehouse import Warehouse, default_path as default_warehouse_path
+from pricing import load_pricing
+from project_cache import ProjectCache
+from watcher import open_watcher, wait_for_changes
+from server import UsageAPI, make_server
+from dashboard_payload import shape_payload, DEFAULT_TOP, DEFAULT_MAX_POINTS
+from offline_assets import make_offline, chartjs_source
+
+# Multi-CLI API Pricing (USD per 1M tokens), loaded from pricing.json (see pricing.py)
+PRICING_TABLE = load_pricing()
 
 import re
 
-def normalize_model_name(model):
-    """Strip date suffixes (e.g. -20251001) and :free suffix from model names for pricing lookup."""
-    # Remove trailing date like -20251001, -20251101, etc.
-    normalized = re.sub(r'-\d{8}$', '', model)
-    # Remove :free suffix (e.g. "kimi-k2.5:free" -> "kimi-k2.5")
-    normalized = re.sub(r':free$', '', normalized)
-    # Remove thinking suffix (e.g. "claude-sonnet-4.5 (thinking)" -> "claude-sonnet-4.5")
-    normalized = re.sub(r'\s*\(thinking\)$', '', normalized, flags=re.IGNORECASE)
-    # Remove high/low/medium suffixes (e.g. "gemini-3-pro (high)" -> "gemini-3-pro")
-    normalized = re.sub(r'\s*\((high|low|medium)\)$', '', normalized, flags=re.IGNORECASE)
-    # Replace spaces with hyphens for consistency (e.g. "Claude Sonnet 4.5" -> "claude-sonnet-4.5")
-    normalized = normalized.replace(' ', '-').lower()
-    return normalized
-
-def get_cost(model, input_tokens, output_tokens, cached_tokens, cache_write_tokens=0):
-    pricing = PRICING.get(model) or PRICING.get(normalize_model_name(model), DEFAULT_PRICING)
-    # Subtract cached + cache_write tokens from total input to get billed non-cached input
-    billed_input = max(0, input_tokens - cached_tokens - cache_write_tokens)
-    cost = (billed_input / 1_000_000) * pricing["input"] + \
-           (output_tokens / 1_000_000) * pricing["output"] + \
-           (cached_tokens / 1_000_000) * pricing["cached"]
-    # Add cache write cost if the model has separate cache_write pricing
-    if cache_write_tokens > 0 and "cache_write" in pricing:
-        cost += (cache_write_tokens / 1_000_000) * pricing["cache_write"]
-    elif cache_write_tokens > 0:
-        # Default: cache writes billed at regular input rate
-        cost += (cache_write_tokens / 1_000_000) * pricing["input"]
-    return cost
-
-def get_project_map():
+def get_pricing(model, day=None):
+    """Price entry for model as of day ("%Y-%m-%d"; None = current prices)."""
+    return PRICING_TABLE.price_for(model, day)
+
+def get_project_map(use_cache=True):
+    projects = ProjectCache(persist=use_cache)
     home_dir = os.path.expanduser("~")
     trusted_file = os.path.join(home_dir, ".gemini", "trustedFolders.json")
     proj_map = {}
@@ -197,361 +45,744 @@ def get_project_map():
 
     if os.path.exists(trusted_file):
         try:
-            with open(trusted_file, "r") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    trusted_paths = list(data.keys())
-                else:
-                    trusted_paths = data
-        except Exception:
-            pass
+            data = json_backend.load_file(trusted_file)
+            if isinstance(data, dict):
+                trusted_paths = list(data.keys())
+            else:
+                trusted_paths = data
+        except Exception as e:
+            profiler.failed(e)
 
     for path in trusted_paths:
         # Gemini often uses the exact case of the path for hashing
-        h_exact = hashlib.sha256(path.encode('utf-8')).hexdigest()
+        h_exact = projects.path_hash(path)
         proj_map[h_exact] = os.path.basename(path) or path
         
         # Fallback for some versions/platforms that might use lowercase
-        h_lower = hashlib.sha256(path.lower().encode('utf-8')).hexdigest()
+        h_lower = projects.path_hash(path.lower())
         if h_lower not in proj_map:
             proj_map[h_lower] = os.path.basename(path) or path
 
     # Additionally, try to map the current working directory
     current_dir = os.getcwd()
-    current_dir_hash = hashlib.sha256(current_dir.encode('utf-8')).hexdigest()
+    current_dir_hash = projects.path_hash(current_dir)
     if current_dir_hash not in proj_map:
         proj_map[current_dir_hash] = os.path.basename(current_dir) or current_dir
 
+    projects.save()
     return proj_map
 
-def read_gemini_data(stats_by_day, stats_by_project, model_usage, cli_usage):
-    """Read Gemini CLI session data from ~/.gemini/tmp/"""
+# Bump whenever a parser below changes what it extracts, so cached events get re-parsed
+READER_VERSION = 4
+
+def reader_version():
+    """The scan cache's version: READER_VERSION plus the time zone cached days were bucketed in."""
+    return f"{READER_VERSION}-{time_buckets.ZONE}"
+
+def _parse_cached(cache, key, paths, context, parse, *args):
+    """Run parse(*args), or reuse its cached result while `paths` and `context` are unchanged."""
+    if cache is None:
+        return parse(*args)
+    return cache.get(key, paths, context, parse, *args)
+
+# One file (or file group) to parse: parse(*args) yields UsageEvents (a Codex unit returns its
+# tail state instead). Resumable units get the previous cached value appended to args when
+# their files have changed.
+WorkUnit = namedtuple("WorkUnit", "key paths context parse args resume", defaults=(False,))
+
+def _mtime_cutoff(since):
+    """Epoch time before which a file's last modification means it holds no usage from `since`
+    ("%Y-%m-%d") on, or None. A day early, so events dated in UTC rather than local time are kept."""
+    if since is None:
+        return None
+    return (datetime.strptime(since, "%Y-%m-%d") - timedelta(days=1)).timestamp()
+
+def _modified_before(path, cutoff):
+    """True when path was last written before cutoff (see _mtime_cutoff); False when unknown."""
+    if cutoff is None:
+        return False
+    try:
+        return os.stat(path).st_mtime < cutoff
+    except OSError:
+        return False
+
+# Below this many files to parse, process start-up costs more than it saves
+PARALLEL_MIN_UNITS = 32
+
+def _unit_events(value):
+    if isinstance(value, dict):
+        return value["events"] + value["pending"]
+    return value
+
+def _call_unit(job):
+    parse, args, timed, traced = job
+    return profiler.call_unit(parse, args, timed, traced)
+
+def run_units(units, cache=None, workers=1, profile=None):
+    """Parse work units, serving unchanged ones from the cache, and yield their events unit by unit.
+
+    Cache misses are fanned out to `workers` processes; results come back in the original unit
+    order, so aggregating them yields exactly the same rollups as a serial run.
+    profile: a profiler.Profile to add every unit's counters and timings to.
+    """
+    cached = {}
+    todo = []
+    for idx, unit in enumerate(units):
+        sig = None
+        args = unit.args
+        if cache is not None:
+            sig = cache.signature(unit.paths, unit.context)
+            # Cached values are read from the cache as they are yielded, not all up front
+            if cache.valid(unit.key, sig):
+                cached[idx] = sig
+                continue
+            cache.lookup(unit.key, sig)
+            if unit.resume:
+                args = args + (cache.previous(unit.key),)
+        todo.append((idx, sig, unit.parse, args))
+
+    timed = profile is not None
+    traced = timed and profile.trace is not None
+    jobs = [(parse, args, timed, traced) for _, _, parse, args in todo]
+    pool = None
+    if workers > 1 and len(jobs) >= PARALLEL_MIN_UNITS:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        parsed = pool.map(_call_unit, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+    else:
+        parsed = map(_call_unit, jobs)
+
+    try:
+        pending = iter(todo)
+        next_todo = next(pending, None)
+        for idx, unit in enumerate(units):
+            fetched = time.perf_counter() if timed else None
+            if next_todo is not None and next_todo[0] == idx:
+                value, record = next(parsed)
+                if cache is not None:
+                    cache.store(unit.key, next_todo[1], value, record["failures"])
+                next_todo = next(pending, None)
+                is_cached = False
+            else:
+                sig = cached.pop(idx)
+                value = cache.lookup(unit.key, sig)
+                if value is not None:
+                    record = {"failures": cache.failures(unit.key)}
+                    is_cached = True
+                else:
+                    # The entry's shard is gone or unreadable: parse the unit here after all
+                    args = unit.args + (cache.previous(unit.key),) if unit.resume else unit.args
+                    value, record = _call_unit((unit.parse, args, timed, traced))
+                    cache.store(unit.key, sig, value, record["failures"])
+                    is_cached = False
+            events = _unit_events(value)
+            if timed:
+                profile.add_unit(unit, len(events), record, is_cached, fetched)
+                start = time.perf_counter()
+                yield events
+                profile.aggregated(unit, start, time.perf_counter())
+            else:
+                yield events
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+# Files at least this large are parsed with json_stream, keeping only the fields the readers use
+STREAM_MIN_BYTES = 32 * 1024 * 1024
+
+# Usage-bearing paths for json_stream.load_fields (see json_stream for the spec format)
+GEMINI_SESSION_FIELDS = {
+    "sessionId": True,
+    "messages": [{"type": True, "model": True, "timestamp": True, "tokens": True}],
+}
+AMP_THREAD_FIELDS = {
+    "id": True, "created": True, "title": True, "env": True,
+    "messages": [{
+        "role": True,
+        "usage": True,
+        "content": [{"run": {"~debug": {"inferences": [{"usage": True}]}}}],
+    }],
+}
+CLINE_TASK_HISTORY_FIELDS = [{
+    key: True for key in ("id", "ts", "tokensIn", "tokensOut", "cacheWrites", "cacheReads", "totalCost",
+                          "modelId", "model", "cwdOnTaskInitialization")
+}]
+
+def _load_json(file_path, fields):
+    """Decode the whole file, or stream just `fields` out of it when it is huge."""
+    if os.path.getsize(file_path) >= STREAM_MIN_BYTES:
+        with open(file_path, "rb") as f, profiler.span("stream decode"):
+            return json_stream.load_fields(f, fields)
+    return json_backend.load_file(file_path)
+
+def _parse_gemini_session(file_path, proj_name):
+    try:
+        data = _load_json(file_path, GEMINI_SESSION_FIELDS)
+        session_id = data.get("sessionId")
+        for msg in data.get("messages", []):
+            if msg.get("type") == "gemini" and "tokens" in msg:
+                tokens = msg["tokens"]
+                model = msg.get("model", "unknown")
+                ts = msg.get("timestamp")
+                i, o, c = tokens.get("input", 0), tokens.get("output", 0), tokens.get("cached", 0)
+                d = ms = None
+                if ts:
+                    ms = time_buckets.iso_to_ms(ts)
+                    d = time_buckets.day_of(ms)
+                yield UsageEvent("Gemini CLI", None, session_id, ms, d, proj_name, model, i, o, c, 0, None)
+    except Exception as e:
+        profiler.failed(e)
+
+def gemini_units(cache=None, since=None):
+    """Work units for Gemini CLI session data in ~/.gemini/tmp/ (sessions last saved before
+    `since` are skipped)"""
     home_dir = os.path.expanduser("~")
     gemini_tmp = os.path.join(home_dir, ".gemini", "tmp")
     
     if not os.path.exists(gemini_tmp):
-        return
+        return []
     
-    proj_map = get_project_map()
+    with profiler.span("project map"):
+        proj_map = get_project_map(cache is not None and cache.persist)
     pattern = os.path.join(gemini_tmp, "*", "chats", "session-*.json")
-    session_files = glob.glob(pattern)
+    with profiler.span("glob sessions", root=gemini_tmp):
+        session_files = glob.glob(pattern)
+    cutoff = _mtime_cutoff(since)
     
+    units = []
     for file_path in session_files:
+        if _modified_before(file_path, cutoff):
+            continue
+        project_hash = os.path.basename(os.path.dirname(os.path.dirname(file_path)))
+        proj_name = proj_map.get(project_hash, project_hash[:8])
+        units.append(WorkUnit(file_path, [file_path], proj_name, _parse_gemini_session, (file_path, proj_name)))
+    return units
+
+CODEX_DEFAULT_MODEL = "gpt-5.2-codex"
+
+# Only turn_context and token_count events matter; lines without either marker are
+# skipped by a byte scan instead of being JSON-decoded
+_CODEX_MARKER = re.compile(rb'"(?:turn_context|token_count)"')
+
+def _codex_marked_lines(data):
+    """Yield the lines of `data` that contain a turn_context or token_count marker."""
+    pos = 0
+    while True:
+        m = _CODEX_MARKER.search(data, pos)
+        if not m:
+            return
+        start = data.rfind(b"\n", 0, m.start()) + 1
+        end = data.find(b"\n", m.end())
+        if end < 0:
+            end = len(data)
+        yield data[start:end]
+        pos = end + 1
+
+def _parse_codex_lines(lines, events, last_model, session_id, date_str, project, report=True):
+    """Append token_count usage from rollout lines to events; returns the last turn_context model seen.
+    Undecodable lines are skipped, and noted as failures when `report` is set."""
+    for line in lines:
         try:
-            project_hash = os.path.basename(os.path.dirname(os.path.dirname(file_path)))
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for msg in data.get("messages", []):
-                if msg.get("type") == "gemini" and "tokens" in msg:
-                    tokens = msg["tokens"]
-                    model = msg.get("model", "unknown")
-                    ts = msg.get("timestamp")
-                    i, o, c = tokens.get("input", 0), tokens.get("output", 0), tokens.get("cached", 0)
-                    cost = get_cost(model, i, o, c)
-                    
-                    model_usage[model]["input"] += i
-                    model_usage[model]["output"] += o
-                    model_usage[model]["cost"] += cost
-                    
-                    cli_usage["Gemini CLI"]["input"] += i
-                    cli_usage["Gemini CLI"]["output"] += o
-                    cli_usage["Gemini CLI"]["cost"] += cost
-                    
-                    proj_name = proj_map.get(project_hash, project_hash[:8])
-                    stats_by_project[proj_name]["input"] += i
-                    stats_by_project[proj_name]["output"] += o
-                    stats_by_project[proj_name]["cost"] += cost
-
-                    if ts:
-                        d = datetime.fromisoformat(ts.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                        stats_by_day[d]["input"] += i
-                        stats_by_day[d]["output"] += o
-                        stats_by_day[d]["cached"] += c
-                        stats_by_day[d]["cost"] += cost
-        except: continue
-
-def read_codex_data(stats_by_day, stats_by_project, model_usage, cli_usage):
-    """Read Codex CLI session data from ~/.codex/sessions/"""
+            event = json_backend.loads(line)
+            event_type = event.get("type")
+            payload = event.get("payload", {})
+            
+            # Track model from turn_context events
+            if event_type == "turn_context":
+                last_model = payload.get("model", CODEX_DEFAULT_MODEL)
+            
+            # Extract token usage from token_count events
+            elif event_type == "event_msg" and payload.get("type") == "token_count":
+                info = payload.get("info", {})
+                usage = info.get("last_token_usage", {})
+                
+                i = usage.get("input_tokens", 0)
+                o = usage.get("output_tokens", 0)
+                c = usage.get("cached_input_tokens", 0)
+                
+                # Only count if there's actual usage
+                if i > 0 or o > 0:
+                    ts = event.get("timestamp")
+                    ms = time_buckets.iso_to_ms(ts) if ts else None
+                    events.append(UsageEvent("Codex CLI", None, session_id, ms, date_str, project,
+                                             last_model, i, o, c, 0, None))
+        except Exception as e:
+            if report:
+                profiler.failed(e)
+            continue
+    return last_model
+
+def _tail_codex_rollout(file_path, strict=False, state=None):
+    """Parse the lines appended to a rollout file since `state` was saved by an earlier run.
+
+    Rollout files are append-only, so only the bytes past state["offset"] are read, starting from
+    the turn_context model that was current at that offset. A trailing line without its newline may
+    still be mid-write: its usage goes to "pending" and the offset stays before it until it completes.
+
+    With strict set, the prefiltered result is checked against decoding every line.
+    """
+    # Extract date from filename (format: rollout-YYYY-MM-DDThh-mm-ss-*.jsonl)
+    filename = os.path.basename(file_path)
+    date_str = filename.split("T")[0].replace("rollout-", "") if "T" in filename else time_buckets.today()
+    
+    # Extract project from path
+    parts = file_path.split(os.sep)
+    project = parts[-4] if len(parts) >= 4 else "codex-session"
+    session_id = os.path.splitext(filename)[0]
+    
+    try:
+        with open(file_path, "rb") as f:
+            head = profiler.read(f, 1024)
+            # Start over if the file was truncated or replaced since the offset was saved
+            if (not state or os.fstat(f.fileno()).st_size < state["offset"]
+                    or hashlib.sha1(head[:state["head_len"]]).hexdigest() != state["head"]):
+                state = {"offset": 0, "model": CODEX_DEFAULT_MODEL, "events": []}
+            f.seek(state["offset"])
+            data = profiler.read(f)
+    except Exception as e:
+        profiler.failed(e)
+        return {"offset": 0, "model": CODEX_DEFAULT_MODEL, "head_len": 0, "head": hashlib.sha1(b"").hexdigest(),
+                "events": [], "pending": []}
+    
+    complete = data.rfind(b"\n") + 1
+    events = list(state["events"])
+    last_model = _parse_codex_lines(_codex_marked_lines(data[:complete]), events, state["model"],
+                                    session_id, date_str, project)
+    if strict:
+        full = list(state["events"])
+        full_model = _parse_codex_lines(data[:complete].splitlines(), full, state["model"],
+                                        session_id, date_str, project, report=False)
+        if full != events or full_model != last_model:
+            print(f"[WARN] Codex line prefilter missed events in {file_path}; using the full decode")
+            events, last_model = full, full_model
+    pending = []
+    if data[complete:].strip():
+        # A line still being written doesn't decode yet; that is no failure
+        _parse_codex_lines([data[complete:]], pending, last_model, session_id, date_str, project, report=False)
+    
+    offset = state["offset"] + complete
+    head_len = min(len(head), offset)
+    return {
+        "offset": offset,
+        "model": last_model,
+        "head_len": head_len,
+        "head": hashlib.sha1(head[:head_len]).hexdigest(),
+        "events": events,
+        "pending": pending,
+    }
+
+def _in_date_prefix(prefix, since, until):
+    """Whether a date prefix ("%Y", "%Y-%m" or "%Y-%m-%d") overlaps [since, until]."""
+    return (since is None or prefix >= since[:len(prefix)]) and (until is None or prefix <= until[:len(prefix)])
+
+def _codex_session_files(codex_dir, since=None, until=None):
+    """Rollout files under codex_dir; with a date range, YYYY/MM/DD directories and
+    rollout-YYYY-MM-DD... files outside it are skipped without being listed or opened."""
+    if since is None and until is None:
+        # Find all JSONL files in the sessions directory (YYYY/MM/DD structure)
+        return glob.glob(os.path.join(codex_dir, "**", "*.jsonl"), recursive=True)
+    
+    session_files = []
+    for root, dirs, files in os.walk(codex_dir):
+        rel = os.path.relpath(root, codex_dir)
+        parts = [] if rel == os.curdir else rel.split(os.sep)
+        dated = len(parts) < 3 and all(part.isdigit() for part in parts)
+        # Like glob, skip hidden entries; prune date directories outside the range
+        dirs[:] = [d for d in dirs if not d.startswith(".") and
+                   not (dated and d.isdigit() and len(d) == (4 if not parts else 2) and
+                        not _in_date_prefix("-".join(parts + [d]), since, until))]
+        for name in files:
+            if name.startswith(".") or not name.endswith(".jsonl"):
+                continue
+            if name.startswith("rollout-") and "T" in name:
+                day = name[len("rollout-"):].split("T")[0]
+                if not _in_date_prefix(day, since, until):
+                    continue
+            session_files.append(os.path.join(root, name))
+    return session_files
+
+def codex_units(cache=None, strict_prefilter=False, since=None, until=None):
+    """Work units for Codex CLI session data in ~/.codex/sessions/ (only sessions dated within
+    [since, until] when given)"""
     home_dir = os.path.expanduser("~")
     codex_dir = os.path.join(home_dir, ".codex", "sessions")
     
     if not os.path.exists(codex_dir):
-        return
-    
-    # Find all JSONL files in the sessions directory (YYYY/MM/DD structure)
-    pattern = os.path.join(codex_dir, "**", "*.jsonl")
-    session_files = glob.glob(pattern, recursive=True)
+        return []
     
-    # Track last seen model per session file (to associate token counts with models)
-    last_model = {}
+    with profiler.span("glob sessions", root=codex_dir):
+        session_files = _codex_session_files(codex_dir, since, until)
     
-    for file_path in session_files:
+    # Unchanged files are served from the cache; grown files resume from the saved offset
+    return [WorkUnit(file_path, [file_path], None, _tail_codex_rollout, (file_path, strict_prefilter), True)
+            for file_path in session_files]
+
+def _parse_opencode_session(file_path):
+    """Return [session_id, session_date or None, created_ms], or [] if the session file is unreadable."""
+    try:
+        session = json_backend.load_file(file_path)
+        session_id = session.get("id", "unknown")
+        
+        # Get session creation time
+        session_time = session.get("time", {})
+        created_ts = session_time.get("created", 0)
+        session_date = time_buckets.day_of(created_ts) if created_ts else None
+        return [session_id, session_date, created_ts or None]
+    except Exception as e:
+        profiler.failed(e)
+        return []
+
+def _parse_opencode_messages(msg_files, project_hash, session_id, session_date, session_ms):
+    for msg_file in msg_files:
         try:
-            # Extract date from filename (format: rollout-YYYY-MM-DDThh-mm-ss-*.jsonl)
-            filename = os.path.basename(file_path)
-            date_str = filename.split("T")[0].replace("rollout-", "") if "T" in filename else datetime.now().strftime("%Y-%m-%d")
+            msg = json_backend.load_file(msg_file)
             
-            # Extract project from path
-            parts = file_path.split(os.sep)
-            project = parts[-4] if len(parts) >= 4 else "codex-session"
+            # Extract token usage from message (Opencode uses 'tokens' field)
+            tokens = msg.get("tokens", {})
+            if not tokens:
+                continue
+            
+            # Get model from modelID field
+            model = msg.get("modelID", "kimi-k2-5")
             
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        event = json.loads(line.strip())
-                        event_type = event.get("type")
-                        payload = event.get("payload", {})
-                        
-                        # Track model from turn_context events
-                        if event_type == "turn_context":
-                            model = payload.get("model", "gpt-5.2-codex")
-                            last_model[file_path] = model
-                        
-                        # Extract token usage from token_count events
-                        elif event_type == "event_msg" and payload.get("type") == "token_count":
-                            info = payload.get("info", {})
-                            usage = info.get("last_token_usage", {})
-                            
-                            # Get the model (use last seen model or default)
-                            model = last_model.get(file_path, "gpt-5.2-codex")
-                            
-                            i = usage.get("input_tokens", 0)
-                            o = usage.get("output_tokens", 0)
-                            c = usage.get("cached_input_tokens", 0)
-                            
-                            # Only count if there's actual usage
-                            if i > 0 or o > 0:
-                                cost = get_cost(model, i, o, c)
-                                
-                                model_usage[model]["input"] += i
-                                model_usage[model]["output"] += o
-                                model_usage[model]["cost"] += cost
-                                
-                                cli_usage["Codex CLI"]["input"] += i
-                                cli_usage["Codex CLI"]["output"] += o
-                                cli_usage["Codex CLI"]["cost"] += cost
-                                
-                                stats_by_project[project]["input"] += i
-                                stats_by_project[project]["output"] += o
-                                stats_by_project[project]["cost"] += cost
-                                
-                                stats_by_day[date_str]["input"] += i
-                                stats_by_day[date_str]["output"] += o
-                                stats_by_day[date_str]["cached"] += c
-                                stats_by_day[date_str]["cost"] += cost
-                    except:
-                        continue
-        except:
+            i = tokens.get("input", 0)
+            o = tokens.get("output", 0)
+            cache = tokens.get("cache", {})
+            c = cache.get("read", 0) if isinstance(cache, dict) else 0
+            
+            # Only count if there's actual usage
+            if i > 0 or o > 0:
+                # Use message creation time if available, otherwise session date
+                msg_time = msg.get("time", {})
+                msg_created = msg_time.get("created", 0)
+                if msg_created:
+                    d = time_buckets.day_of(msg_created)
+                else:
+                    d, msg_created = session_date, session_ms
+                
+                yield UsageEvent("Opencode CLI", None, session_id, msg_created or None, d, project_hash,
+                                 model, i, o, c, 0, None)
+        except Exception as e:
+            profiler.failed(e)
             continue
 
-def read_opencode_data(stats_by_day, stats_by_project, model_usage, cli_usage):
-    """Read Opencode CLI session data from ~/.local/share/opencode/"""
+def opencode_units(cache=None, since=None):
+    """Work units for Opencode CLI session data in ~/.local/share/opencode/
+
+    Session files are read here (they are small and name the message folder); the message
+    folders are returned as units, with the session file among their paths so it is counted
+    (and a change to it re-parses the folder). Sessions whose file and message folder were both last
+    changed before `since` are skipped unread.
+    """
     home_dir = os.path.expanduser("~")
     opencode_dir = os.path.join(home_dir, ".local", "share", "opencode", "storage")
     
     if not os.path.exists(opencode_dir):
-        return
+        return []
     
     # Find all session JSON files
     session_pattern = os.path.join(opencode_dir, "session", "**", "*.json")
-    session_files = glob.glob(session_pattern, recursive=True)
+    with profiler.span("glob sessions", root=opencode_dir):
+        session_files = glob.glob(session_pattern, recursive=True)
     
+    cutoff = _mtime_cutoff(since)
+    if cutoff is not None:
+        # Adding a message file touches its folder, named after the session (= the file name)
+        session_files = [file_path for file_path in session_files if not (_modified_before(file_path, cutoff) and
+                         _modified_before(os.path.join(opencode_dir, "message",
+                                                       os.path.splitext(os.path.basename(file_path))[0]), cutoff))]
+    # Looked up in scan-cache shard order, so a streaming scan (see iter_usage_events) reads each
+    # shard once; the units keep the order of the files
+    metas = {file_path: _parse_cached(cache, file_path, [file_path], None, _parse_opencode_session, file_path)
+             for file_path in (sorted(session_files, key=cache.shard_of) if cache is not None else session_files)}
+    units = []
     for file_path in session_files:
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                session = json.load(f)
+        meta = metas[file_path]
+        if not meta:
+            continue
+        session_id, session_date, session_ms = meta
+        session_date = session_date or time_buckets.today()
+        project_hash = os.path.basename(os.path.dirname(file_path))
+        
+        # Look for message files
+        msg_dir = os.path.join(opencode_dir, "message", session_id)
+        if os.path.exists(msg_dir):
+            with profiler.span("glob messages", session=session_id):
+                msg_files = glob.glob(os.path.join(msg_dir, "*.json"))
+            units.append(WorkUnit(msg_dir, [file_path] + msg_files, [project_hash, session_date],
+                                  _parse_opencode_messages,
+                                  (msg_files, project_hash, session_id, session_date, session_ms)))
+    return units
+
+def _parse_ampcode_thread(file_path):
+    events = []
+    try:
+        thread = _load_json(file_path, AMP_THREAD_FIELDS)
+        
+        thread_id = thread.get("id", "unknown")
+        created_ts = thread.get("created", 0)
+        
+        # Determine project name from repo URL (group threads by repo)
+        trees = thread.get("env", {}).get("initial", {}).get("trees", [])
+        project_name = None
+        for tree in trees:
+            repo_url = tree.get("repository", {}).get("url", "")
+            if repo_url:
+                # Extract repo name from URL (e.g. "https://github.com/user/repo" -> "repo")
+                project_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+                break
+            display = tree.get("displayName", "")
+            if display:
+                project_name = display
+                break
+        if not project_name:
+            project_name = thread.get("title", thread_id) or thread_id
+        
+        # Convert timestamp to date
+        if created_ts:
+            thread_date = time_buckets.day_of(created_ts)
+        else:
+            thread_date = time_buckets.today()
+        
+        # Process messages in the thread
+        messages = thread.get("messages", [])
+        
+        # Determine thread-level model from tags (fallback for messages without model)
+        tags = thread.get("env", {}).get("initial", {}).get("tags", [])
+        thread_model = None
+        for tag in tags:
+            if tag.startswith("model:") and tag != "model:undefined":
+                thread_model = tag.replace("model:", "")
+                break
+        if not thread_model:
+            thread_model = "claude-sonnet-4"  # default fallback
+        
+        # Helper to accumulate usage from a single usage dict
+        def _acc_usage(usage, thread_model=thread_model):
+            model = usage.get("model")
+            if not model:
+                max_input = usage.get("maxInputTokens", 0)
+                if max_input >= 200000:
+                    model = "gpt-5.1-codex-max"
+                else:
+                    model = thread_model
             
-            session_id = session.get("id", "unknown")
-            project_hash = os.path.basename(os.path.dirname(file_path))
+            i = usage.get("totalInputTokens", 0) or (
+                usage.get("inputTokens", 0) +
+                usage.get("cacheCreationInputTokens", 0) +
+                usage.get("cacheReadInputTokens", 0)
+            )
+            o = usage.get("outputTokens", 0)
+            c = usage.get("cacheReadInputTokens", 0)
+            cw = usage.get("cacheCreationInputTokens", 0)
             
-            # Get session creation time
-            session_time = session.get("time", {})
-            created_ts = session_time.get("created", 0)
-            if created_ts:
-                session_date = datetime.fromtimestamp(created_ts / 1000).strftime("%Y-%m-%d")
-            else:
-                session_date = datetime.now().strftime("%Y-%m-%d")
+            if i == 0 and o == 0:
+                return
             
-            # Look for message files
-            msg_dir = os.path.join(opencode_dir, "message", session_id)
-            if os.path.exists(msg_dir):
-                msg_files = glob.glob(os.path.join(msg_dir, "*.json"))
-                
-                for msg_file in msg_files:
-                    try:
-                        with open(msg_file, "r", encoding="utf-8") as mf:
-                            msg = json.load(mf)
-                        
-                        # Extract token usage from message (Opencode uses 'tokens' field)
-                        tokens = msg.get("tokens", {})
-                        if not tokens:
-                            continue
-                        
-                        # Get model from modelID field
-                        model = msg.get("modelID", "kimi-k2-5")
-                        
-                        i = tokens.get("input", 0)
-                        o = tokens.get("output", 0)
-                        cache = tokens.get("cache", {})
-                        c = cache.get("read", 0) if isinstance(cache, dict) else 0
-                        
-                        # Only count if there's actual usage
-                        if i > 0 or o > 0:
-                            cost = get_cost(model, i, o, c)
-                            
-                            model_usage[model]["input"] += i
-                            model_usage[model]["output"] += o
-                            model_usage[model]["cost"] += cost
-                            
-                            cli_usage["Opencode CLI"]["input"] += i
-                            cli_usage["Opencode CLI"]["output"] += o
-                            cli_usage["Opencode CLI"]["cost"] += cost
-                            
-                            stats_by_project[project_hash]["input"] += i
-                            stats_by_project[project_hash]["output"] += o
-                            stats_by_project[project_hash]["cost"] += cost
-                            
-                            # Use message creation time if available, otherwise session date
-                            msg_time = msg.get("time", {})
-                            msg_created = msg_time.get("created", 0)
-                            if msg_created:
-                                d = datetime.fromtimestamp(msg_created / 1000).strftime("%Y-%m-%d")
-                            else:
-                                d = session_date
-                            
-                            stats_by_day[d]["input"] += i
-                            stats_by_day[d]["output"] += o
-                            stats_by_day[d]["cached"] += c
-                            stats_by_day[d]["cost"] += cost
-                    except:
-                        continue
-        except:
-            continue
+            events.append(UsageEvent("Ampcode CLI", None, thread_id, created_ts or None, thread_date,
+                                     project_name, model, i, o, c, cw, None))
+        
+        # Calculate cost from message-level usage with API pricing
+        for msg in messages:
+                try:
+                    # Process assistant message top-level usage
+                    if msg.get("role") == "assistant":
+                        usage = msg.get("usage", {})
+                        if usage:
+                            _acc_usage(usage)
+                    
+                    # Process tool result inferences (e.g. painter/image generation)
+                    # These are on user messages at content[].run.~debug.inferences[].usage
+                    if msg.get("role") == "user":
+                        for part in msg.get("content", []):
+                            if not isinstance(part, dict):
+                                continue
+                            run = part.get("run", {})
+                            debug = run.get("~debug", {})
+                            for inf in debug.get("inferences", []):
+                                inf_usage = inf.get("usage", {})
+                                if inf_usage:
+                                    _acc_usage(inf_usage)
+                except Exception as e:
+                    profiler.failed(e)
+                    continue
+    except Exception as e:
+        profiler.failed(e)
+    return events
 
-def read_ampcode_data(stats_by_day, stats_by_project, model_usage, cli_usage):
-    """Read Ampcode CLI session data from ~/.local/share/amp/threads/"""
+def ampcode_units(cache=None, since=None):
+    """Work units for Ampcode CLI session data in ~/.local/share/amp/threads/ (threads last
+    saved before `since` are skipped)"""
     home_dir = os.path.expanduser("~")
     ampcode_dir = os.path.join(home_dir, ".local", "share", "amp", "threads")
     
     if not os.path.exists(ampcode_dir):
-        return
+        return []
     
     # Find all thread JSON files
     thread_pattern = os.path.join(ampcode_dir, "*.json")
     thread_files = glob.glob(thread_pattern)
+    cutoff = _mtime_cutoff(since)
     
-    for file_path in thread_files:
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                thread = json.load(f)
+    return [WorkUnit(file_path, [file_path], None, _parse_ampcode_thread, (file_path,)) for file_path in thread_files
+            if not _modified_before(file_path, cutoff)]
+
+def _parse_cline_task_history(history_file, cli_name, ide_name):
+    """Parse taskHistory.json (per-task totals) into one event per task."""
+    try:
+        tasks = _load_json(history_file, CLINE_TASK_HISTORY_FIELDS)
+        
+        for task in tasks:
+            ts = task.get("ts", 0)
+            if ts:
+                task_date = time_buckets.day_of(ts)
+            else:
+                task_date = time_buckets.today()
             
-            thread_id = thread.get("id", "unknown")
-            created_ts = thread.get("created", 0)
+            i = task.get("tokensIn", 0) or 0
+            o = task.get("tokensOut", 0) or 0
+            cw = task.get("cacheWrites", 0) or 0
+            cr = task.get("cacheReads", 0) or 0
+            cost = task.get("totalCost", 0) or 0
+            model = task.get("modelId") or task.get("model") or "unknown"
+            # Clean up provider-prefixed model names (e.g. "x-ai/grok-code-fast-1")
+            if "/" in model:
+                model = model.split("/", 1)[1]
             
-            # Determine project name from repo URL (group threads by repo)
-            trees = thread.get("env", {}).get("initial", {}).get("trees", [])
-            project_name = None
-            for tree in trees:
-                repo_url = tree.get("repository", {}).get("url", "")
-                if repo_url:
-                    # Extract repo name from URL (e.g. "https://github.com/user/repo" -> "repo")
-                    project_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
-                    break
-                display = tree.get("displayName", "")
-                if display:
-                    project_name = display
-                    break
-            if not project_name:
-                project_name = thread.get("title", thread_id) or thread_id
+            if i == 0 and o == 0:
+                continue
             
-            # Convert timestamp to date
-            if created_ts:
-                thread_date = datetime.fromtimestamp(created_ts / 1000).strftime("%Y-%m-%d")
-            else:
-                thread_date = datetime.now().strftime("%Y-%m-%d")
+            # Project from workspace directory
+            cwd = task.get("cwdOnTaskInitialization", "")
+            project = os.path.basename(cwd) if cwd else None
             
-            # Process messages in the thread
-            messages = thread.get("messages", [])
+            # Only add to projects if we found an actual project directory
+            # Don't add CLI names (Cline, Roo Code, Kilo Code) as projects
+            if not project or project == cli_name:
+                project = None
             
-            # Determine thread-level model from tags (fallback for messages without model)
-            tags = thread.get("env", {}).get("initial", {}).get("tags", [])
-            thread_model = None
-            for tag in tags:
-                if tag.startswith("model:") and tag != "model:undefined":
-                    thread_model = tag.replace("model:", "")
-                    break
-            if not thread_model:
-                thread_model = "claude-sonnet-4"  # default fallback
+            # If cost is reported, it is used directly; otherwise it is calculated from tokens
+            yield UsageEvent(cli_name, ide_name, task.get("id"), ts or None, task_date, project, model,
+                             i, o, cr, cw, cost or None)
+    except Exception as e:
+        profiler.failed(e)
+
+def _parse_cline_task_dir(task_path, cli_name, ide_name):
+    """Parse one task folder's ui_messages.json (plus api_conversation_history.json for the model)."""
+    ui_file = os.path.join(task_path, "ui_messages.json")
+    try:
+        messages = json_backend.load_file(ui_file)
+        
+        task_input = 0
+        task_output = 0
+        task_cache_reads = 0
+        task_cost = 0.0
+        task_date = None
+        task_ts = None
+        task_model = "unknown"
+        
+        # Try to extract model from api_conversation_history.json first
+        api_history_file = os.path.join(task_path, "api_conversation_history.json")
+        if os.path.exists(api_history_file):
+            try:
+                api_history = json_backend.load_file(api_history_file)
+                # Look for model in content field within messages
+                for msg in api_history:
+                    content = msg.get("content", "")
+                    # content can be a string or list of dicts
+                    if isinstance(content, list):
+                        for item in content:
+                            if isinstance(item, dict) and item.get("type") == "text":
+                                text = item.get("text", "")
+                                if "<model>" in text:
+                                    model_match = re.search(r'<model>([^<]+)</model>', text)
+                                    if model_match:
+                                        task_model = model_match.group(1).strip()
+                                        # Clean up provider-prefixed model names
+                                        if "/" in task_model:
+                                            task_model = task_model.split("/", 1)[1]
+                                        break
+                    elif isinstance(content, str) and "<model>" in content:
+                        model_match = re.search(r'<model>([^<]+)</model>', content)
+                        if model_match:
+                            task_model = model_match.group(1).strip()
+                            if "/" in task_model:
+                                task_model = task_model.split("/", 1)[1]
+                    if task_model != "unknown":
+                        break
+            except Exception as e:
+                profiler.failed(e)
+        
+        for msg in messages:
+            ts = msg.get("ts", 0)
+            if ts and not task_date:
+                task_date = time_buckets.day_of(ts)
+                task_ts = ts
             
-            # Helper to accumulate usage from a single usage dict
-            def _acc_usage(usage, thread_model=thread_model):
-                model = usage.get("model")
-                if not model:
-                    max_input = usage.get("maxInputTokens", 0)
-                    if max_input >= 200000:
-                        model = "gpt-5.1-codex-max"
-                    else:
-                        model = thread_model
-                
-                i = usage.get("totalInputTokens", 0) or (
-                    usage.get("inputTokens", 0) +
-                    usage.get("cacheCreationInputTokens", 0) +
-                    usage.get("cacheReadInputTokens", 0)
-                )
-                o = usage.get("outputTokens", 0)
-                c = usage.get("cacheReadInputTokens", 0)
-                cw = usage.get("cacheCreationInputTokens", 0)
-                
-                if i == 0 and o == 0:
-                    return
-                
-                cost = get_cost(model, i, o, c, cw)
-                
-                model_usage[model]["input"] += i
-                model_usage[model]["output"] += o
-                model_usage[model]["cost"] += cost
-                
-                cli_usage["Ampcode CLI"]["input"] += i
-                cli_usage["Ampcode CLI"]["output"] += o
-                cli_usage["Ampcode CLI"]["cost"] += cost
-                
-                stats_by_project[project_name]["input"] += i
-                stats_by_project[project_name]["output"] += o
-                stats_by_project[project_name]["cost"] += cost
-                
-                stats_by_day[thread_date]["input"] += i
-                stats_by_day[thread_date]["output"] += o
-                stats_by_day[thread_date]["cached"] += c
-                stats_by_day[thread_date]["cost"] += cost
+            say_type = msg.get("say", "")
+            if say_type in ("api_req_started", "deleted_api_reqs", "subagent_usage"):
+                try:
+                    usage_data = json_backend.loads(msg.get("text", "{}"))
+                    task_input += usage_data.get("tokensIn", 0) or 0
+                    task_output += usage_data.get("tokensOut", 0) or 0
+                    task_cache_reads += usage_data.get("cacheReads", 0) or 0
+                    task_cost += usage_data.get("cost", 0) or 0
+                    # Kilo Code stores inferenceProvider instead of model
+                    # Only use if we haven't found model from api_conversation_history
+                    if task_model == "unknown" and usage_data.get("inferenceProvider"):
+                        task_model = usage_data["inferenceProvider"]
+                    # If still unknown, label by CLI + protocol
+                    if task_model == "unknown" and usage_data.get("apiProtocol"):
+                        task_model = cli_name + " (" + usage_data["apiProtocol"] + ")"
+                except Exception as e:
+                    profiler.failed(e)
             
-            # Calculate cost from message-level usage with API pricing
-            for msg in messages:
-                    try:
-                        # Process assistant message top-level usage
-                        if msg.get("role") == "assistant":
-                            usage = msg.get("usage", {})
-                            if usage:
-                                _acc_usage(usage)
-                        
-                        # Process tool result inferences (e.g. painter/image generation)
-                        # These are on user messages at content[].run.~debug.inferences[].usage
-                        if msg.get("role") == "user":
-                            for part in msg.get("content", []):
-                                if not isinstance(part, dict):
-                                    continue
-                                run = part.get("run", {})
-                                debug = run.get("~debug", {})
-                                for inf in debug.get("inferences", []):
-                                    inf_usage = inf.get("usage", {})
-                                    if inf_usage:
-                                        _acc_usage(inf_usage)
-                    except:
-                        continue
-        except:
-            continue
+            # Try to get model info (only if not already found)
+            if task_model == "unknown":
+                model_info = msg.get("modelInfo", {})
+                if model_info and model_info.get("modelId"):
+                    task_model = model_info["modelId"]
+        
+        if task_input == 0 and task_output == 0:
+            return []
+        
+        task_cache_writes = 0  # ui_messages doesn't separate cache writes reliably
+        
+        if not task_date:
+            task_date = time_buckets.today()
+        
+        # Get project from workspace directory (cwd) if available
+        # For Cline, this comes from taskHistory.json (cwdOnTaskInitialization)
+        # For Kilo Code/Roo Code, we try to find it in the messages
+        project = None
+        
+        # Try to get cwd from message metadata (some extensions store it differently)
+        for msg in messages:
+            # Check various possible locations for cwd
+            cwd = msg.get("cwd") or msg.get("workingDirectory") or msg.get("root")
+            if cwd:
+                project = os.path.basename(cwd) if cwd else None
+                break
+            # Check if there's a modelInfo with project info
+            model_info = msg.get("modelInfo", {})
+            if model_info and model_info.get("workspace"):
+                project = os.path.basename(model_info["workspace"]) if model_info["workspace"] else None
+                break
+        
+        # Only add to projects if we found an actual project directory
+        # Don't add CLI names (Cline, Roo Code, Kilo Code) as projects
+        if not project or project == cli_name:
+            project = None
+        
+        # If reported cost is 0, it is recalculated from API pricing
+        return [UsageEvent(cli_name, ide_name, os.path.basename(task_path), task_ts, task_date, project,
+                           task_model, task_input, task_output, task_cache_reads, task_cache_writes,
+                           task_cost or None)]
+    except Exception as e:
+        profiler.failed(e)
+        return []
 
-def read_cline_family_data(stats_by_day, stats_by_project, model_usage, cli_usage):
-    """Read Cline, Roo Code, and Kilo Code task data from VS Code globalStorage."""
+def _cline_family_dirs():
+    """(cli_name, ide_name, extension_dir) for every place Cline, Roo Code, and Kilo Code may keep data."""
     home_dir = os.path.expanduser("~")
     appdata = os.environ.get("APPDATA", os.path.join(home_dir, "AppData", "Roaming"))
     
@@ -586,236 +817,307 @@ def read_cline_family_data(stats_by_day, stats_by_project, model_usage, cli_usag
             for ext_id in ext_list:
                 tools[cli_name].append(os.path.join(root, ext_id))
     
-    for cli_name, paths in tools.items():
-        for base_path in paths:
-            # Method 1: Parse taskHistory.json (has per-task totals)
-            history_file = os.path.join(base_path, "state", "taskHistory.json")
-            if os.path.exists(history_file):
-                try:
-                    with open(history_file, "r", encoding="utf-8") as f:
-                        tasks = json.load(f)
-                    
-                    for task in tasks:
-                        ts = task.get("ts", 0)
-                        if ts:
-                            task_date = datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d")
-                        else:
-                            task_date = datetime.now().strftime("%Y-%m-%d")
-                        
-                        i = task.get("tokensIn", 0) or 0
-                        o = task.get("tokensOut", 0) or 0
-                        cw = task.get("cacheWrites", 0) or 0
-                        cr = task.get("cacheReads", 0) or 0
-                        cost = task.get("totalCost", 0) or 0
-                        model = task.get("modelId") or task.get("model") or "unknown"
-                        # Clean up provider-prefixed model names (e.g. "x-ai/grok-code-fast-1")
-                        if "/" in model:
-                            model = model.split("/", 1)[1]
-                        
-                        if i == 0 and o == 0:
-                            continue
-                        
-                        # If cost is reported, use it directly; otherwise calculate
-                        if not cost:
-                            cost = get_cost(model, i, o, cr, cw)
-                        
-                        # Project from workspace directory
-                        cwd = task.get("cwdOnTaskInitialization", "")
-                        project = os.path.basename(cwd) if cwd else None
-                        
-                        # Only add to projects if we found an actual project directory
-                        # Don't add CLI names (Cline, Roo Code, Kilo Code) as projects
-                        if project and project != cli_name:
-                            stats_by_project[project]["input"] += i
-                            stats_by_project[project]["output"] += o
-                            stats_by_project[project]["cost"] += cost
-                        
-                        model_usage[model]["input"] += i
-                        model_usage[model]["output"] += o
-                        model_usage[model]["cost"] += cost
-                        
-                        cli_usage[cli_name]["input"] += i
-                        cli_usage[cli_name]["output"] += o
-                        cli_usage[cli_name]["cost"] += cost
-                        
-                        # Also track by IDE (VS Code, Cursor, etc.)
-                        ide_root = os.path.dirname(base_path)
-                        if ide_root in ide_to_cli:
-                            ide_name = ide_to_cli[ide_root]
-                            cli_usage[ide_name]["input"] += i
-                            cli_usage[ide_name]["output"] += o
-                            cli_usage[ide_name]["cost"] += cost
-                        
-                        stats_by_day[task_date]["input"] += i
-                        stats_by_day[task_date]["output"] += o
-                        stats_by_day[task_date]["cached"] += cr
-                        stats_by_day[task_date]["cost"] += cost
-                except:
-                    pass
-                continue  # Don't double-count from ui_messages if taskHistory exists
-            
-            # Method 2: Fallback — parse individual task ui_messages.json files
-            tasks_dir = os.path.join(base_path, "tasks")
-            if not os.path.exists(tasks_dir):
+    return [(cli_name, ide_to_cli.get(os.path.dirname(base_path)), base_path)
+            for cli_name, paths in tools.items() for base_path in paths]
+
+def _cline_dir_units(cli_name, ide_name, base_path, cutoff=None):
+    """Work units for one extension's storage directory, without files last changed before cutoff."""
+    # Method 1: Parse taskHistory.json (has per-task totals)
+    history_file = os.path.join(base_path, "state", "taskHistory.json")
+    if os.path.exists(history_file):
+        # Don't double-count from ui_messages if taskHistory exists
+        if _modified_before(history_file, cutoff):
+            return []
+        return [WorkUnit(history_file, [history_file], [cli_name, ide_name],
+                         _parse_cline_task_history, (history_file, cli_name, ide_name))]
+    
+    # Method 2: Fallback — parse individual task ui_messages.json files
+    tasks_dir = os.path.join(base_path, "tasks")
+    if not os.path.exists(tasks_dir):
+        return []
+    
+    units = []
+    try:
+        for task_id in os.listdir(tasks_dir):
+            task_path = os.path.join(tasks_dir, task_id)
+            if not os.path.isdir(task_path):
                 continue
             
-            try:
-                for task_id in os.listdir(tasks_dir):
-                    task_path = os.path.join(tasks_dir, task_id)
-                    if not os.path.isdir(task_path):
-                        continue
-                    
-                    ui_file = os.path.join(task_path, "ui_messages.json")
-                    if not os.path.exists(ui_file):
-                        continue
-                    
-                    try:
-                        with open(ui_file, "r", encoding="utf-8") as f:
-                            messages = json.load(f)
-                        
-                        task_input = 0
-                        task_output = 0
-                        task_cache_reads = 0
-                        task_cost = 0.0
-                        task_date = None
-                        task_model = "unknown"
-                        
-                        # Try to extract model from api_conversation_history.json first
-                        api_history_file = os.path.join(task_path, "api_conversation_history.json")
-                        if os.path.exists(api_history_file):
-                            try:
-                                with open(api_history_file, "r", encoding="utf-8") as af:
-                                    api_history = json.load(af)
-                                # Look for model in content field within messages
-                                for msg in api_history:
-                                    content = msg.get("content", "")
-                                    # content can be a string or list of dicts
-                                    if isinstance(content, list):
-                                        for item in content:
-                                            if isinstance(item, dict) and item.get("type") == "text":
-                                                text = item.get("text", "")
-                                                if "<model>" in text:
-                                                    model_match = re.search(r'<model>([^<]+)</model>', text)
-                                                    if model_match:
-                                                        task_model = model_match.group(1).strip()
-                                                        # Clean up provider-prefixed model names
-                                                        if "/" in task_model:
-                                                            task_model = task_model.split("/", 1)[1]
-                                                        break
-                                    elif isinstance(content, str) and "<model>" in content:
-                                        model_match = re.search(r'<model>([^<]+)</model>', content)
-                                        if model_match:
-                                            task_model = model_match.group(1).strip()
-                                            if "/" in task_model:
-                                                task_model = task_model.split("/", 1)[1]
-                                    if task_model != "unknown":
-                                        break
-                            except:
-                                pass
-                        
-                        for msg in messages:
-                            ts = msg.get("ts", 0)
-                            if ts and not task_date:
-                                task_date = datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d")
-                            
-                            say_type = msg.get("say", "")
-                            if say_type in ("api_req_started", "deleted_api_reqs", "subagent_usage"):
-                                try:
-                                    usage_data = json.loads(msg.get("text", "{}"))
-                                    task_input += usage_data.get("tokensIn", 0) or 0
-                                    task_output += usage_data.get("tokensOut", 0) or 0
-                                    task_cache_reads += usage_data.get("cacheReads", 0) or 0
-                                    task_cost += usage_data.get("cost", 0) or 0
-                                    # Kilo Code stores inferenceProvider instead of model
-                                    # Only use if we haven't found model from api_conversation_history
-                                    if task_model == "unknown" and usage_data.get("inferenceProvider"):
-                                        task_model = usage_data["inferenceProvider"]
-                                    # If still unknown, label by CLI + protocol
-                                    if task_model == "unknown" and usage_data.get("apiProtocol"):
-                                        task_model = cli_name + " (" + usage_data["apiProtocol"] + ")"
-                                except:
-                                    pass
-                            
-                            # Try to get model info (only if not already found)
-                            if task_model == "unknown":
-                                model_info = msg.get("modelInfo", {})
-                                if model_info and model_info.get("modelId"):
-                                    task_model = model_info["modelId"]
-                        
-                        if task_input == 0 and task_output == 0:
-                            continue
-                        
-                        # If reported cost is 0, recalculate from API pricing
-                        if not task_cost:
-                            task_cache_writes = 0  # ui_messages doesn't separate cache writes reliably
-                            task_cost = get_cost(task_model, task_input, task_output, task_cache_reads, task_cache_writes)
-                        
-                        if not task_date:
-                            task_date = datetime.now().strftime("%Y-%m-%d")
-                        
-                        model_usage[task_model]["input"] += task_input
-                        model_usage[task_model]["output"] += task_output
-                        model_usage[task_model]["cost"] += task_cost
-                        
-                        cli_usage[cli_name]["input"] += task_input
-                        cli_usage[cli_name]["output"] += task_output
-                        cli_usage[cli_name]["cost"] += task_cost
-                        
-                        # Also track by IDE (VS Code, Cursor, etc.)
-                        ide_root = os.path.dirname(base_path)
-                        if ide_root in ide_to_cli:
-                            ide_name = ide_to_cli[ide_root]
-                            cli_usage[ide_name]["input"] += task_input
-                            cli_usage[ide_name]["output"] += task_output
-                            cli_usage[ide_name]["cost"] += task_cost
-                        
-                        # Get project from workspace directory (cwd) if available
-                        # For Cline, this comes from taskHistory.json (cwdOnTaskInitialization)
-                        # For Kilo Code/Roo Code, we try to find it in the messages
-                        project = None
-                        
-                        # Try to get cwd from message metadata (some extensions store it differently)
-                        for msg in messages:
-                            # Check various possible locations for cwd
-                            cwd = msg.get("cwd") or msg.get("workingDirectory") or msg.get("root")
-                            if cwd:
-                                project = os.path.basename(cwd) if cwd else None
-                                break
-                            # Check if there's a modelInfo with project info
-                            model_info = msg.get("modelInfo", {})
-                            if model_info and model_info.get("workspace"):
-                                project = os.path.basename(model_info["workspace"]) if model_info["workspace"] else None
-                                break
-                        
-                        # Only add to projects if we found an actual project directory
-                        # Don't add CLI names (Cline, Roo Code, Kilo Code) as projects
-                        if project and project != cli_name:
-                            stats_by_project[project]["input"] += task_input
-                            stats_by_project[project]["output"] += task_output
-                            stats_by_project[project]["cost"] += task_cost
-                        
-                        stats_by_day[task_date]["input"] += task_input
-                        stats_by_day[task_date]["output"] += task_output
-                        stats_by_day[task_date]["cached"] += task_cache_reads
-                        stats_by_day[task_date]["cost"] += task_cost
-                    except:
-                        continue
-            except:
+            ui_file = os.path.join(task_path, "ui_messages.json")
+            if not os.path.exists(ui_file) or _modified_before(ui_file, cutoff):
                 continue
+            
+            api_history_file = os.path.join(task_path, "api_conversation_history.json")
+            units.append(WorkUnit(ui_file, [ui_file, api_history_file], [cli_name, ide_name],
+                                  _parse_cline_task_dir, (task_path, cli_name, ide_name)))
+    except Exception as e:
+        profiler.failed(e)
+    return units
+
+def cline_family_units(cache=None, since=None):
+    """Work units for Cline, Roo Code, and Kilo Code task data in VS Code globalStorage (files
+    last changed before `since` are skipped)."""
+    cutoff = _mtime_cutoff(since)
+    units = []
+    for cli_name, ide_name, base_path in _cline_family_dirs():
+        with profiler.span("scan extension dir", root=base_path):
+            units += _cline_dir_units(cli_name, ide_name, base_path, cutoff)
+    return units
+
+def usage_readers(cache=None, strict_prefilter=False, since=None, until=None):
+    """(reader, storage roots, find) for every CLI reader; find() returns its work units."""
+    home_dir = os.path.expanduser("~")
+    return [
+        ("Gemini CLI", [os.path.join(home_dir, ".gemini")], lambda: gemini_units(cache, since)),
+        ("Codex CLI", [os.path.join(home_dir, ".codex", "sessions")],
+         lambda: codex_units(cache, strict_prefilter, since, until)),
+        ("Opencode CLI", [os.path.join(home_dir, ".local", "share", "opencode", "storage")],
+         lambda: opencode_units(cache, since)),
+        ("Ampcode CLI", [os.path.join(home_dir, ".local", "share", "amp", "threads")],
+         lambda: ampcode_units(cache, since)),
+        ("Cline family", [base_path for _, _, base_path in _cline_family_dirs()],
+         lambda: cline_family_units(cache, since)),
+    ]
 
-def generate_data():
-    """Aggregate data from all CLI tools"""
-    stats_by_day = defaultdict(lambda: {"input": 0, "output": 0, "cached": 0, "cost": 0.0})
-    stats_by_project = defaultdict(lambda: {"input": 0, "output": 0, "cost": 0.0})
-    model_usage = defaultdict(lambda: {"input": 0, "output": 0, "cost": 0.0})
-    cli_usage = defaultdict(lambda: {"input": 0, "output": 0, "cost": 0.0})
+def storage_roots():
+    """Directories the readers take usage data from (some may not exist yet)."""
+    return [root for _, roots, _ in usage_readers() for root in roots]
+
+_DAY_FIELD = UsageEvent._fields.index("day")
+
+def _in_range(events, since, until):
+    """The events dated from since to until (inclusive; None = open), as lists."""
+    if since is None and until is None:
+        return events
+    # Files are cached whole; usage outside the range (e.g. taskHistory.json tasks by
+    # their ts, older messages of a recent session) is dropped here
+    return [event for event in events if event[_DAY_FIELD] is not None and
+            (since is None or event[_DAY_FIELD] >= since) and (until is None or event[_DAY_FIELD] <= until)]
+
+def _ingest(warehouse, cache, version, unit, events):
+    """Store a unit's events in the warehouse unless it already holds them for these files."""
+    sig = cache.signature(unit.paths, unit.context) if cache is not None else \
+        {"files": file_signature(unit.paths), "ctx": unit.context}
+    sig = json.dumps([version, sig], separators=(",", ":"))
+    if not warehouse.unchanged(unit.key, sig):
+        warehouse.ingest(unit.key, sig, events)
+
+def iter_usage_events(use_cache=True, workers=None, strict_prefilter=False, cache=None, profile=None,
+                      since=None, until=None, warehouse=None, stream=False):
+    """Yield a UsageEvent for every usage record found by all CLI readers.
+
+    workers: parser processes for files that are not cached (default: one per CPU, 1 = serial).
+    strict_prefilter: double-check the Codex line prefilter against a full decode.
+    cache: ScanCache to use instead of the on-disk one (watch mode keeps a single one in memory).
+    profile: profiler.Profile to record per-reader counters and timings in (--profile).
+    since, until: only yield usage from these days ("%Y-%m-%d", inclusive). The readers skip
+    files that can't hold any (by date in the path for Codex, by modification time otherwise).
+    warehouse: Warehouse to upsert the events of every file read into (all of them, whatever
+    the date range); files it already holds unchanged are not written again.
+    stream: go through the files in scan-cache shard order, holding one shard's cached events at
+    a time, so memory stays flat however long the history is (events then come file by file in
+    that order rather than CLI by CLI).
+    """
+    # Unchanged files are served from the on-disk scan cache instead of being re-parsed
+    if cache is None and use_cache:
+        cache = ScanCache(reader_version=reader_version())
+    stream = stream and cache is not None
+    if stream:
+        cache.max_shards = 1
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    windowed = since is not None or until is not None
+    if cache is not None and windowed:
+        # Files skipped for the date range keep their cache entries
+        cache.partial = True
     
-    # Read data from all CLI tools
-    read_gemini_data(stats_by_day, stats_by_project, model_usage, cli_usage)
-    read_codex_data(stats_by_day, stats_by_project, model_usage, cli_usage)
-    read_opencode_data(stats_by_day, stats_by_project, model_usage, cli_usage)
-    read_ampcode_data(stats_by_day, stats_by_project, model_usage, cli_usage)
-    read_cline_family_data(stats_by_day, stats_by_project, model_usage, cli_usage)
+    # Discover files from all CLI tools first, so a single worker pool parses them all
+    units = []
+    for reader, _, find in usage_readers(cache, strict_prefilter, since, until):
+        units += profile.discover(reader, find) if profile is not None else find()
+    if stream:
+        units.sort(key=lambda unit: cache.shard_of(unit.key))
+    version = reader_version()
+    for events, unit in zip(run_units(units, cache, workers, profile), units):
+        if warehouse is not None:
+            _ingest(warehouse, cache, version, unit, events)
+        for event in _in_range(events, since, until):
+            yield UsageEvent._make(event)
+    
+    if warehouse is not None:
+        warehouse.commit()
+    if cache is not None:
+        cache.save()
+    if profile is not None:
+        profile.finish()
+
+class LiveUsage:
+    """Usage kept in memory between watch-mode scans, so a refresh only redoes what changed.
+
+    It holds the work units each reader found and the rows every unit's events take up in the
+    last scan's EventStore. After start_run(changed), a scan re-discovers only the readers with
+    a storage root under or above a changed path, runs only the units that are new, differ from
+    last time or have a file under a changed path (through the scan cache), and copies the rows
+    of every other unit from the previous store.
+    """
+
+    def __init__(self, cache, workers=None, strict_prefilter=False, since=None, until=None, warehouse=None):
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        self.strict_prefilter = strict_prefilter
+        self.since = since
+        self.until = until
+        self.warehouse = warehouse
+        if since is not None or until is not None:
+            # Files skipped for the date range keep their cache entries
+            cache.partial = True
+        self.units = {}                     # reader -> its WorkUnits as last found
+        self.found = {}                     # reader -> cache keys its file discovery looked up
+        self.rows = {}                      # unit key -> (unit, start, end) in self.events
+        self.events = EventStore.from_events([])
+        self.changed = None                 # paths changed since the last scan; None = all
+        self.prefixes = ()
+
+    def start_run(self, changed=None):
+        self.cache.start_run(changed)
+        self.changed = changed
+        self.prefixes = tuple(path.rstrip(os.sep) + os.sep for path in changed or ())
+
+    def _touched(self, path):
+        return self.changed is None or path in self.changed or path.startswith(self.prefixes)
+
+    def _reader_changed(self, roots):
+        if self.changed is None:
+            return True
+        return any(self._touched(root) or any(path.startswith(root.rstrip(os.sep) + os.sep) for path in self.changed)
+                   for root in roots)
+
+    def _reusable(self, unit):
+        kept = self.rows.get(unit.key)
+        return kept is not None and kept[0] == unit and not any(self._touched(path) for path in unit.paths)
+
+    def scan(self, profile=None):
+        """The (unpriced) EventStore of all usage now on disk, or the warehouse's store with one."""
+        units = []
+        for reader, roots, find in usage_readers(self.cache, self.strict_prefilter, self.since, self.until):
+            if reader not in self.units or self._reader_changed(roots):
+                seen = set(self.cache.seen)
+                self.units[reader] = profile.discover(reader, find) if profile is not None else find()
+                # Opencode caches its session files while finding units; keep those entries too
+                self.found[reader] = self.cache.seen.keys() - seen
+            else:
+                for key in self.found[reader]:
+                    self.cache.keep(key)
+            units += self.units[reader]
+        fresh = [unit for unit in units if not self._reusable(unit)]
+        version = reader_version()
+        parsed = {}
+        for events, unit in zip(run_units(fresh, self.cache, self.workers, profile), fresh):
+            if self.warehouse is not None:
+                _ingest(self.warehouse, self.cache, version, unit, events)
+            parsed[unit.key] = _in_range(events, self.since, self.until)
+
+        # Runs of rows copied from the previous store, as [start, end], or lists of new events
+        pieces = []
+        rows = {}
+        count = 0
+        for unit in units:
+            events = parsed.get(unit.key)
+            if events is None:
+                self.cache.keep(unit.key)
+                _, start, end = self.rows[unit.key]
+                if pieces and isinstance(pieces[-1], tuple) and pieces[-1][1] == start:
+                    pieces[-1] = (pieces[-1][0], end)
+                else:
+                    pieces.append((start, end))
+                size = end - start
+            else:
+                if pieces and isinstance(pieces[-1], list):
+                    pieces[-1] += events
+                else:
+                    pieces.append(list(events))
+                size = len(events)
+            rows[unit.key] = (unit, count, count + size)
+            count += size
+        if self.warehouse is None:
+            self.events = EventStore.concat([self.events.slice(*piece) if isinstance(piece, tuple)
+                                             else EventStore.from_events(piece) for piece in pieces])
+        self.rows = rows
+
+        if self.warehouse is not None:
+            self.warehouse.commit()
+        self.cache.save()
+        if profile is not None:
+            profile.finish()
+        if self.warehouse is not None:
+            return self.warehouse.store(self.since, self.until)
+        return self.events
+
+def load_event_store(use_cache=True, workers=None, strict_prefilter=False, pricing=None, cache=None, profile=None,
+                     since=None, until=None, warehouse=None, live=None):
+    """Columnar EventStore of all usage events, priced with `pricing` (a PricingTable; default
+    the table from pricing.json). Re-pricing it later with store.price() needs no file reads.
+    With a warehouse, the scan is ingested into it and a WarehouseStore over everything it
+    holds (including files the CLIs have since deleted) is returned instead. With live (a
+    LiveUsage, in watch mode) the scan is its own, made with the arguments it was set up with."""
+    if live is not None:
+        store = live.scan(profile)
+        pricing = pricing or PRICING_TABLE
+        store.price(pricing.price_for)
+        return store
+    events = iter_usage_events(use_cache, workers, strict_prefilter, cache, profile, since, until, warehouse)
+    if warehouse is not None:
+        for _ in events:
+            pass
+        store = warehouse.store(since, until)
+    else:
+        store = EventStore.from_events(events)
+    pricing = pricing or PRICING_TABLE
+    store.price(pricing.price_for)
+    return store
+
+def export_usage(path, fmt=None, clis=None, use_cache=True, workers=None, strict_prefilter=False, pricing=None,
+                 profile=None, since=None, until=None, warehouse=None):
+    """Stream every usage event from since to until to path (see usage_export), priced with
+    `pricing`; returns the number of events written. clis limits it to these CLIs or IDEs, as
+    the dashboard's cli filter does. Without a warehouse the events of every file are written as
+    they are read (from the scan cache, shard by shard, where it has them); with one, the scan is
+    ingested into it first and everything it holds is exported."""
+    events = iter_usage_events(use_cache, workers, strict_prefilter, None, profile, since, until, warehouse,
+                               stream=True)
+    if warehouse is not None:
+        for _ in events:
+            pass
+        store = warehouse.store(since, until)
+        if clis:
+            store = store.filter([(("cli", "ide"), set(clis).__contains__)])
+        events = store.events()
+    elif clis:
+        events = (event for event in events if event.cli in clis or event.ide in clis)
+    return usage_export.write_events(events, path, fmt, (pricing or PRICING_TABLE).price_for)
+
+def cli_rollup(store):
+    """Usage per CLI, with Cline-family usage also counted under the IDE it ran in."""
+    totals = store.group_by("cli")
+    totals.update(store.group_by("ide"))
+    # List names in the order they first occur, CLI before IDE
+    cli_usage = {}
+    for cli, ide in store.group_by(("cli", "ide"), dropna=False):
+        for name in (cli, ide) if ide else (cli,):
+            if name not in cli_usage:
+                cli_usage[name] = totals[name]
+    return cli_usage
+
+def dashboard_data(store):
+    """The dashboard payload (days, projects, models, CLIs, totals and the hour x weekday heatmap)
+    for a priced EventStore."""
+    stats_by_day = store.group_by("day")
+    index = TimeIndex.from_store(store)
+    totals = index.totals()
+    stats_by_project = store.group_by("project")
+    model_usage = store.group_by("model")
+    cli_usage = cli_rollup(store)
     
     sorted_days = sorted(stats_by_day.keys())
     # Sort projects by cost descending for the data structure
@@ -842,18 +1144,56 @@ def generate_data():
         "cli_costs": [v["cost"] for c, v in sorted_cli],
         "cli_inputs": [v["input"] for c, v in sorted_cli],
         "cli_outputs": [v["output"] for c, v in sorted_cli],
+        "heatmap": index.heatmap,
         "totals": {
-            "cost": sum(v["cost"] for v in stats_by_day.values()),
-            "input": sum(v["input"] for v in stats_by_day.values()),
-            "output": sum(v["output"] for v in stats_by_day.values()),
-            "cached": sum(v["cached"] for v in stats_by_day.values()),
-            "avg_day": sum(v["cost"] for v in stats_by_day.values()) / max(len(sorted_days), 1)
+            "cost": totals["cost"],
+            "input": totals["input"],
+            "output": totals["output"],
+            "cached": totals["cached"],
+            "avg_day": totals["cost"] / max(len(sorted_days), 1),
+            # Relative to the last day with usage
+            "month_to_date": index.month_to_date(sorted_days[-1])["cost"] if sorted_days else 0.0,
+            "avg_7d": index.moving_average("cost", sorted_days[-1]) if sorted_days else 0.0,
         }
     }
 
-def main():
-    data = generate_data()
-    html_template = f"""
+def generate_data(use_cache=True, workers=None, strict_prefilter=False, pricing=None, cache=None, profile=None,
+                  since=None, until=None, warehouse=None, live=None):
+    """Aggregate data from all CLI tools (see iter_usage_events and load_event_store for the arguments)"""
+    store = load_event_store(use_cache, workers, strict_prefilter, pricing, cache, profile, since, until, warehouse,
+                             live)
+    data = dashboard_data(store)
+    if use_cache:
+        (pricing or PRICING_TABLE).save()
+    return data
+
+def render_dashboard(data=None, api=None, poll_seconds=5, detail_url="dashboard_detail/{name}.js"):
+    """The dashboard page: renders `data` (a payload from dashboard_payload.shape_payload) when
+    given, otherwise fetches it from the `api` URL (relative to the page, with the page's query
+    string as filters) and re-fetches it every poll_seconds. Detail shards are loaded on demand
+    from detail_url: script files (which work from file:// pages) or API URLs."""
+    if data is not None:
+        # "</" is escaped so a project name can't close the script element
+        payload = json.dumps(data).replace("</", "<\\/")
+        load_script = f"renderDashboard({payload});"
+    else:
+        load_script = f"""
+        let etag = null;
+        async function refresh() {{
+            try {{
+                // An unchanged payload comes back as an empty 304
+                const res = await fetch({json.dumps(api)} + location.search,
+                                        {{ cache: 'no-store', headers: etag ? {{ 'If-None-Match': etag }} : {{}} }});
+                if (res.status === 304 || !res.ok) return;
+                etag = res.headers.get('ETag');
+                const modified = res.headers.get('Last-Modified');
+                if (modified) document.getElementById('lastUpdated').textContent = formatTime(new Date(modified));
+                renderDashboard(await res.json());
+            }} catch (e) {{}}
+        }}
+        refresh();
+        setInterval(refresh, {int(poll_seconds * 1000)});"""
+    return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -882,7 +1222,7 @@ def main():
             </div>
             <div class="text-right">
                 <span class="text-xs font-semibold uppercase tracking-wider text-slate-500">Last Updated</span>
-                <p class="text-sm font-medium text-slate-300">{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+                <p id="lastUpdated" class="text-sm font-medium text-slate-300">{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
             </div>
         </header>
 
@@ -890,41 +1230,52 @@ def main():
         <div class="grid grid-cols-1 md:grid-cols-3 lg:grid-cols-5 gap-6 mb-10">
             <div class="glass p-6 rounded-2xl shadow-xl border-l-4 border-blue-500">
                 <p class="text-sm text-slate-400 font-medium mb-1">Input Tokens</p>
-                <h3 class="text-2xl font-bold text-white">{data['totals']['input']:,}</h3>
+                <h3 id="totalInput" class="text-2xl font-bold text-white">-</h3>
                 <div class="mt-2 text-xs text-blue-400 font-medium">Context Sent</div>
             </div>
             <div class="glass p-6 rounded-2xl shadow-xl border-l-4 border-purple-500">
                 <p class="text-sm text-slate-400 font-medium mb-1">Output Tokens</p>
-                <h3 class="text-2xl font-bold text-white">{data['totals']['output']:,}</h3>
+                <h3 id="totalOutput" class="text-2xl font-bold text-white">-</h3>
                 <div class="mt-2 text-xs text-purple-400 font-medium">Responses Gen</div>
             </div>
             <div class="glass p-6 rounded-2xl shadow-xl border-l-4 border-emerald-500">
                 <p class="text-sm text-slate-400 font-medium mb-1">Cached Tokens</p>
-                <h3 class="text-2xl font-bold text-white">{data['totals']['cached']:,}</h3>
+                <h3 id="totalCached" class="text-2xl font-bold text-white">-</h3>
                 <div class="mt-2 text-xs text-emerald-400 font-medium">Efficiency Savings</div>
             </div>
             <div class="glass p-6 rounded-2xl shadow-xl border-l-4 border-slate-500">
                 <p class="text-sm text-slate-400 font-medium mb-1">Total Tokens</p>
-                <h3 class="text-2xl font-bold text-white">{data['totals']['input'] + data['totals']['output']:,}</h3>
+                <h3 id="totalTokens" class="text-2xl font-bold text-white">-</h3>
                 <div class="mt-2 text-xs text-slate-400 font-medium">Combined Usage</div>
             </div>
             <div class="glass p-6 rounded-2xl shadow-xl border-l-4 border-amber-500">
                 <p class="text-sm text-slate-400 font-medium mb-1">Total Cost</p>
-                <h3 class="text-2xl font-bold text-white">${data['totals']['cost']:,.2f}</h3>
-                <div class="mt-2 text-xs text-amber-400 font-medium">Est. API Spend</div>
+                <h3 id="totalCost" class="text-2xl font-bold text-white">-</h3>
+                <div id="recentCost" class="mt-2 text-xs text-amber-400 font-medium">Est. API Spend</div>
             </div>
         </div>
 
         <!-- Charts Grid -->
         <div class="grid grid-cols-1 lg:grid-cols-2 gap-8 mb-10">
             <div class="glass p-6 rounded-2xl">
-                <h3 class="text-lg font-semibold mb-6">Daily Cost Trend</h3>
+                <div class="flex justify-between items-center mb-6">
+                    <h3 id="costTitle" class="text-lg font-semibold">Daily Cost Trend</h3>
+                    <div class="flex gap-2 text-xs font-semibold">
+                        <button id="daysMore" class="px-2 py-1 text-blue-400" style="display: none;" onclick="showDetail('days')"></button>
+                        <button class="period px-3 py-1 rounded-lg" data-period="day" onclick="setPeriod('day')">Day</button>
+                        <button class="period px-3 py-1 rounded-lg" data-period="week" onclick="setPeriod('week')">Week</button>
+                        <button class="period px-3 py-1 rounded-lg" data-period="month" onclick="setPeriod('month')">Month</button>
+                    </div>
+                </div>
                 <div style="height: 350px; position: relative;">
                     <canvas id="costChart"></canvas>
                 </div>
             </div>
             <div class="glass p-6 rounded-2xl">
-                <h3 class="text-lg font-semibold mb-6">Usage by Model</h3>
+                <div class="flex justify-between items-center mb-6">
+                    <h3 class="text-lg font-semibold">Usage by Model</h3>
+                    <button id="modelsMore" class="text-xs font-semibold text-blue-400" style="display: none;" onclick="showDetail('models')"></button>
+                </div>
                 <div style="height: 280px; position: relative;" class="mb-6">
                     <canvas id="modelChart"></canvas>
                 </div>
@@ -939,8 +1290,7 @@ def main():
                                 <th class="py-2 text-right" style="width: 12%;">Cost</th>
                             </tr>
                         </thead>
-                        <tbody class="divide-y divide-slate-800">
-                            {''.join([f"<tr><td class='py-1.5 font-medium text-slate-300 truncate' title='{m}'>{m}</td><td class='py-1.5 text-right text-slate-500'>{i:,}</td><td class='py-1.5 text-right text-slate-500'>{o:,}</td><td class='py-1.5 text-right text-slate-400'>{t:,}</td><td class='py-1.5 text-right text-blue-400 font-semibold'>${v:,.2f}</td></tr>" for m, i, o, t, v in sorted(zip(data['models'], data['model_inputs'], data['model_outputs'], data['model_tokens'], data['model_costs']), key=lambda x: x[4], reverse=True)])}
+                        <tbody id="modelTable" class="divide-y divide-slate-800">
                         </tbody>
                     </table>
                 </div>
@@ -951,11 +1301,16 @@ def main():
             <div class="glass p-6 rounded-2xl">
                 <h3 class="text-lg font-semibold mb-6">Usage Breakdown</h3>
                 <div class="overflow-y-auto max-h-[400px]">
-                    <canvas id="projectChart" style="height: {max(400, len(data['projects']) * 30)}px"></canvas>
+                    <div id="projectChartBox" style="height: 400px; position: relative;">
+                        <canvas id="projectChart"></canvas>
+                    </div>
                 </div>
             </div>
             <div class="glass p-6 rounded-2xl overflow-hidden">
-                <h3 class="text-lg font-semibold mb-4 px-2">All Projects</h3>
+                <div class="flex justify-between items-center mb-4 px-2">
+                    <h3 class="text-lg font-semibold">All Projects</h3>
+                    <button id="projectsMore" class="text-xs font-semibold text-blue-400" style="display: none;" onclick="showDetail('projects')"></button>
+                </div>
                 <div class="max-h-[400px] overflow-y-auto">
                     <table class="w-full text-left text-sm" style="table-layout: fixed;">
                         <thead class="text-slate-500 uppercase text-xs border-b border-slate-700 sticky top-0 bg-[#1e293b] z-10">
@@ -965,14 +1320,19 @@ def main():
                                 <th class="py-3 px-2 text-right" style="width: 25%;">Cost</th>
                             </tr>
                         </thead>
-                        <tbody class="divide-y divide-slate-800">
-                            {''.join([f"<tr><td class='py-3 px-2 font-medium truncate' title='{p}'>{p}</td><td class='py-3 px-2 text-right text-slate-400'>{c:,}</td><td class='py-3 px-2 text-right text-blue-400 font-semibold'>${v:,.2f}</td></tr>" for p, c, v in zip(data['projects'], data['project_tokens'], data['project_costs'])])}
+                        <tbody id="projectTable" class="divide-y divide-slate-800">
                         </tbody>
                     </table>
                 </div>
             </div>
         </div>
 
+        <!-- Hour x Weekday Heatmap -->
+        <div class="glass p-6 rounded-2xl mb-8">
+            <h3 class="text-lg font-semibold mb-6">Cost by Hour and Weekday</h3>
+            <div id="heatmap" class="text-xs text-slate-500" style="display: grid; grid-template-columns: 2.5rem repeat(24, minmax(0, 1fr)); gap: 3px;"></div>
+        </div>
+
         <!-- CLI Comparison Section -->
         <div class="glass p-6 rounded-2xl mt-8">
             <h3 class="text-lg font-semibold mb-6">CLI Usage Comparison (Ranked by Cost)</h3>
@@ -990,8 +1350,7 @@ def main():
                                 <th class="py-3 px-2 text-right" style="width: 20%;">Cost</th>
                             </tr>
                         </thead>
-                        <tbody class="divide-y divide-slate-800">
-                            {''.join([f"<tr><td class='py-3 px-2 font-medium text-slate-300'>{c}</td><td class='py-3 px-2 text-right text-slate-500'>{i:,}</td><td class='py-3 px-2 text-right text-slate-500'>{o:,}</td><td class='py-3 px-2 text-right text-blue-400 font-semibold'>${v:,.2f}</td></tr>" for c, i, o, v in zip(data['cli_names'], data['cli_inputs'], data['cli_outputs'], data['cli_costs'])])}
+                        <tbody id="cliTable" class="divide-y divide-slate-800">
                         </tbody>
                     </table>
                 </div>
@@ -1000,129 +1359,478 @@ def main():
     </div>
 
     <script>
-        const ctxCost = document.getElementById('costChart').getContext('2d');
-        new Chart(ctxCost, {{
-            type: 'line',
-            data: {{
-                labels: {json.dumps(data['days'])},
-                datasets: [{{
-                    label: 'Daily Cost ($)',
-                    data: {json.dumps(data['daily_costs'])},
-                    borderColor: '#3b82f6',
-                    backgroundColor: 'rgba(59, 130, 246, 0.1)',
-                    fill: true,
-                    tension: 0.4,
-                    borderWidth: 3,
-                    pointRadius: 4,
-                    pointBackgroundColor: '#3b82f6'
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{ legend: {{ display: false }} }},
-                scales: {{
-                    y: {{ grid: {{ color: 'rgba(255,255,255,0.05)' }}, ticks: {{ color: '#94a3b8' }} }},
-                    x: {{ grid: {{ display: false }}, ticks: {{ color: '#94a3b8', maxRotation: 45, minRotation: 30, autoSkip: true, maxTicksLimit: 15 }} }}
-                }}
+        const formatInt = n => n.toLocaleString('en-US');
+        const formatCost = v => '$' + v.toLocaleString('en-US', {{ minimumFractionDigits: 2, maximumFractionDigits: 2 }});
+        const formatTime = d => d.getFullYear() + '-' + String(d.getMonth() + 1).padStart(2, '0') + '-' +
+            String(d.getDate()).padStart(2, '0') + ' ' + d.toTimeString().slice(0, 8);
+
+        function setText(id, text) {{
+            document.getElementById(id).textContent = text;
+        }}
+
+        // rows: lists of [text, class] cells; built with textContent so names can't inject markup
+        function fillTable(id, rows, titled) {{
+            document.getElementById(id).replaceChildren(...rows.map(cells => {{
+                const tr = document.createElement('tr');
+                cells.forEach(([text, cls], idx) => {{
+                    const td = document.createElement('td');
+                    td.className = cls;
+                    td.textContent = text;
+                    if (titled && idx === 0) td.title = text;
+                    tr.appendChild(td);
+                }});
+                return tr;
+            }}));
+        }}
+
+        // One row per weekday, one cell per local hour, shaded by cost
+        function drawHeatmap(heatmap) {{
+            const days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'];
+            const max = Math.max(...heatmap.costs.flat(), 0);
+            const cells = [document.createElement('div')];
+            for (let hour = 0; hour < 24; hour++) {{
+                const label = document.createElement('div');
+                label.textContent = hour % 3 === 0 ? hour : '';
+                cells.push(label);
             }}
-        }});
-
-        const ctxModel = document.getElementById('modelChart').getContext('2d');
-        new Chart(ctxModel, {{
-            type: 'doughnut',
-            data: {{
-                labels: {json.dumps(data['models'])},
-                datasets: [{{
-                    data: {json.dumps(data['model_costs'])},
-                    backgroundColor: ['#3b82f6', '#8b5cf6', '#10b981', '#f59e0b', '#ef4444', '#6366f1'],
-                    borderWidth: 0
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{
-                    legend: {{ position: 'bottom', labels: {{ color: '#94a3b8', padding: 20, usePointStyle: true }} }}
-                }},
-                cutout: '70%'
+            heatmap.costs.forEach((row, day) => {{
+                const label = document.createElement('div');
+                label.textContent = days[day];
+                cells.push(label);
+                row.forEach((cost, hour) => {{
+                    const cell = document.createElement('div');
+                    cell.style.height = '1.25rem';
+                    cell.style.borderRadius = '3px';
+                    cell.style.background = cost > 0 ? `rgba(59, 130, 246, ${{0.15 + 0.85 * cost / max}})` : 'rgba(255,255,255,0.04)';
+                    cell.title = `${{days[day]}} ${{String(hour).padStart(2, '0')}}:00 - ${{formatCost(cost)}}, ` +
+                        `${{formatInt(heatmap.events[day][hour])}} requests`;
+                    cells.push(cell);
+                }});
+            }});
+            document.getElementById('heatmap').replaceChildren(...cells);
+        }}
+
+        const charts = {{}};
+        function drawChart(id, config) {{
+            if (charts[id]) charts[id].destroy();
+            charts[id] = new Chart(document.getElementById(id).getContext('2d'), config);
+        }}
+
+        // Long breakdowns arrive cut to the top N plus "Other" (and long daily series decimated);
+        // the full lists are loaded as detail shards when asked for
+        const DETAIL_URL = {json.dumps(detail_url)};
+        const PERIOD_NAMES = {{ day: 'Daily', week: 'Weekly', month: 'Monthly' }};
+        let current = null;
+        let period = 'day';
+        const shards = {{}};
+        const expanded = new Set();
+
+        function showDetail(name) {{
+            expanded.add(name);
+            const url = DETAIL_URL.replace('{{name}}', encodeURIComponent(name));
+            if (url.endsWith('.js')) {{
+                // A script shard calls loadShard(); fetch() is not allowed from file:// pages
+                const script = document.createElement('script');
+                script.src = url;
+                document.head.appendChild(script);
+            }} else {{
+                fetch(url + location.search).then(res => res.json()).then(shard => loadShard(name, shard));
             }}
-        }});
-
-        const ctxProj = document.getElementById('projectChart').getContext('2d');
-        new Chart(ctxProj, {{
-            type: 'bar',
-            data: {{
-                labels: {json.dumps(data['projects'])},
-                datasets: [{{
-                    label: 'Cost by Project ($)',
-                    data: {json.dumps(data['project_costs'])},
-                    backgroundColor: '#3b82f6',
-                    borderRadius: 8
-                }}]
-            }},
-            options: {{
-                indexAxis: 'y',
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{ legend: {{ display: false }} }},
-                scales: {{
-                    x: {{ grid: {{ color: 'rgba(255,255,255,0.05)' }}, ticks: {{ color: '#94a3b8' }} }},
-                    y: {{ grid: {{ display: false }}, ticks: {{ color: '#94a3b8' }} }}
+        }}
+
+        function loadShard(name, shard) {{
+            shards[name] = shard;
+            draw();
+        }}
+
+        function setPeriod(name) {{
+            period = name;
+            draw();
+        }}
+
+        function renderDashboard(data) {{
+            current = data;
+            for (const name in shards) delete shards[name];
+            // Shards shown before belong to the previous data: load them again
+            for (const name of expanded) if (data.detail[name]) showDetail(name);
+            draw();
+        }}
+
+        function showMore(id, name, label) {{
+            const button = document.getElementById(id);
+            const count = current.detail[name];
+            button.style.display = count && !shards[name] ? '' : 'none';
+            button.textContent = 'Show all ' + (count || 0).toLocaleString('en-US') + ' ' + label;
+        }}
+
+        function draw() {{
+            const data = Object.assign({{}}, current, ...Object.values(shards));
+            showMore('projectsMore', 'projects', 'projects');
+            showMore('modelsMore', 'models', 'models');
+            showMore('daysMore', 'days', 'days');
+            if (period !== 'day') document.getElementById('daysMore').style.display = 'none';
+            document.querySelectorAll('.period').forEach(button => {{
+                const active = button.dataset.period === period;
+                button.classList.toggle('bg-blue-600', active);
+                button.classList.toggle('bg-slate-700', !active);
+            }});
+            const series = period === 'day' ? {{ labels: data.days, costs: data.daily_costs }}
+                : data[period === 'week' ? 'weeks' : 'months'];
+            setText('costTitle', PERIOD_NAMES[period] + ' Cost Trend');
+
+            setText('totalInput', formatInt(data.totals.input));
+            setText('totalOutput', formatInt(data.totals.output));
+            setText('totalCached', formatInt(data.totals.cached));
+            setText('totalTokens', formatInt(data.totals.input + data.totals.output));
+            setText('totalCost', formatCost(data.totals.cost));
+            setText('recentCost', 'Month to date ' + formatCost(data.totals.month_to_date) +
+                ' · 7-day avg ' + formatCost(data.totals.avg_7d));
+            drawHeatmap(data.heatmap);
+
+            fillTable('modelTable', data.models.map((m, idx) => [
+                [m, 'py-1.5 font-medium text-slate-300 truncate'],
+                [formatInt(data.model_inputs[idx]), 'py-1.5 text-right text-slate-500'],
+                [formatInt(data.model_outputs[idx]), 'py-1.5 text-right text-slate-500'],
+                [formatInt(data.model_tokens[idx]), 'py-1.5 text-right text-slate-400'],
+                [formatCost(data.model_costs[idx]), 'py-1.5 text-right text-blue-400 font-semibold'],
+            ]), true);
+            fillTable('projectTable', data.projects.map((p, idx) => [
+                [p, 'py-3 px-2 font-medium truncate'],
+                [formatInt(data.project_tokens[idx]), 'py-3 px-2 text-right text-slate-400'],
+                [formatCost(data.project_costs[idx]), 'py-3 px-2 text-right text-blue-400 font-semibold'],
+            ]), true);
+            fillTable('cliTable', data.cli_names.map((c, idx) => [
+                [c, 'py-3 px-2 font-medium text-slate-300'],
+                [formatInt(data.cli_inputs[idx]), 'py-3 px-2 text-right text-slate-500'],
+                [formatInt(data.cli_outputs[idx]), 'py-3 px-2 text-right text-slate-500'],
+                [formatCost(data.cli_costs[idx]), 'py-3 px-2 text-right text-blue-400 font-semibold'],
+            ]));
+            document.getElementById('projectChartBox').style.height = Math.max(400, data.projects.length * 30) + 'px';
+
+            drawChart('costChart', {{
+                type: 'line',
+                data: {{
+                    labels: series.labels,
+                    datasets: [{{
+                        label: PERIOD_NAMES[period] + ' Cost ($)',
+                        data: series.costs,
+                        borderColor: '#3b82f6',
+                        backgroundColor: 'rgba(59, 130, 246, 0.1)',
+                        fill: true,
+                        tension: 0.4,
+                        borderWidth: 3,
+                        pointRadius: 4,
+                        pointBackgroundColor: '#3b82f6'
+                    }}]
+                }},
+                options: {{
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {{ legend: {{ display: false }} }},
+                    scales: {{
+                        y: {{ grid: {{ color: 'rgba(255,255,255,0.05)' }}, ticks: {{ color: '#94a3b8' }} }},
+                        x: {{ grid: {{ display: false }}, ticks: {{ color: '#94a3b8', maxRotation: 45, minRotation: 30, autoSkip: true, maxTicksLimit: 15 }} }}
+                    }}
                 }}
-            }}
-        }});
-
-        const ctxCli = document.getElementById('cliChart').getContext('2d');
-        new Chart(ctxCli, {{
-            type: 'bar',
-            data: {{
-                labels: {json.dumps(data['cli_names'])},
-                datasets: [{{
-                    label: 'Cost by CLI ($)',
-                    data: {json.dumps(data['cli_costs'])},
-                    backgroundColor: ['#3b82f6', '#ef4444', '#10b981', '#f59e0b'],
-                    borderRadius: 8
-                }}]
-            }},
-            options: {{
-                indexAxis: 'y',
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{
-                    legend: {{ display: false }},
-                    tooltip: {{
-                        callbacks: {{
-                            label: function(context) {{
-                                return '$' + context.parsed.x.toFixed(2);
-                            }}
-                        }}
+            }});
+
+            drawChart('modelChart', {{
+                type: 'doughnut',
+                data: {{
+                    labels: data.models,
+                    datasets: [{{
+                        data: data.model_costs,
+                        backgroundColor: ['#3b82f6', '#8b5cf6', '#10b981', '#f59e0b', '#ef4444', '#6366f1'],
+                        borderWidth: 0
+                    }}]
+                }},
+                options: {{
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {{
+                        legend: {{ position: 'bottom', labels: {{ color: '#94a3b8', padding: 20, usePointStyle: true }} }}
+                    }},
+                    cutout: '70%'
+                }}
+            }});
+
+            drawChart('projectChart', {{
+                type: 'bar',
+                data: {{
+                    labels: data.projects,
+                    datasets: [{{
+                        label: 'Cost by Project ($)',
+                        data: data.project_costs,
+                        backgroundColor: '#3b82f6',
+                        borderRadius: 8
+                    }}]
+                }},
+                options: {{
+                    indexAxis: 'y',
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {{ legend: {{ display: false }} }},
+                    scales: {{
+                        x: {{ grid: {{ color: 'rgba(255,255,255,0.05)' }}, ticks: {{ color: '#94a3b8' }} }},
+                        y: {{ grid: {{ display: false }}, ticks: {{ color: '#94a3b8' }} }}
                     }}
+                }}
+            }});
+
+            drawChart('cliChart', {{
+                type: 'bar',
+                data: {{
+                    labels: data.cli_names,
+                    datasets: [{{
+                        label: 'Cost by CLI ($)',
+                        data: data.cli_costs,
+                        backgroundColor: ['#3b82f6', '#ef4444', '#10b981', '#f59e0b'],
+                        borderRadius: 8
+                    }}]
                 }},
-                scales: {{
-                    x: {{ 
-                        grid: {{ color: 'rgba(255,255,255,0.05)' }}, 
-                        ticks: {{ 
-                            color: '#94a3b8',
-                            callback: function(value) {{ return '$' + value.toFixed(0); }}
+                options: {{
+                    indexAxis: 'y',
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {{
+                        legend: {{ display: false }},
+                        tooltip: {{
+                            callbacks: {{
+                                label: function(context) {{
+                                    return '$' + context.parsed.x.toFixed(2);
+                                }}
+                            }}
                         }}
                     }},
-                    y: {{ grid: {{ display: false }}, ticks: {{ color: '#94a3b8', font: {{ weight: 'bold' }} }} }}
+                    scales: {{
+                        x: {{ 
+                            grid: {{ color: 'rgba(255,255,255,0.05)' }}, 
+                            ticks: {{ 
+                                color: '#94a3b8',
+                                callback: function(value) {{ return '$' + value.toFixed(0); }}
+                            }}
+                        }},
+                        y: {{ grid: {{ display: false }}, ticks: {{ color: '#94a3b8', font: {{ weight: 'bold' }} }} }}
+                    }}
                 }}
-            }}
-        }});
+            }});
+        }}
+        {load_script}
     </script>
 </body>
 </html>
     """
+
+def _write_atomic(path, text):
+    # Write to a temporary file first, so a browser reloading mid-refresh never sees half a file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_dashboard(data, output_path, top=DEFAULT_TOP, max_points=DEFAULT_MAX_POINTS, offline=False):
+    """Write the page for generate_data() output, with its detail shards as script files in
+    <name>_detail/ next to it. An offline page needs no network access (see offline_assets)."""
+    page, shards = shape_payload(data, top, max_points)
+    detail_dir = os.path.splitext(output_path)[0] + "_detail"
+    if shards:
+        os.makedirs(detail_dir, exist_ok=True)
+    for name, shard in shards.items():
+        payload = json.dumps(shard).replace("</", "<\\/")
+        _write_atomic(os.path.join(detail_dir, f"{name}.js"), f"loadShard({json.dumps(name)}, {payload});\n")
+    html = render_dashboard(page, detail_url=os.path.basename(detail_dir) + "/{name}.js")
+    _write_atomic(output_path, make_offline(html) if offline else html)
+
+def watch(watcher, live, refresh):
+    """Call refresh() whenever session data changes, until interrupted.
+
+    The LiveUsage of the first pass (and its scan cache) stays in memory between refreshes, so
+    only readers with changes look for files again, only files reported as changed are stat'ed
+    and re-parsed, and every other file's events are carried over from the previous pass.
+    """
+    try:
+        while True:
+            changed = wait_for_changes(watcher)
+            start = time.perf_counter()
+            live.start_run(changed)
+            refresh()
+            print(f"[OK] Dashboard updated ({len(changed)} changed, {live.cache.misses} re-parsed, "
+                  f"{time.perf_counter() - start:.2f}s)")
+    except KeyboardInterrupt:
+        print("[INFO] Stopped watching")
+    finally:
+        watcher.close()
+
+def report_profile(profile, args):
+    """Print the --profile report and write the --trace file for a profiled scan."""
+    if args.profile is not None:
+        print("\n".join(profile.report()))
+    if args.trace:
+        profile.write_trace(args.trace)
+        print(f"[OK] Trace written to {os.path.abspath(args.trace)} (open it in https://ui.perfetto.dev)")
+
+def serve(args, pricing, live=None, watcher=None, profile=None, warehouse=None):
+    """Serve the dashboard and its JSON API (see server.py) from an in-memory event store (or
+    the warehouse), brought up to date by live whenever the watcher reports changes. A profile
+    covers the first scan only."""
+    pricing = pricing or PRICING_TABLE
+
+    def load(profile=None):
+        return load_event_store(not args.no_cache, args.workers, args.strict_prefilter, pricing, None, profile,
+                                args.since, args.until, warehouse, live)
+
+    def summarize(store):
+        return shape_payload(dashboard_data(store), args.top, args.max_points)
+
+    page = render_dashboard(api="api/dashboard", detail_url="api/detail/{name}")
+    api = UsageAPI(summarize, cli_rollup, make_offline(page) if args.offline else page)
+    api.update(load(profile))
+    if profile is not None:
+        report_profile(profile, args)
+    httpd = make_server(api, args.host, args.port)
+    url = f"http://{args.host}:{httpd.server_address[1]}/"
+    print(f"[OK] Serving the dashboard at {url} (Ctrl+C to stop)")
+    webbrowser.open(url)
+    try:
+        if watcher is None:
+            httpd.serve_forever()
+        else:
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            watch(watcher, live, lambda: api.update(load()))
+    except KeyboardInterrupt:
+        print("[INFO] Server stopped")
+    finally:
+        httpd.server_close()
+        if not args.no_cache:
+            pricing.save()
+
+def parse_day(value):
+    """argparse type for --since/--until: YYYY-MM-DD, today, yesterday or Nd (N days ago)."""
+    today = date.fromisoformat(time_buckets.today())
+    if value == "today":
+        return today.isoformat()
+    if value == "yesterday":
+        return (today - timedelta(days=1)).isoformat()
+    if value.endswith("d") and value[:-1].isdigit():
+        return (today - timedelta(days=int(value[:-1]))).isoformat()
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, today, yesterday or Nd, got {value!r}")
+
+def at_least(minimum):
+    """argparse type for an integer option that must be >= minimum."""
+    def parse(value):
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected an integer, got {value!r}")
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {number}")
+        return number
+    return parse
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the AI CLI usage dashboard.")
+    parser.add_argument("--no-cache", action="store_true", help="re-parse every session file instead of using the scan cache")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes for uncached files (default: CPU count, 1 = serial)")
+    parser.add_argument("--strict-prefilter", action="store_true", help="verify the Codex line prefilter against a full JSON decode")
+    parser.add_argument("--pricing", metavar="FILE", help="price usage with this pricing file instead of pricing.json")
+    parser.add_argument("--since", type=parse_day, metavar="DAY", help="only count usage from DAY on (YYYY-MM-DD, today, yesterday or Nd for N days ago)")
+    parser.add_argument("--until", type=parse_day, metavar="DAY", help="only count usage up to and including DAY")
+    parser.add_argument("--tz", choices=time_buckets.ZONES, default=None,
+                        help="bucket usage into days and hours in local time or UTC (default: $AI_CLI_STATS_TZ or local)")
+    parser.add_argument("--watch", action="store_true", help="keep running and regenerate the dashboard when session data changes")
+    parser.add_argument("--poll", action="store_true", help="with --watch, poll for changes instead of using inotify")
+    parser.add_argument("--top", type=at_least(1), default=DEFAULT_TOP, help=f"rows per breakdown before the rest is grouped as Other (default: {DEFAULT_TOP})")
+    parser.add_argument("--max-points", type=at_least(3), default=DEFAULT_MAX_POINTS, help=f"points in the daily chart before it is decimated (default: {DEFAULT_MAX_POINTS}, at least 3)")
+    parser.add_argument("--offline", action="store_true", help="make a self-contained page that loads nothing from the internet")
+    parser.add_argument("--serve", action="store_true", help="serve the dashboard and a JSON API over HTTP instead of writing dashboard.html")
+    parser.add_argument("--host", default="127.0.0.1", help="address to serve on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to serve on (default: 8765, 0 = any free port)")
+    parser.add_argument("--profile", type=int, nargs="?", const=10, metavar="N",
+                        help="report files, bytes, events, failures and time per reader and storage root, "
+                             "and the N slowest files (default: 10)")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace-event JSON of the scan to FILE (opens in ui.perfetto.dev)")
+    parser.add_argument("--warehouse", nargs="?", const=default_warehouse_path(), default=os.environ.get("AI_CLI_STATS_WAREHOUSE"),
+                        metavar="FILE", help="keep every usage event in a SQLite file and report from it, so history "
+                                             f"the CLIs delete is kept (default: {default_warehouse_path()})")
+    parser.add_argument("--export", metavar="FILE",
+                        help="write every usage event to FILE instead of making the dashboard: Parquet or Arrow "
+                             "IPC with pyarrow installed, NDJSON otherwise, gzipped when FILE ends in .gz "
+                             "(picked by extension, e.g. usage.parquet, usage.arrow, usage.ndjson.gz)")
+    parser.add_argument("--format", choices=usage_export.FORMATS, help="with --export, the format to write regardless of extension")
+    parser.add_argument("--cli", metavar="NAMES", help="with --export, only export usage of these CLIs or IDEs (comma-separated)")
+    # The zone is set before --since/--until are parsed, so "today" is taken in it
+    zone = parser.parse_known_args()[0].tz
+    if zone:
+        time_buckets.use_zone(zone)
+        # Parser processes started by spawn import time_buckets afresh and read the zone from here
+        os.environ["AI_CLI_STATS_TZ"] = zone
+    args = parser.parse_args()
+    if args.since and args.until and args.since > args.until:
+        parser.error(f"--since {args.since} is after --until {args.until}")
+
+    if args.export:
+        # Fail before scanning when the format can't be written
+        try:
+            usage_export.pick_format(args.export, args.format)
+        except (ValueError, RuntimeError) as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+
+    if args.offline:
+        # Fail before scanning when Chart.js can't be had
+        try:
+            chartjs_source()
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+
+    pricing = load_pricing(args.pricing, use_cache=not args.no_cache) if args.pricing else None
+    profile = None
+    if args.profile is not None or args.trace:
+        profile = profiler.Profile(storage_roots(), args.profile or 10, trace=bool(args.trace))
+    warehouse = Warehouse(args.warehouse) if args.warehouse else None
+    live = watcher = None
+    if args.watch:
+        # Watch before the first scan, so nothing written during it is missed
+        watcher = open_watcher(storage_roots(), polling=args.poll)
+        live = LiveUsage(ScanCache(reader_version=reader_version(), persist=not args.no_cache), args.workers,
+                         args.strict_prefilter, args.since, args.until, warehouse)
+    if args.export:
+        clis = [name for name in args.cli.split(",") if name] if args.cli else None
+        count = export_usage(args.export, args.format, clis, use_cache=not args.no_cache, workers=args.workers,
+                             strict_prefilter=args.strict_prefilter, pricing=pricing, profile=profile,
+                             since=args.since, until=args.until, warehouse=warehouse)
+        if profile is not None:
+            report_profile(profile, args)
+        print(f"[OK] Exported {count:,} usage events to {os.path.abspath(args.export)}")
+        return
+    if args.serve:
+        serve(args, pricing, live, watcher, profile, warehouse)
+        return
+    data = generate_data(use_cache=not args.no_cache, workers=args.workers, strict_prefilter=args.strict_prefilter,
+                         pricing=pricing, profile=profile, since=args.since, until=args.until,
+                         warehouse=warehouse, live=live)
+    if profile is not None:
+        report_profile(profile, args)
     # Write to a file in the temporary directory or current directory
     output_path = os.path.abspath("dashboard.html")
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_template)
+    write_dashboard(data, output_path, args.top, args.max_points, args.offline)
     
     print(f"[OK] Multi-CLI Dashboard generated: {output_path}")
     print(f"[INFO] Now tracking: Gemini CLI, Codex CLI, Opencode CLI, Ampcode CLI, Cline, Roo Code, and Kilo Code")
     webbrowser.open(f"file://{output_path}")
+    if args.watch:
+        print("[INFO] Watching for changes (Ctrl+C to stop)")
+
+        def refresh():
+            write_dashboard(generate_data(use_cache=not args.no_cache, workers=args.workers,
+                                          strict_prefilter=args.strict_prefilter, pricing=pricing, live=live),
+                            output_path, args.top, args.max_points, args.offline)
+
+        watch(watcher, live, refresh)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,63 @@
+import os
+import json
+
+import profiler
+
+# Single JSON decoding layer used by the readers and diagnostic scripts.
+# Uses orjson or msgspec when installed (several times faster than the stdlib on large
+# session files) and falls back to the stdlib json module otherwise. Set
+# AI_CLI_STATS_JSON=json to force the stdlib backend (e.g. to compare results).
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def _find_decoder(name):
+    if name == "orjson":
+        try:
+            import orjson
+            return orjson.loads
+        except ImportError:
+            return None
+    if name == "msgspec":
+        try:
+            import msgspec
+            return msgspec.json.decode
+        except ImportError:
+            return None
+    return json.loads
+
+
+def use_backend(name=None):
+    """Select a backend by name, or the fastest installed one when name is None."""
+    global BACKEND, _decode
+    for candidate in ([name] if name else BACKENDS):
+        if candidate not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {candidate}")
+        decoder = _find_decoder(candidate)
+        if decoder is not None:
+            BACKEND, _decode = candidate, decoder
+            return BACKEND
+    BACKEND, _decode = "json", json.loads
+    return BACKEND
+
+
+BACKEND = "json"
+_decode = json.loads
+use_backend(os.environ.get("AI_CLI_STATS_JSON") or None)
+
+
+def loads(data):
+    """Decode a JSON document from bytes or str."""
+    if _decode is not json.loads:
+        try:
+            return _decode(data)
+        except Exception:
+            # Fast decoders reject a few inputs the stdlib accepts (NaN, integers beyond
+            # 64 bits, lone surrogates); let the stdlib have the final say.
+            pass
+    return json.loads(data)
+
+
+def load_file(path):
+    """Read and decode a JSON file straight from bytes, without a separate text decode step."""
+    return profiler.load_file(path, loads)
@@ -0,0 +1,192 @@
+import re
+import json
+
+import json_backend
+import profiler
+
+# Streaming, field-projecting JSON reader for session files too large to json.load whole.
+#
+# A field spec says which parts of the document to keep:
+#   True             -> keep this value as-is
+#   {"key": spec}    -> object; keep only the listed keys (others are skipped)
+#   [spec]           -> array; apply spec to every item
+# Values that are skipped, or whose type doesn't match the spec, are never built in memory;
+# skipped strings (e.g. base64 image payloads) are scanned in fixed-size chunks, so peak memory
+# stays proportional to the kept fields rather than to the file size.
+
+CHUNK_SIZE = 1 << 20
+
+_WS = re.compile(rb'[ \t\n\r]*')
+_PLAIN = re.compile(rb'[^"\[\]{}]*')
+_SCALAR = re.compile(rb'[^,\]}\s]*')
+
+_QUOTE, _BACKSLASH, _COLON, _COMMA = ord('"'), ord('\\'), ord(':'), ord(',')
+_LBRACE, _RBRACE, _LBRACKET, _RBRACKET = ord('{'), ord('}'), ord('['), ord(']')
+
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.buf = b""
+        self.pos = 0
+        self.mark = None  # start of a value being captured verbatim (kept across refills)
+
+    def _more(self):
+        """Drop consumed bytes and append the next chunk. Returns False at end of file."""
+        base = self.pos if self.mark is None else self.mark
+        chunk = profiler.read(self.f, CHUNK_SIZE)
+        self.buf = self.buf[base:] + chunk
+        self.pos -= base
+        if self.mark is not None:
+            self.mark = 0
+        return bool(chunk)
+
+    def _peek(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                raise ValueError("unexpected end of JSON input")
+
+    def _string(self, build):
+        """Consume a string (at its opening quote); returns it only if build is set."""
+        self.pos += 1
+        start = self.pos
+        parts = []
+        while True:
+            quote = self.buf.find(b'"', self.pos)
+            if quote < 0:
+                # The string runs past the buffer: consume it, but never split an escape sequence
+                cut = len(self.buf)
+                backslashes = 0
+                while cut - backslashes > start and self.buf[cut - backslashes - 1] == _BACKSLASH:
+                    backslashes += 1
+                cut -= backslashes % 2
+                if build:
+                    parts.append(self.buf[start:cut])
+                self.pos = cut
+                if not self._more():
+                    raise ValueError("unterminated string in JSON input")
+                start = self.pos
+                continue
+            # A quote preceded by an odd run of backslashes is escaped
+            backslashes = 0
+            while quote - backslashes > start and self.buf[quote - backslashes - 1] == _BACKSLASH:
+                backslashes += 1
+            self.pos = quote + 1
+            if backslashes % 2 == 0:
+                break
+        if not build:
+            return None
+        parts.append(self.buf[start:self.pos - 1])
+        raw = b"".join(parts)
+        if b"\\" not in raw:
+            return raw.decode("utf-8")
+        return json.loads(b'"' + raw + b'"')
+
+    def _scalar_end(self):
+        while True:
+            end = _SCALAR.match(self.buf, self.pos).end()
+            if end < len(self.buf) or not self._more():
+                return _SCALAR.match(self.buf, self.pos).end()
+
+    def _skip(self):
+        c = self._peek()
+        if c == _QUOTE:
+            self._string(False)
+            return
+        if c != _LBRACE and c != _LBRACKET:
+            end = self._scalar_end()
+            if end == self.pos:
+                raise ValueError("invalid JSON value at offset %d" % self.pos)
+            self.pos = end
+            return
+        depth = 0
+        while True:
+            self.pos = _PLAIN.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf):
+                if not self._more():
+                    raise ValueError("unexpected end of JSON input")
+                continue
+            c = self.buf[self.pos]
+            if c == _QUOTE:
+                self._string(False)
+                continue
+            self.pos += 1
+            if c == _LBRACE or c == _LBRACKET:
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _capture(self):
+        """Decode the next value whole with the regular (fast) decoder."""
+        self._peek()
+        self.mark = self.pos
+        try:
+            self._skip()
+            raw = self.buf[self.mark:self.pos]
+        finally:
+            self.mark = None
+        return json_backend.loads(raw)
+
+    def value(self, spec):
+        if spec is None:
+            self._skip()
+            return None
+        if spec is True:
+            return self._capture()
+        c = self._peek()
+        if c == _LBRACE and isinstance(spec, dict):
+            return self._object(spec)
+        if c == _LBRACKET and isinstance(spec, list):
+            return self._array(spec[0])
+        self._skip()
+        return None
+
+    def _separator(self, close):
+        c = self._peek()
+        self.pos += 1
+        if c == _COMMA:
+            return False
+        if c == close:
+            return True
+        raise ValueError("expected ',' or closing bracket at offset %d" % (self.pos - 1))
+
+    def _object(self, spec):
+        self.pos += 1
+        result = {}
+        if self._peek() == _RBRACE:
+            self.pos += 1
+            return result
+        while True:
+            if self._peek() != _QUOTE:
+                raise ValueError("expected object key at offset %d" % self.pos)
+            key = self._string(True)
+            if self._peek() != _COLON:
+                raise ValueError("expected ':' at offset %d" % self.pos)
+            self.pos += 1
+            sub = spec.get(key)
+            value = self.value(sub)
+            if sub is not None:
+                result[key] = value
+            if self._separator(_RBRACE):
+                return result
+
+    def _array(self, item_spec):
+        self.pos += 1
+        result = []
+        if self._peek() == _RBRACKET:
+            self.pos += 1
+            return result
+        while True:
+            result.append(self.value(item_spec))
+            if self._separator(_RBRACKET):
+                return result
+
+
+def load_fields(f, spec):
+    """Parse a JSON document from binary file f, keeping only the parts selected by spec."""
+    return _Reader(f).value(spec)
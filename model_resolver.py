@@ -0,0 +1,81 @@
+import re
+
+# Suffix rules applied in order by normalize_model_name, compiled once at import
+_NORMALIZE_RULES = [
+    # Trailing date like -20251001, -20251101, etc.
+    (re.compile(r'-\d{8}$'), ''),
+    # :free suffix (e.g. "kimi-k2.5:free" -> "kimi-k2.5")
+    (re.compile(r':free$'), ''),
+    # Thinking suffix (e.g. "claude-sonnet-4.5 (thinking)" -> "claude-sonnet-4.5")
+    (re.compile(r'\s*\(thinking\)$', re.IGNORECASE), ''),
+    # High/low/medium suffixes (e.g. "gemini-3-pro (high)" -> "gemini-3-pro")
+    (re.compile(r'\s*\((high|low|medium)\)$', re.IGNORECASE), ''),
+]
+
+
+def normalize_model_name(model):
+    """Strip date suffixes (e.g. -20251001) and :free suffix from model names for pricing lookup."""
+    normalized = model
+    for pattern, repl in _NORMALIZE_RULES:
+        normalized = pattern.sub(repl, normalized)
+    # Replace spaces with hyphens for consistency (e.g. "Claude Sonnet 4.5" -> "claude-sonnet-4.5")
+    return normalized.replace(' ', '-').lower()
+
+
+class ModelResolver:
+    """Maps raw model names to entries of a pricing table, memoizing every answer.
+
+    Lookup order: exact name, normalized name, then the family fallback - the longest
+    known name that the model extends by "-" segments (e.g. "claude-sonnet-4.5-xyz" ->
+    "claude-sonnet-4-5", "gpt-4o-2024-08-06" -> "gpt-4o"), also after dropping a
+    "provider/" prefix. Unknown models get the default entry.
+    """
+
+    def __init__(self, pricing, default, known=None):
+        self.pricing = pricing
+        self.default = default
+        # Raw name -> pricing key (None for unknown models); can be seeded from an earlier run
+        self.known = dict(known or {})
+
+    def key(self, model):
+        """Pricing key that model resolves to, or None."""
+        try:
+            return self.known[model]
+        except KeyError:
+            key = self.known[model] = self._lookup(model)
+            return key
+
+    def resolve(self, model):
+        key = self.key(model)
+        return self.pricing[key] if key is not None else self.default
+
+    __call__ = resolve
+
+    def _lookup(self, model):
+        if model in self.pricing:
+            return model
+        normalized = normalize_model_name(model)
+        if normalized in self.pricing:
+            return normalized
+        return self.family(normalized)
+
+    def family(self, normalized):
+        """Longest pricing key that `normalized` extends by whole "-" segments, or None."""
+        names = [normalized]
+        if "/" in normalized:
+            names.append(normalized.rsplit("/", 1)[1])
+        for name in names:
+            parts = name.split("-")
+            for end in range(len(parts), 0, -1):
+                candidate = "-".join(parts[:end])
+                if candidate in self.pricing:
+                    return candidate
+                # Pricing keys spell versions either way ("claude-sonnet-4-5" vs "gemini-2.5-pro")
+                candidate = candidate.replace(".", "-")
+                if candidate in self.pricing:
+                    return candidate
+        return None
+
+    def clear(self):
+        """Forget memoized answers (after the pricing table was changed in place)."""
+        self.known.clear()
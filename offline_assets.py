@@ -0,0 +1,172 @@
+import os
+import re
+import urllib.request
+
+from scan_cache import get_cache_dir
+
+# Self-contained dashboards for hosts without internet access: make_offline() swaps the
+# Tailwind browser compiler for CSS precompiled from the classes the page uses, inlines a
+# pinned Chart.js build and drops the Google Fonts stylesheet (pages fall back to system fonts).
+
+CHARTJS_VERSION = "4.4.0"
+CHARTJS_URL = f"https://cdn.jsdelivr.net/npm/chart.js@{CHARTJS_VERSION}/dist/chart.umd.min.js"
+# A copy placed here (or named by $AI_CLI_STATS_CHARTJS) is used without any download
+VENDOR_CHARTJS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor", "chart.umd.min.js")
+
+_REMOTE_TAGS = [
+    re.compile(r'\s*<script src="https://cdn\.tailwindcss\.com[^"]*"></script>'),
+    re.compile(r'\s*<link href="https://fonts\.googleapis\.com[^"]*" rel="stylesheet">'),
+]
+_CHARTJS_TAG = re.compile(r'<script src="https://cdn\.jsdelivr\.net/npm/chart\.js[^"]*"></script>')
+
+# The part of Tailwind's preflight the dashboards rely on
+PREFLIGHT = """*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}
+html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4}
+body{margin:0;line-height:inherit}
+h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}
+h1,h2,h3,h4,h5,h6,p{margin:0}
+table{text-indent:0;border-color:inherit;border-collapse:collapse}
+button{font-family:inherit;font-size:100%;font-weight:inherit;line-height:inherit;color:inherit;margin:0;padding:0;background-color:transparent;background-image:none;cursor:pointer}
+img,svg,canvas{display:block;vertical-align:middle}
+"""
+
+# Tailwind's default palette, for the colors the dashboards use
+COLORS = {
+    "white": "#ffffff", "black": "#000000",
+    "slate-50": "#f8fafc", "slate-100": "#f1f5f9", "slate-200": "#e2e8f0", "slate-300": "#cbd5e1",
+    "slate-400": "#94a3b8", "slate-500": "#64748b", "slate-600": "#475569", "slate-700": "#334155",
+    "slate-800": "#1e293b", "slate-900": "#0f172a",
+    "blue-400": "#60a5fa", "blue-500": "#3b82f6", "blue-600": "#2563eb",
+    "purple-400": "#c084fc", "purple-500": "#a855f7",
+    "emerald-400": "#34d399", "emerald-500": "#10b981",
+    "amber-400": "#fbbf24", "amber-500": "#f59e0b",
+    "red-400": "#f87171", "red-500": "#ef4444",
+}
+
+# Utilities with a fixed declaration
+STATIC = {
+    "flex": "display:flex", "grid": "display:grid", "hidden": "display:none",
+    "items-center": "align-items:center", "items-end": "align-items:flex-end",
+    "justify-between": "justify-content:space-between",
+    "sticky": "position:sticky", "top-0": "top:0", "z-10": "z-index:10",
+    "w-full": "width:100%", "max-w-7xl": "max-width:80rem", "mx-auto": "margin-left:auto;margin-right:auto",
+    "overflow-hidden": "overflow:hidden", "overflow-y-auto": "overflow-y:auto",
+    "truncate": "overflow:hidden;text-overflow:ellipsis;white-space:nowrap",
+    "text-left": "text-align:left", "text-right": "text-align:right", "uppercase": "text-transform:uppercase",
+    "font-medium": "font-weight:500", "font-semibold": "font-weight:600", "font-bold": "font-weight:700",
+    "font-black": "font-weight:900",
+    "font-mono": "font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace",
+    "tracking-tighter": "letter-spacing:-0.05em", "tracking-tight": "letter-spacing:-0.025em",
+    "tracking-wider": "letter-spacing:0.05em", "tracking-widest": "letter-spacing:0.1em",
+    "text-xs": "font-size:0.75rem;line-height:1rem", "text-sm": "font-size:0.875rem;line-height:1.25rem",
+    "text-base": "font-size:1rem;line-height:1.5rem", "text-lg": "font-size:1.125rem;line-height:1.75rem",
+    "text-xl": "font-size:1.25rem;line-height:1.75rem", "text-2xl": "font-size:1.5rem;line-height:2rem",
+    "text-3xl": "font-size:1.875rem;line-height:2.25rem", "text-4xl": "font-size:2.25rem;line-height:2.5rem",
+    "rounded-lg": "border-radius:0.5rem", "rounded-xl": "border-radius:0.75rem",
+    "rounded-2xl": "border-radius:1rem", "rounded-3xl": "border-radius:1.5rem",
+    "shadow-xl": "box-shadow:0 20px 25px -5px rgb(0 0 0 / 0.1),0 8px 10px -6px rgb(0 0 0 / 0.1)",
+    "border-b": "border-bottom-width:1px", "border-l-4": "border-left-width:4px",
+}
+
+_SPACING = {
+    "p": ("padding",), "px": ("padding-left", "padding-right"), "py": ("padding-top", "padding-bottom"),
+    "m": ("margin",), "mt": ("margin-top",), "mb": ("margin-bottom",), "gap": ("gap",),
+}
+_SPACING_RE = re.compile(r"^(p|px|py|m|mt|mb|gap)-(\d+(?:\.5)?)$")
+_COLOR_RE = re.compile(r"^(text|bg|border|divide)-(\[#[0-9a-fA-F]{3,8}\]|[a-z]+(?:-\d+)?)$")
+_ARBITRARY_RE = re.compile(r"^(text|max-h)-\[(\d+(?:\.\d+)?(?:px|rem))\]$")
+_GRID_RE = re.compile(r"^grid-cols-(\d+)$")
+_TOKEN_RE = re.compile(r"[\w:.\[\]#-]+")
+
+# Responsive variants, emitted after the base rules in this order
+BREAKPOINTS = {"md": "768px", "lg": "1024px"}
+
+
+def _escape(name):
+    return re.sub(r"([^a-zA-Z0-9_-])", r"\\\1", name)
+
+
+def _rule(utility):
+    """(selector suffix, declarations) for a utility class, or None when it isn't supported."""
+    if utility in STATIC:
+        return "", STATIC[utility]
+    if utility == "divide-y":
+        return " > :not([hidden]) ~ :not([hidden])", "border-top-width:1px;border-bottom-width:0"
+    match = _SPACING_RE.match(utility)
+    if match:
+        size = f"{float(match.group(2)) * 0.25:g}rem" if match.group(2) != "0" else "0"
+        return "", ";".join(f"{prop}:{size}" for prop in _SPACING[match.group(1)])
+    match = _GRID_RE.match(utility)
+    if match:
+        return "", f"grid-template-columns:repeat({match.group(1)},minmax(0,1fr))"
+    match = _ARBITRARY_RE.match(utility)
+    if match:
+        prop = "font-size" if match.group(1) == "text" else "max-height"
+        return "", f"{prop}:{match.group(2)}"
+    match = _COLOR_RE.match(utility)
+    if match:
+        kind, name = match.groups()
+        color = name[1:-1] if name.startswith("[") else COLORS.get(name)
+        if color is None:
+            return None
+        if kind == "divide":
+            return " > :not([hidden]) ~ :not([hidden])", f"border-color:{color}"
+        prop = {"text": "color", "bg": "background-color", "border": "border-color"}[kind]
+        return "", f"{prop}:{color}"
+    return None
+
+
+def compile_css(html):
+    """Preflight plus a rule for every supported utility class that occurs in html (in markup
+    or in script strings, like Tailwind's content scan)."""
+    base, variants = [], {bp: [] for bp in BREAKPOINTS}
+    for token in sorted(set(_TOKEN_RE.findall(html))):
+        variant, _, utility = token.rpartition(":")
+        if variant and variant not in BREAKPOINTS:
+            continue
+        rule = _rule(utility)
+        if rule is None:
+            continue
+        suffix, declarations = rule
+        css = f".{_escape(token)}{suffix}{{{declarations}}}"
+        (variants[variant] if variant else base).append(css)
+    lines = [PREFLIGHT.strip()] + base
+    for bp, rules in variants.items():
+        if rules:
+            lines.append(f"@media (min-width:{BREAKPOINTS[bp]}){{{''.join(rules)}}}")
+    return "\n".join(lines)
+
+
+def chartjs_source():
+    """The pinned Chart.js build: from $AI_CLI_STATS_CHARTJS, vendor/, or the cache dir, where it is
+    downloaded to on first use."""
+    for path in (os.environ.get("AI_CLI_STATS_CHARTJS"), VENDOR_CHARTJS):
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+    cached = os.path.join(get_cache_dir(), "assets", f"chart-{CHARTJS_VERSION}.umd.min.js")
+    if not os.path.exists(cached):
+        try:
+            with urllib.request.urlopen(CHARTJS_URL, timeout=30) as response:
+                source = response.read()
+        except OSError as e:
+            raise RuntimeError(f"Chart.js {CHARTJS_VERSION} is not available offline and could not be "
+                               f"downloaded ({e}); save {CHARTJS_URL} as {VENDOR_CHARTJS}") from e
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        tmp_path = cached + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(source)
+        os.replace(tmp_path, cached)
+    with open(cached, encoding="utf-8") as f:
+        return f.read()
+
+
+def make_offline(html):
+    """html with every remote asset replaced by an inline equivalent."""
+    for pattern in _REMOTE_TAGS:
+        html = pattern.sub("", html)
+    css = compile_css(html)
+    # Escaped so the library can't close its own script element
+    chartjs = re.sub(r"</(script)", r"<\\/\1", chartjs_source(), flags=re.IGNORECASE)
+    html = _CHARTJS_TAG.sub(lambda _: f"<script>{chartjs}</script>", html, count=1)
+    return html.replace("</head>", f"    <style>\n{css}\n    </style>\n</head>", 1)
@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+from bisect import bisect_right
+
+import json_backend
+from model_resolver import ModelResolver
+from scan_cache import get_cache_dir, file_signature
+
+# API pricing lives in pricing.json next to this file (or the file named by $AI_CLI_STATS_PRICING).
+# Each model maps to a price {"input", "output", "cached"[, "cache_write"]} in USD per 1M tokens,
+# or to a list of prices with a "since" date ("YYYY-MM-DD", inclusive) for models whose price
+# changed; the first entry may omit "since" and then also covers everything before the second.
+PRICING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pricing.json")
+
+# Bump when the layout of the compiled pricing cache changes
+COMPILED_FORMAT = 1
+
+_REQUIRED = ("input", "output", "cached")
+
+
+def _compile_models(models):
+    """Validate the models of a pricing file into {key: [[since, price], ...]} sorted by since."""
+    compiled = {}
+    for key, spec in models.items():
+        periods = []
+        for price in spec if isinstance(spec, list) else [spec]:
+            missing = [field for field in _REQUIRED if not isinstance(price.get(field), (int, float))]
+            if missing:
+                raise ValueError(f"Pricing for {key} is missing {', '.join(missing)}")
+            since = price.get("since") or ""
+            periods.append([since, {field: value for field, value in price.items() if field != "since"}])
+        periods.sort(key=lambda period: period[0])
+        compiled[key] = periods
+    return compiled
+
+
+class PricingTable:
+    """Time-versioned pricing with memoized (model, day) -> price lookups."""
+
+    def __init__(self, models, default, resolved=None):
+        self.models = models
+        self.default = default
+        # Current price per key, for code that has no date to price at
+        self.latest = {key: periods[-1][1] for key, periods in models.items()}
+        self.resolver = ModelResolver(self.latest, default, resolved)
+        self._since = {key: [since for since, _ in periods] for key, periods in models.items()}
+        self._prices = {}
+        self.compiled_path = None
+        self.source_sig = None
+        self._saved_names = len(resolved or ())
+
+    def price_for(self, model, day=None):
+        """Price entry for model on day ("%Y-%m-%d"), or its current price when day is None."""
+        price = self._prices.get((model, day))
+        if price is None:
+            key = self.resolver.key(model)
+            if key is None:
+                price = self.default
+            elif day is None:
+                price = self.latest[key]
+            else:
+                periods = self.models[key]
+                price = periods[max(0, bisect_right(self._since[key], day) - 1)][1]
+            self._prices[(model, day)] = price
+        return price
+
+    __call__ = price_for
+
+    def save(self):
+        """Write the compiled table (with every model name resolved so far) to the pricing cache."""
+        if self.compiled_path is None or len(self.resolver.known) == self._saved_names:
+            return
+        tmp_path = self.compiled_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.compiled_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format": COMPILED_FORMAT, "sig": self.source_sig, "default": self.default,
+                           "models": self.models, "resolved": self.resolver.known}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.compiled_path)
+            self._saved_names = len(self.resolver.known)
+        except OSError:
+            pass
+
+
+def load_pricing(path=None, use_cache=True):
+    """Load a pricing file, reusing its compiled form from the cache while the file is unchanged."""
+    path = os.path.abspath(path or os.environ.get("AI_CLI_STATS_PRICING") or PRICING_FILE)
+    sig = {"path": path, "files": file_signature([path])}
+    compiled_path = None
+    if use_cache:
+        # One compiled file per pricing file, so switching with --pricing doesn't evict the default
+        name = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+        compiled_path = os.path.join(get_cache_dir(), f"pricing_{name}.json")
+
+    table = None
+    if compiled_path and os.path.exists(compiled_path):
+        try:
+            cached = json_backend.load_file(compiled_path)
+            if cached.get("format") == COMPILED_FORMAT and cached.get("sig") == sig:
+                table = PricingTable(cached["models"], cached["default"], cached["resolved"])
+        except Exception:
+            table = None
+    if table is None:
+        data = json_backend.load_file(path)
+        table = PricingTable(_compile_models(data["models"]), data.get("default") or dict.fromkeys(_REQUIRED, 0))
+        # Force a first save so the next run skips compiling
+        table._saved_names = -1
+    table.compiled_path = compiled_path
+    table.source_sig = sig
+    return table
@@ -0,0 +1,328 @@
+import os
+import json
+import time
+
+# Instrumentation for `generate_dashboard.py --profile`. Every work unit is parsed through
+# call_unit(), which keeps a record of the unit in a module global while it runs: file reads go
+# through read() / load_file() so their time and size land in it, and the readers' catch-all
+# except clauses report what they swallow with failed(). Records travel back from the parser
+# processes with the unit's value, and Profile adds them up per reader and storage root.
+#
+# Failures are counted on every run (the scan cache keeps them with the entry, so a broken file
+# stays visible after it has been cached); timing only when profiling.
+#
+# With tracing on (--trace), records also collect spans (file reads, decodes and any span()
+# blocks), and Profile.write_trace() saves them with the per-unit, per-reader and per-root spans
+# in Chrome trace-event JSON, which chrome://tracing and https://ui.perfetto.dev load. Span
+# times are time.perf_counter() readings, which share one clock across the parser processes.
+
+# Record of the unit being parsed in this process (or of the discovery step), or None
+_record = None
+
+
+def _new_row():
+    return {"found": 0, "parsed": 0, "cached": 0, "bytes": 0, "events": 0, "failures": {},
+            "wall": 0.0, "cpu": 0.0, "io": 0.0}
+
+
+def _add_row(total, row):
+    for field, value in row.items():
+        if field == "failures":
+            for name, count in value.items():
+                total["failures"][name] = total["failures"].get(name, 0) + count
+        else:
+            total[field] += value
+
+
+def _new_record(timed, traced=False):
+    return {"failures": {}, "io": 0.0, "bytes": 0, "timed": timed, "spans": [] if traced else None}
+
+
+def read(f, size=-1):
+    """f.read(size), counted towards the current unit's I/O when profiling."""
+    if _record is None or not _record["timed"]:
+        return f.read(size)
+    start = time.perf_counter()
+    data = f.read(size)
+    end = time.perf_counter()
+    _record["io"] += end - start
+    _record["bytes"] += len(data)
+    if _record["spans"] is not None:
+        _record["spans"].append(("read", start, end, {"bytes": len(data)}))
+    return data
+
+
+def load_file(path, decode):
+    """decode() of the contents of path; opening and reading the file count as I/O."""
+    if _record is None or not _record["timed"]:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+    read_end = time.perf_counter()
+    _record["io"] += read_end - start
+    _record["bytes"] += len(data)
+    if _record["spans"] is None:
+        return decode(data)
+    try:
+        return decode(data)
+    finally:
+        _record["spans"].append(("open+read", start, read_end, {"bytes": len(data)}))
+        _record["spans"].append(("decode", read_end, time.perf_counter(), None))
+
+
+class _Span:
+    __slots__ = ("spans", "name", "args", "start")
+
+    def __init__(self, spans, name, args):
+        self.spans, self.name, self.args = spans, name, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.spans.append((self.name, self.start, time.perf_counter(), self.args))
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **args):
+    """Context manager recording a trace span of the enclosed block; does nothing unless tracing."""
+    if _record is None or _record["spans"] is None:
+        return _NO_SPAN
+    return _Span(_record["spans"], name, args or None)
+
+
+def failed(exc):
+    """Note an exception a reader caught and skipped over."""
+    if _record is not None:
+        name = type(exc).__name__
+        _record["failures"][name] = _record["failures"].get(name, 0) + 1
+
+
+def call_unit(parse, args, timed=False, traced=False):
+    """(value, record) for parse(*args). The record holds the unit's failures by exception type
+    and, when timed, its wall, CPU and I/O seconds and the bytes it read (and when traced, the
+    spans inside it)."""
+    global _record
+    _record = record = _new_record(timed, traced)
+    try:
+        if not timed:
+            value = parse(*args)
+            return (value if isinstance(value, dict) else list(value)), record
+        start, cpu = time.perf_counter(), time.process_time()
+        value = parse(*args)
+        value = value if isinstance(value, dict) else list(value)
+        record["start"] = start
+        record["wall"] = time.perf_counter() - start
+        record["cpu"] = time.process_time() - cpu
+        record["pid"] = os.getpid()
+        return value, record
+    finally:
+        _record = None
+
+
+class Profile:
+    """Counters per reader and storage root for one scan, and the slowest files parsed in it.
+
+    Wall and CPU seconds of the parse are summed over units, so with several worker processes
+    they add up to more than the elapsed time of the run. With trace set, spans are kept for
+    write_trace() as well.
+    """
+
+    def __init__(self, roots, slowest=10, trace=False):
+        # Longest first, so a file is counted under the most specific root it is in
+        self.roots = sorted((os.path.join(os.path.abspath(root), "") for root in roots), key=len, reverse=True)
+        self.slowest_count = slowest
+        self.rows = {}
+        self.reader_of = {}
+        self.root_of = {}
+        self.discovery = {}
+        self.slowest = []
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.trace = [] if trace else None
+        self.pid = os.getpid()
+        self.pids = set()
+        # (reader, start) and (reader, root, start) of the units being added, and when the last ended
+        self.open_reader = self.open_root = None
+        self.last_end = self.started
+
+    def _span(self, name, cat, start, end, pid=None, args=None):
+        # Kept raw; turning spans into trace events is left to write_trace()
+        self.trace.append((name, cat, start, end, pid or self.pid, args))
+
+    def _close_groups(self, reader=None, root=None):
+        """End the reader and root spans unless the next unit belongs to them too."""
+        if self.open_root is not None and self.open_root[:2] != (reader, root):
+            self._span(self.open_root[1], "root", self.open_root[2], self.last_end,
+                       args={"reader": self.open_root[0]})
+            self.open_root = None
+        if self.open_reader is not None and self.open_reader[0] != reader:
+            self._span(self.open_reader[0], "reader", self.open_reader[1], self.last_end)
+            self.open_reader = None
+
+    def _row(self, reader, root):
+        key = (reader, root)
+        if key not in self.rows:
+            self.rows[key] = _new_row()
+        return self.rows[key]
+
+    def _root(self, path):
+        # Looked up once per directory
+        parent = os.path.dirname(path)
+        root = self.root_of.get(parent)
+        if root is None:
+            path = os.path.abspath(path)
+            root = next((r.rstrip(os.sep) for r in self.roots if path.startswith(r)), parent)
+            self.root_of[parent] = root
+        return root
+
+    def discover(self, reader, find):
+        """find() with its wall and CPU time (and the failures in it) charged to reader; returns its units."""
+        global _record
+        _record = record = _new_record(True, self.trace is not None)
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            units = find()
+        finally:
+            _record = None
+        end = time.perf_counter()
+        self.discovery[reader] = {"wall": end - start, "cpu": time.process_time() - cpu,
+                                  "units": len(units), "failures": record["failures"]}
+        if self.trace is not None:
+            self._span(f"discover {reader}", "discovery", start, end, args={"units": len(units)})
+            for name, span_start, span_end, args in record["spans"]:
+                self._span(name, "discovery", span_start, span_end, args=args)
+        for unit in units:
+            self.reader_of[unit.key] = reader
+            self._row(reader, self._root(unit.key))["found"] += len(unit.paths)
+        return units
+
+    def add_unit(self, unit, events, record, cached, fetched=None):
+        """Count a unit that was parsed (or served from the cache, when cached). fetched is when
+        the scan started waiting for its result, for the trace."""
+        reader = self.reader_of.get(unit.key, "other")
+        root = self._root(unit.key)
+        if self.trace is not None:
+            self._trace_unit(unit, reader, root, events, record, cached, fetched)
+        row = self._row(reader, root)
+        row["events"] += events
+        for name, count in (record or {}).get("failures", {}).items():
+            row["failures"][name] = row["failures"].get(name, 0) + count
+        files = len(unit.paths)
+        if cached:
+            row["cached"] += files
+            return
+        row["parsed"] += files
+        if record and "wall" in record:
+            row["bytes"] += record["bytes"]
+            row["wall"] += record["wall"]
+            row["cpu"] += record["cpu"]
+            row["io"] += record["io"]
+            self.slowest.append((record["wall"], record["bytes"], events, unit.key))
+            self.slowest.sort(reverse=True)
+            del self.slowest[self.slowest_count:]
+
+    def _trace_unit(self, unit, reader, root, events, record, cached, fetched):
+        self._close_groups(reader, root)
+        start = fetched or time.perf_counter()
+        if self.open_reader is None:
+            self.open_reader = (reader, start)
+        if self.open_root is None:
+            self.open_root = (reader, root, start)
+        if cached or not record or "start" not in record:
+            return
+        pid = record["pid"]
+        self.pids.add(pid)
+        end = record["start"] + record["wall"]
+        self._span(os.path.basename(unit.key), "file", record["start"], end, pid,
+                   {"path": unit.key, "events": events, "bytes": record["bytes"],
+                    "failures": sum(record["failures"].values())})
+        for name, span_start, span_end, args in record["spans"] or ():
+            self._span(name, "io" if "read" in name else "decode", span_start, span_end, pid, args)
+
+    def aggregated(self, unit, start, end):
+        """Note the time the scan's consumer spent on a unit's events."""
+        if self.trace is not None:
+            self._span("aggregate", "aggregate", start, end)
+        self.last_end = end
+
+    def finish(self):
+        end = time.perf_counter()
+        self.elapsed = end - self.started
+        if self.trace is not None:
+            self._close_groups()
+            self._span("scan", "scan", self.started, end)
+
+    def write_trace(self, path):
+        """Save the spans as Chrome trace-event JSON."""
+        names = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "scan"}}]
+        names += [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"parser {pid}"}}
+                  for pid in sorted(self.pids - {self.pid})]
+        events = []
+        for name, cat, start, end, pid, args in self.trace:
+            # Both ends rounded alike, so back-to-back spans don't overlap
+            ts, end = round((start - self.started) * 1e6, 1), round((end - self.started) * 1e6, 1)
+            event = {"name": name, "cat": cat, "ph": "X", "ts": ts, "dur": round(end - ts, 1), "pid": pid, "tid": 0}
+            if args:
+                event["args"] = args
+            events.append(event)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": names + events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+
+    def report(self):
+        """The profile as printable lines."""
+        home = os.path.expanduser("~")
+        short = lambda path: "~" + path[len(home):] if path.startswith(home) else path
+        width = 66
+        lines = [f"[PROFILE] Scan took {self.elapsed or 0:.2f}s",
+                 f"{'reader / root':<{width}} {'found':>7} {'parsed':>7} {'cached':>7} {'MB read':>8} {'events':>9} "
+                 f"{'failed':>6} {'discover':>9} {'I/O':>8} {'decode':>8} {'CPU':>8}"]
+        failures = []
+
+        def add_line(label, row, discovery=None):
+            # Discovery time is only known per reader; CPU includes it there
+            discover = f"{discovery['wall']:>8.3f}s" if discovery else f"{'':>9}"
+            cpu = row["cpu"] + (discovery["cpu"] if discovery else 0)
+            if len(label) > width:
+                label = "  ..." + label[len(label) - width + 5:]
+            lines.append(f"{label:<{width}} {row['found']:>7,} {row['parsed']:>7,} {row['cached']:>7,} "
+                         f"{row['bytes'] / 2**20:>8,.1f} {row['events']:>9,} {sum(row['failures'].values()):>6,} "
+                         f"{discover} {row['io']:>7.3f}s {row['wall'] - row['io']:>7.3f}s {cpu:>7.3f}s")
+
+        for reader, discovery in self.discovery.items():
+            rows = sorted((root, row) for (r, root), row in self.rows.items() if r == reader)
+            total = _new_row()
+            for _, row in rows:
+                _add_row(total, row)
+            add_line(reader, total, discovery)
+            for name, count in sorted(discovery["failures"].items()):
+                failures.append(f"  {reader} (discovery): {name} x{count}")
+            for root, row in rows:
+                add_line("  " + short(root), row)
+                for name, count in sorted(row["failures"].items()):
+                    failures.append(f"  {reader} {short(root)}: {name} x{count}")
+
+        lines.append("")
+        lines.append("Parse failures by exception type" + (":" if failures else ": none"))
+        lines.extend(failures)
+        if self.slowest:
+            lines.append("")
+            lines.append(f"Slowest {len(self.slowest)} files parsed:")
+            for wall, size, events, key in self.slowest:
+                lines.append(f"  {wall:>7.3f}s {size / 2**20:>7,.2f} MB {events:>6,} events  {short(key)}")
+        return lines
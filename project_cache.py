@@ -0,0 +1,64 @@
+import os
+import json
+import hashlib
+
+import json_backend
+from scan_cache import get_cache_dir
+
+# Bump when the on-disk layout of the project cache changes (format 1 also kept a hash per
+# trusted-folder spelling; its sniffed paths are still read)
+PROJECT_CACHE_FORMAT = 2
+
+# How much of a session file is searched for a project path when its hash can't be resolved
+SNIFF_BYTES = 256 * 1024
+
+
+class ProjectCache:
+    """Persistent Gemini project-hash resolution.
+
+    Remembers the paths sniffed from session contents for hashes that no trusted folder
+    explains, so only never-resolved hashes are sniffed again. With persist=False nothing is
+    read from or written to disk.
+    """
+
+    def __init__(self, path=None, persist=True):
+        self.path = path or os.path.join(get_cache_dir(), "project_cache.json")
+        self.persist = persist
+        self.sniffed = {}
+        self.changed = False
+        if persist:
+            self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = json_backend.load_file(self.path)
+            if data.get("format") in (1, PROJECT_CACHE_FORMAT):
+                self.sniffed = data.get("sniffed", {})
+                # Rewrite a format 1 file without its hashes
+                self.changed = data.get("format") != PROJECT_CACHE_FORMAT
+        except Exception:
+            self.sniffed = {}
+
+    def path_hash(self, path):
+        """sha256 hex digest of path as Gemini computes project hashes."""
+        return hashlib.sha256(path.encode('utf-8')).hexdigest()
+
+    def remember(self, project_hash, path):
+        if self.sniffed.get(project_hash) != path:
+            self.sniffed[project_hash] = path
+            self.changed = True
+
+    def save(self):
+        if not self.persist or not self.changed:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format": PROJECT_CACHE_FORMAT, "sniffed": self.sniffed}, f)
+            os.replace(tmp_path, self.path)
+            self.changed = False
+        except OSError:
+            pass
@@ -0,0 +1,229 @@
+import os
+import json
+import hashlib
+
+import json_backend
+
+# Bump when the on-disk layout of the cache files changes
+CACHE_FORMAT = 2
+# Files the cached values are spread over (by a hash of their key)
+SHARDS = 64
+
+
+def get_cache_dir():
+    """Directory for persistent scan state (~/.cache/ai-cli-stats unless XDG_CACHE_HOME is set)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ai-cli-stats")
+
+
+def file_signature(paths):
+    """(size, mtime_ns) for every path; missing files are recorded as None so their later creation is noticed."""
+    sig = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            sig.append([st.st_size, st.st_mtime_ns])
+        except OSError:
+            sig.append(None)
+    return sig
+
+
+class ScanCache:
+    """Per-file partial aggregates keyed by path and validated by (size, mtime, reader version, context).
+
+    An index (scan_cache.json) holds every entry's signature, and the values are spread over
+    SHARDS files in scan_cache/ by a hash of their key. A shard is read when one of its entries
+    is first looked up, and only shards with stored or dropped entries are written back, so a
+    run with a few changed files rewrites a few shards rather than the whole history.
+
+    Only entries looked up or stored during the current run are written back by save(),
+    so files that disappeared from disk drop out of the cache (and the totals) automatically.
+    With persist=False the cache lives in memory only (e.g. --no-cache in watch mode).
+    Set partial when a run only looks at some of the files (a --since/--until scan): entries
+    it didn't look up are then kept as well.
+    """
+
+    def __init__(self, path=None, reader_version=0, persist=True):
+        self.path = path or os.path.join(get_cache_dir(), "scan_cache.json")
+        self.shard_dir = os.path.splitext(self.path)[0]
+        self.reader_version = reader_version
+        self.persist = persist
+        self.partial = False
+        self.entries = {}
+        self.seen = {}
+        self.shards = {}     # shard number -> {key: {"sig", "value"}}, as read or stored
+        self.dirty = set()   # shards to write back
+        # Most shards held at once (None = all); a persisted cache lets go of the oldest to load
+        # another, so a scan that goes shard by shard (like --export) holds one at a time
+        self.max_shards = None
+        self.hits = 0
+        self.misses = 0
+        # (size, mtime_ns) per path stat'ed this run, and those trusted from the last run
+        self.stats = {}
+        self.stable = {}
+        if persist:
+            self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = json_backend.load_file(self.path)
+            if data.get("format") == CACHE_FORMAT and data.get("reader_version") == self.reader_version:
+                self.entries = data.get("entries", {})
+        except Exception:
+            self.entries = {}
+
+    def shard_of(self, key):
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") % SHARDS
+
+    def _shard_path(self, shard):
+        return os.path.join(self.shard_dir, f"{shard:02x}.json")
+
+    def _shard(self, shard):
+        values = self.shards.get(shard)
+        if values is None:
+            if self.persist and self.max_shards is not None:
+                while len(self.shards) >= self.max_shards:
+                    self._release(next(iter(self.shards)))
+            values = {}
+            if self.persist:
+                try:
+                    values = json_backend.load_file(self._shard_path(shard))
+                except Exception:
+                    values = {}
+            self.shards[shard] = values
+        return values
+
+    def _value(self, key, signature):
+        # None when the shard lacks it, e.g. after a run that died before saving its index
+        stored = self._shard(self.shard_of(key)).get(key)
+        if stored is None or stored.get("sig") != signature:
+            return None
+        return stored["value"]
+
+    def _drop(self, keys):
+        for key in keys:
+            shard = self.shard_of(key)
+            if self._shard(shard).pop(key, None) is not None:
+                self.dirty.add(shard)
+
+    def start_run(self, changed=None):
+        """Start another scan with this cache (watch mode). Files outside `changed` (paths reported
+        changed since the last run, files or directories) keep their last signature instead of
+        being stat'ed again; changed=None re-checks every file."""
+        if self.seen:
+            kept = self._kept()
+            self._drop(self.entries.keys() - kept.keys())
+            self.entries = kept
+        self.seen = {}
+        self.hits = self.misses = 0
+        stats, self.stats = self.stats, {}
+        if changed is None:
+            self.stable = {}
+        else:
+            prefixes = tuple(path.rstrip(os.sep) + os.sep for path in changed)
+            self.stable = {path: sig for path, sig in stats.items()
+                           if path not in changed and not path.startswith(prefixes)}
+
+    def _file_signature(self, path):
+        try:
+            sig = self.stable[path]
+        except KeyError:
+            sig = file_signature([path])[0]
+        self.stats[path] = sig
+        return sig
+
+    def signature(self, paths, context=None):
+        return {"files": [self._file_signature(path) for path in paths], "ctx": context}
+
+    def valid(self, key, signature):
+        """True when an entry for key was saved with this signature (its value isn't read)."""
+        entry = self.entries.get(key)
+        return entry is not None and entry.get("sig") == signature
+
+    def lookup(self, key, signature):
+        if self.valid(key, signature):
+            value = self._value(key, signature)
+            if value is not None:
+                self.seen[key] = self.entries[key]
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def previous(self, key):
+        """The value saved for key by an earlier run, even if its files have since changed."""
+        entry = self.entries.get(key)
+        return self._value(key, entry["sig"]) if entry is not None else None
+
+    def store(self, key, signature, value, failures=None):
+        """Keep value for key; failures ({exception type: count}) are kept with it, so errors in a
+        file stay on record while its cached value is reused."""
+        entry = {"sig": signature}
+        if failures:
+            entry["failures"] = failures
+        shard = self.shard_of(key)
+        self._shard(shard)[key] = {"sig": signature, "value": value}
+        self.dirty.add(shard)
+        self.seen[key] = entry
+
+    def keep(self, key):
+        """Keep key's entry for this run without looking its value up (watch mode reuses the
+        events it already has for files that didn't change)."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.seen[key] = entry
+
+    def failures(self, key):
+        """Failures stored with the entry for key in this run."""
+        entry = self.seen.get(key)
+        return entry.get("failures", {}) if entry is not None else {}
+
+    def get(self, key, paths, context, parse, *args):
+        """Return the cached value for key, calling parse(*args) only when the files or context changed."""
+        sig = self.signature(paths, context)
+        value = self.lookup(key, sig)
+        if value is None:
+            value = parse(*args)
+            self.store(key, sig, value)
+        return value
+
+    def _kept(self):
+        return {**self.entries, **self.seen} if self.partial else self.seen
+
+    def _write(self, path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # dumps uses the C encoder, which dump (writing chunk by chunk) doesn't
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_path, path)
+
+    def _release(self, shard):
+        # Write the shard first if it changed; it is whole, so save() can still drop entries from it
+        if shard in self.dirty:
+            try:
+                os.makedirs(self.shard_dir, exist_ok=True)
+                self._write(self._shard_path(shard), self.shards[shard])
+            except OSError:
+                pass
+            self.dirty.discard(shard)
+        del self.shards[shard]
+
+    def save(self):
+        """Write the changed shards, then the index."""
+        if not self.persist or self.misses == 0 and (self.partial or len(self.seen) == len(self.entries)):
+            return
+        kept = self._kept()
+        self._drop(self.entries.keys() - kept.keys())
+        try:
+            os.makedirs(self.shard_dir, exist_ok=True)
+            for shard in sorted(self.dirty):
+                # Values left over from a run that died before saving its index go as well
+                values = {key: stored for key, stored in self.shards[shard].items() if key in kept}
+                self.shards[shard] = values
+                self._write(self._shard_path(shard), values)
+            self.dirty = set()
+            self._write(self.path, {"format": CACHE_FORMAT, "reader_version": self.reader_version, "entries": kept})
+        except OSError:
+            pass
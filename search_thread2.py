@@ -1,7 +1,7 @@
-import json, os, glob
+import json, json_backend, os, glob
 
 f = glob.glob(os.path.expanduser("~/.local/share/amp/threads/T-019c14fa*"))[0]
-data = json.load(open(f, "r", encoding="utf-8"))
+data = json_backend.load_file(f)
 
 for i, msg in enumerate(data.get("messages", [])):
     # Check top-level usage
@@ -0,0 +1,170 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from dashboard_payload import DETAIL_SHARDS
+
+# JSON API over an in-memory EventStore, used by `generate_dashboard.py --serve`:
+#   /api/dashboard          the dashboard page's payload (see dashboard_payload.shape_payload)
+#   /api/detail/<name>      the full projects, models or days lists behind a cut-down payload
+#   /api/totals             token and cost totals (of dated events, as on the dashboard)
+#   /api/series             one row per day, in date order
+#   /api/breakdown/<dim>    one row per model, project or cli, by cost
+# Every endpoint takes the filters since/until (YYYY-MM-DD, inclusive) and cli, model, project
+# (repeatable or comma-separated; cli also matches the IDE a Cline-family extension ran in).
+# Responses carry an ETag, so clients polling with If-None-Match get an empty 304 until the
+# data changes; responses are memoized until the store is replaced.
+
+# Filter parameter -> dimensions it matches
+FILTER_DIMS = {"cli": ("cli", "ide"), "model": ("model",), "project": ("project",)}
+BREAKDOWNS = ("model", "project", "cli")
+
+_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Distinct (path, query) responses kept per store generation
+MAX_MEMOIZED = 256
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _total_row(groups):
+    totals = {}
+    for row in groups.values():
+        for name, value in row.items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+class UsageAPI:
+    """Answers API requests from the current store; update() swaps in a new one.
+
+    summarize(store) builds the dashboard payload and its detail shards, cli_rollup(store) the
+    per-CLI totals (see generate_dashboard); page is the dashboard HTML served at /.
+    """
+
+    def __init__(self, summarize, cli_rollup, page):
+        self.summarize = summarize
+        self.cli_rollup = cli_rollup
+        self.page = page.encode("utf-8")
+        self.page_etag = '"%s"' % hashlib.sha1(self.page).hexdigest()[:20]
+        self.store = None
+        self.modified = None
+        self.responses = {}
+        # Bumped by update(), so an answer computed from a replaced store isn't memoized
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def update(self, store):
+        with self.lock:
+            self.store = store
+            self.modified = formatdate(time.time(), usegmt=True)
+            self.responses = {}
+            self.generation += 1
+
+    def _filtered(self, store, params):
+        conditions = []
+        since = params.pop("since", [None])[-1]
+        until = params.pop("until", [None])[-1]
+        for value in (since, until):
+            if value is not None and not _DAY.match(value):
+                raise BadRequest(f"Dates must be YYYY-MM-DD, got {value!r}")
+        if since or until:
+            conditions.append(("day", lambda day: day is not None and (since is None or day >= since)
+                               and (until is None or day <= until)))
+        for name, dims in FILTER_DIMS.items():
+            wanted = {v for value in params.pop(name, []) for v in value.split(",") if v}
+            if wanted:
+                conditions.append((dims, wanted.__contains__))
+        if params:
+            raise BadRequest(f"Unknown parameter {sorted(params)[0]!r}")
+        return store.filter(conditions)
+
+    def _answer(self, store, path, params):
+        store = self._filtered(store, params)
+        if path == "/api/dashboard":
+            return self.summarize(store)[0]
+        if path.startswith("/api/detail/"):
+            # Empty when the payload for these filters wasn't cut down
+            name = path[len("/api/detail/"):]
+            if name not in DETAIL_SHARDS:
+                raise BadRequest(f"Detail is available for {', '.join(DETAIL_SHARDS)}")
+            return self.summarize(store)[1].get(name, {})
+        if path == "/api/totals":
+            # Over the days, so undated events are left out as in the dashboard's totals
+            return _total_row(store.group_by("day"))
+        if path == "/api/series":
+            days = store.group_by("day")
+            return [dict(day=day, **days[day]) for day in sorted(days)]
+        if path.startswith("/api/breakdown/"):
+            dim = path[len("/api/breakdown/"):]
+            if dim not in BREAKDOWNS:
+                raise BadRequest(f"Breakdowns are by {', '.join(BREAKDOWNS)}")
+            groups = self.cli_rollup(store) if dim == "cli" else store.group_by(dim)
+            rows = [{dim: key, **row} for key, row in groups.items()]
+            return sorted(rows, key=lambda row: row["cost"], reverse=True)
+        return None
+
+    def get(self, target):
+        """(status, body, content type, etag, last modified) for a GET of target."""
+        url = urlsplit(target)
+        if url.path in ("/", "/index.html"):
+            return 200, self.page, "text/html; charset=utf-8", self.page_etag, None
+        key = (url.path, url.query)
+        with self.lock:
+            store, modified, generation = self.store, self.modified, self.generation
+            memo = self.responses.get(key)
+        if memo is not None:
+            return (200, *memo, modified)
+
+        try:
+            value = self._answer(store, url.path, parse_qs(url.query))
+        except BadRequest as e:
+            return 400, json.dumps({"error": str(e)}).encode("utf-8"), "application/json", None, None
+        if value is None:
+            return 404, json.dumps({"error": "Not found"}).encode("utf-8"), "application/json", None, None
+        body = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        memo = (body, "application/json", '"%s"' % hashlib.sha1(body).hexdigest()[:20])
+        with self.lock:
+            if self.generation == generation:
+                if len(self.responses) >= MAX_MEMOIZED:
+                    self.responses = {}
+                self.responses[key] = memo
+        return (200, *memo, modified)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, body, content_type, etag, modified = self.server.api.get(self.path)
+        if etag is not None and etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        # Always revalidate; an unchanged response costs a 304 without a body
+        self.send_header("Cache-Control", "no-cache")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if modified is not None:
+            self.send_header("Last-Modified", modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(api, host="127.0.0.1", port=8765):
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    httpd.api = api
+    return httpd
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import uuid
+import random
+import hashlib
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Synthetic CLI histories in each tool's on-disk format, for benchmarks and for trying the
+# dashboard without real data. Everything is written under a fake home directory (with the
+# Cline-family extensions under <home>/AppData/Roaming, so point APPDATA there):
+#   .gemini/tmp/<project hash>/chats/session-*.json (+ .gemini/trustedFolders.json, which can leave
+#   some projects out so their hash can't be resolved, as on a machine that never trusted them)
+#   .codex/sessions/YYYY/MM/DD/rollout-YYYY-MM-DDThh-mm-ss-<uuid>.jsonl
+#   .local/share/opencode/storage/session/<project>/<id>.json + storage/message/<id>/*.json
+#   .local/share/amp/threads/T-<uuid>.json (assistant usage plus tool-run inference debug blocks)
+#   AppData/Roaming/<IDE>/User/globalStorage/<extension>/state/taskHistory.json and tasks/*/
+# Files are dated (mtime) at their session's last activity, as the CLIs leave them.
+# build_corpus returns the files, bytes and usage events written per reader.
+
+READERS = ("gemini", "codex", "opencode", "ampcode", "cline")
+
+GEMINI_MODELS = ["gemini-2.5-pro", "gemini-2.5-flash", "gemini-3-pro-preview", "gemini-3-flash-preview"]
+CODEX_MODELS = ["gpt-5-codex", "gpt-5.1-codex-max", "gpt-5.2-codex", "o3"]
+OPENCODE_MODELS = [("anthropic", "claude-sonnet-4-5"), ("opencode", "kimi-k2.5:free"), ("openai", "gpt-5.1")]
+AMP_MODELS = ["claude-sonnet-4-5-20250929", "claude-opus-4-5", "gpt-5"]
+CLINE_MODELS = ["anthropic/claude-sonnet-4", "x-ai/grok-code-fast-1", "deepseek/deepseek-chat"]
+
+# (tool, IDE directory, extension id, writes taskHistory.json)
+CLINE_EXTENSIONS = [
+    ("Cline", "Code", "saoudrizwan.claude-dev", True),
+    ("Roo Code", "Cursor", "rooveterinaryinc.roo-cline", False),
+    ("Kilo Code", "Windsurf", "kilocode.kilo-code", False),
+]
+
+
+class Corpus:
+    """Random but reproducible corpus contents, spread over `days` days before `end`."""
+
+    def __init__(self, home, seed=1, days=365, projects=12, payload_kb=2, end=None):
+        self.home = home
+        self.rng = random.Random(seed)
+        self.days = days
+        self.end = end or datetime(2025, 12, 31, 18, 0, tzinfo=timezone.utc)
+        self.projects = [f"project-{n:02d}" for n in range(projects)]
+        self.filler = "lorem ipsum dolor sit amet " * max(1, payload_kb * 1024 // 27)
+        self.stats = {reader: {"files": 0, "bytes": 0, "events": 0} for reader in READERS}
+
+    def moment(self):
+        return self.end - timedelta(days=self.rng.randrange(self.days), seconds=self.rng.randrange(86400))
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128)))
+
+    def write(self, reader, path, data, lines=False, mtime=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if lines:
+                f.writelines(json.dumps(line) + "\n" for line in data)
+            else:
+                json.dump(data, f)
+        if mtime is not None:
+            touch(path, mtime)
+        self.stats[reader]["files"] += 1
+        self.stats[reader]["bytes"] += os.path.getsize(path)
+
+    def tokens(self):
+        i = self.rng.randint(500, 60000)
+        return i, self.rng.randint(20, 4000), self.rng.randint(0, i // 2)
+
+
+def touch(path, dt):
+    os.utime(path, (dt.timestamp(), dt.timestamp()))
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+def write_gemini(corpus, sessions, messages, untrusted=0.0):
+    rng = corpus.rng
+    trusted = {}
+    # The first projects are left out of trustedFolders.json
+    unlisted = set(corpus.projects[:round(len(corpus.projects) * untrusted)])
+    for n in range(sessions):
+        project = rng.choice(corpus.projects)
+        path = f"/home/dev/src/{project}"
+        if project not in unlisted:
+            trusted[path] = "TRUST_FOLDER"
+        project_hash = hashlib.sha256(path.encode("utf-8")).hexdigest()
+        start = corpus.moment()
+        msgs = []
+        for m in range(messages):
+            t = start + timedelta(minutes=m)
+            msgs.append({"id": corpus.uuid(), "timestamp": _iso(t), "type": "user", "content": corpus.filler})
+            i, o, c = corpus.tokens()
+            msgs.append({"id": corpus.uuid(), "timestamp": _iso(t + timedelta(seconds=20)), "type": "gemini",
+                         "content": corpus.filler, "thoughts": [], "model": rng.choice(GEMINI_MODELS),
+                         "tokens": {"input": i, "output": o, "cached": c, "thoughts": 0, "tool": 0,
+                                    "total": i + o}})
+            corpus.stats["gemini"]["events"] += 1
+        session = {"sessionId": corpus.uuid(), "projectHash": project_hash, "startTime": _iso(start),
+                   "lastUpdated": _iso(start + timedelta(minutes=messages)), "messages": msgs}
+        name = f"session-{start.strftime('%Y-%m-%dT%H-%M')}-{n:05d}.json"
+        corpus.write("gemini", os.path.join(corpus.home, ".gemini", "tmp", project_hash, "chats", name), session,
+                     mtime=start + timedelta(minutes=messages))
+    corpus.write("gemini", os.path.join(corpus.home, ".gemini", "trustedFolders.json"), trusted)
+
+
+def write_codex(corpus, sessions, turns):
+    rng = corpus.rng
+    for _ in range(sessions):
+        start = corpus.moment()
+        session_id = corpus.uuid()
+        cwd = f"/home/dev/src/{rng.choice(corpus.projects)}"
+        lines = [{"timestamp": _iso(start), "type": "session_meta",
+                  "payload": {"id": session_id, "timestamp": _iso(start), "cwd": cwd, "originator": "codex_cli_rs",
+                              "cli_version": "0.58.0", "instructions": None}}]
+        model = rng.choice(CODEX_MODELS)
+        total = {"input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0}
+        for t in range(turns):
+            at = _iso(start + timedelta(minutes=t))
+            if t == 0 or rng.random() < 0.1:
+                model = rng.choice(CODEX_MODELS)
+            lines.append({"timestamp": at, "type": "turn_context",
+                          "payload": {"cwd": cwd, "approval_policy": "on-request", "model": model,
+                                      "effort": "medium", "summary": "auto"}})
+            lines.append({"timestamp": at, "type": "response_item",
+                          "payload": {"type": "message", "role": "user",
+                                      "content": [{"type": "input_text", "text": corpus.filler}]}})
+            lines.append({"timestamp": at, "type": "response_item",
+                          "payload": {"type": "message", "role": "assistant",
+                                      "content": [{"type": "output_text", "text": corpus.filler}]}})
+            i, o, c = corpus.tokens()
+            last = {"input_tokens": i, "cached_input_tokens": c, "output_tokens": o,
+                    "reasoning_output_tokens": 0, "total_tokens": i + o}
+            for key in total:
+                total[key] += last[key]
+            lines.append({"timestamp": at, "type": "event_msg",
+                          "payload": {"type": "token_count",
+                                      "info": {"total_token_usage": dict(total), "last_token_usage": last,
+                                               "model_context_window": 272000}}})
+            corpus.stats["codex"]["events"] += 1
+        name = f"rollout-{start.strftime('%Y-%m-%dT%H-%M-%S')}-{session_id}.jsonl"
+        path = os.path.join(corpus.home, ".codex", "sessions", start.strftime("%Y"), start.strftime("%m"),
+                            start.strftime("%d"), name)
+        corpus.write("codex", path, lines, lines=True, mtime=start + timedelta(minutes=turns))
+
+
+def write_opencode(corpus, sessions, messages):
+    rng = corpus.rng
+    storage = os.path.join(corpus.home, ".local", "share", "opencode", "storage")
+    for _ in range(sessions):
+        start = corpus.moment()
+        session_id = "ses_" + corpus.uuid().replace("-", "")[:24]
+        project = rng.choice(corpus.projects)
+        project_id = hashlib.sha1(project.encode("utf-8")).hexdigest()
+        corpus.write("opencode", os.path.join(storage, "session", project_id, f"{session_id}.json"),
+                     {"id": session_id, "projectID": project_id, "directory": f"/home/dev/src/{project}",
+                      "title": f"Work on {project}", "version": "1.0.0",
+                      "time": {"created": _ms(start), "updated": _ms(start + timedelta(minutes=messages))}},
+                     mtime=start + timedelta(minutes=messages))
+        for m in range(messages):
+            at = start + timedelta(minutes=m)
+            t = _ms(at)
+            corpus.write("opencode", os.path.join(storage, "message", session_id, f"msg_{m:04d}a.json"),
+                         {"id": f"msg_{m:04d}a", "sessionID": session_id, "role": "user", "time": {"created": t}},
+                         mtime=at)
+            provider, model = rng.choice(OPENCODE_MODELS)
+            i, o, c = corpus.tokens()
+            corpus.write("opencode", os.path.join(storage, "message", session_id, f"msg_{m:04d}b.json"),
+                         {"id": f"msg_{m:04d}b", "sessionID": session_id, "role": "assistant",
+                          "modelID": model, "providerID": provider, "mode": "build", "cost": 0,
+                          "time": {"created": t + 1000, "completed": t + 9000},
+                          "tokens": {"input": i, "output": o, "reasoning": 0, "cache": {"read": c, "write": 0}}},
+                         mtime=at + timedelta(seconds=9))
+            corpus.stats["opencode"]["events"] += 1
+        touch(os.path.join(storage, "message", session_id), start + timedelta(minutes=messages))
+
+
+def write_ampcode(corpus, threads, messages):
+    rng = corpus.rng
+
+    def usage(model):
+        i, o, c = corpus.tokens()
+        write = rng.randint(0, 2000)
+        return {"model": model, "inputTokens": i - c, "outputTokens": o, "cacheReadInputTokens": c,
+                "cacheCreationInputTokens": write, "totalInputTokens": i + write, "maxInputTokens": 168000}
+
+    for _ in range(threads):
+        created = corpus.moment()
+        thread_id = "T-" + corpus.uuid()
+        model = rng.choice(AMP_MODELS)
+        project = rng.choice(corpus.projects)
+        msgs = []
+        for m in range(messages):
+            content = [{"type": "text", "text": corpus.filler}]
+            if m and rng.random() < 0.2:
+                # A tool run whose own inferences (e.g. image generation) are billed separately
+                content.append({"type": "tool_result", "toolUseID": corpus.uuid(),
+                                "run": {"status": "done", "result": "ok",
+                                        "~debug": {"inferences": [{"usage": usage("gemini-2.5-flash")}]}}})
+                corpus.stats["ampcode"]["events"] += 1
+            msgs.append({"role": "user", "messageId": 2 * m, "content": content})
+            msgs.append({"role": "assistant", "messageId": 2 * m + 1,
+                         "content": [{"type": "text", "text": corpus.filler}], "usage": usage(model),
+                         "state": {"type": "complete", "stopReason": "end_turn"}})
+            corpus.stats["ampcode"]["events"] += 1
+        thread = {"v": messages * 2, "id": thread_id, "created": _ms(created), "title": f"Change {project}",
+                  "env": {"initial": {"trees": [{"displayName": project,
+                                                 "repository": {"url": f"https://github.com/dev/{project}"}}],
+                                      "tags": [f"model:{model}"]}},
+                  "messages": msgs}
+        corpus.write("ampcode", os.path.join(corpus.home, ".local", "share", "amp", "threads", f"{thread_id}.json"),
+                     thread, mtime=created + timedelta(minutes=messages))
+
+
+def write_cline(corpus, tasks, messages):
+    rng = corpus.rng
+    appdata = os.path.join(corpus.home, "AppData", "Roaming")
+    for tool, ide, ext_id, with_history in CLINE_EXTENSIONS:
+        ext_dir = os.path.join(appdata, ide, "User", "globalStorage", ext_id)
+        history = []
+        task_ids = set()
+        last = None
+        for _ in range(tasks):
+            started = corpus.moment()
+            # Task folders are named by their start time in ms
+            while str(_ms(started)) in task_ids:
+                started += timedelta(milliseconds=1)
+            task_id = str(_ms(started))
+            task_ids.add(task_id)
+            project = rng.choice(corpus.projects)
+            model = rng.choice(CLINE_MODELS)
+            ui = [{"ts": _ms(started), "type": "say", "say": "text", "text": corpus.filler}]
+            totals = {"tokensIn": 0, "tokensOut": 0, "cacheWrites": 0, "cacheReads": 0, "cost": 0.0}
+            for m in range(messages):
+                i, o, c = corpus.tokens()
+                req = {"apiProtocol": "anthropic", "tokensIn": i, "tokensOut": o, "cacheWrites": 0,
+                       "cacheReads": c, "cost": round((i * 3 + o * 15) / 1e6, 6)}
+                for key in totals:
+                    totals[key] += req[key]
+                ui.append({"ts": _ms(started) + m * 30000 + 1, "type": "say", "say": "api_req_started",
+                           "text": json.dumps(req)})
+                ui.append({"ts": _ms(started) + m * 30000 + 2, "type": "say", "say": "text",
+                           "text": corpus.filler, "partial": False})
+            api_history = [{"role": "user", "content": [
+                {"type": "text", "text": f"<task>{corpus.filler[:200]}</task>"},
+                {"type": "text", "text": f"<environment_details>\n# Current Working Directory (/home/dev/src/{project})"
+                                         f"\n<model>{model}</model>\n</environment_details>"}]}]
+            task_dir = os.path.join(ext_dir, "tasks", task_id)
+            ended = started + timedelta(seconds=30 * messages)
+            last = max(last or ended, ended)
+            corpus.write("cline", os.path.join(task_dir, "ui_messages.json"), ui, mtime=ended)
+            corpus.write("cline", os.path.join(task_dir, "api_conversation_history.json"), api_history, mtime=ended)
+            history.append({"id": task_id, "ts": _ms(started), "task": corpus.filler[:200],
+                            "tokensIn": totals["tokensIn"], "tokensOut": totals["tokensOut"],
+                            "cacheWrites": totals["cacheWrites"], "cacheReads": totals["cacheReads"],
+                            "totalCost": round(totals["cost"], 6), "size": 0, "modelId": model,
+                            "cwdOnTaskInitialization": f"/home/dev/src/{project}"})
+            # With a taskHistory.json the reader takes one event per task from it, else one per task folder
+            corpus.stats["cline"]["events"] += 1
+        if with_history:
+            corpus.write("cline", os.path.join(ext_dir, "state", "taskHistory.json"), history, mtime=last)
+
+
+def build_corpus(home, scale=1.0, messages=20, payload_kb=2, days=365, seed=1, readers=READERS, untrusted=0.0):
+    """Write a corpus under home; scale multiplies the number of sessions per reader and untrusted
+    is the share of Gemini projects left out of trustedFolders.json. Returns {reader: {"files", "bytes", "events"}} for the readers written."""
+    corpus = Corpus(home, seed=seed, days=days, payload_kb=payload_kb)
+    count = lambda base: max(1, int(base * scale))
+    writers = {
+        "gemini": lambda: write_gemini(corpus, count(200), messages, untrusted),
+        "codex": lambda: write_codex(corpus, count(200), messages),
+        "opencode": lambda: write_opencode(corpus, count(100), messages),
+        "ampcode": lambda: write_ampcode(corpus, count(100), messages),
+        "cline": lambda: write_cline(corpus, count(60), messages),
+    }
+    for reader in readers:
+        writers[reader]()
+    return {reader: corpus.stats[reader] for reader in readers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic AI CLI usage corpus under a fake home directory.")
+    parser.add_argument("home", help="directory to write the corpus into (used as HOME, with APPDATA=<home>/AppData/Roaming)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the number of sessions per reader (default: 1)")
+    parser.add_argument("--messages", type=int, default=20, help="model replies per session (default: 20)")
+    parser.add_argument("--payload-kb", type=int, default=2, help="prompt/response text per message, in KB (default: 2)")
+    parser.add_argument("--days", type=int, default=365, help="days of history to spread sessions over (default: 365)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--untrusted", type=float, default=0.0,
+                        help="share of Gemini projects left out of trustedFolders.json (default: 0)")
+    parser.add_argument("--readers", default=",".join(READERS), help=f"comma-separated subset of {', '.join(READERS)}")
+    args = parser.parse_args()
+
+    readers = [r for r in args.readers.split(",") if r]
+    unknown = [r for r in readers if r not in READERS]
+    if unknown:
+        parser.error(f"unknown reader {unknown[0]!r}")
+    stats = build_corpus(args.home, args.scale, args.messages, args.payload_kb, args.days, args.seed, readers,
+                         args.untrusted)
+    for reader, s in stats.items():
+        print(f"{reader:<10} {s['files']:>8,} files {s['bytes'] / 2**20:>9,.1f} MB {s['events']:>10,} events")
+    print(f"\nRun with: HOME={os.path.abspath(args.home)} APPDATA={os.path.abspath(os.path.join(args.home, 'AppData', 'Roaming'))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+import time
+from datetime import date, datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Turns event timestamps into the day and hour buckets usage is grouped by, in local time (the
+# default) or UTC (AI_CLI_STATS_TZ=utc, or use_zone()). UTC offsets are whole multiples of 15
+# minutes, so every timestamp in a 15-minute block falls in the same day and hour: each block
+# is converted once and memoized, and each day's "%Y-%m-%d" label is formatted once. ISO-8601
+# timestamps go through datetime.fromisoformat (C code, faster than any slicing in Python) into
+# epoch ms and are bucketed from there, so no reader formats a date per event.
+
+ZONES = ("local", "utc")
+BLOCK_MS = 15 * 60 * 1000
+
+ZONE = "local"
+_blocks = {}     # block number -> (day id, hour); day ids are date ordinals
+_labels = {}     # day id -> "%Y-%m-%d"
+
+
+def use_zone(name=None):
+    """Bucket in `name` ("local" or "utc"; local when None) from now on."""
+    global ZONE
+    name = name or "local"
+    if name not in ZONES:
+        raise ValueError(f"Unknown time zone: {name} (expected one of {', '.join(ZONES)})")
+    if name != ZONE:
+        _blocks.clear()
+    ZONE = name
+    return ZONE
+
+
+use_zone(os.environ.get("AI_CLI_STATS_TZ") or None)
+
+
+def _block(block):
+    info = _blocks.get(block)
+    if info is None:
+        seconds = block * (BLOCK_MS // 1000)
+        dt = datetime.fromtimestamp(seconds, timezone.utc) if ZONE == "utc" else datetime.fromtimestamp(seconds)
+        info = _blocks[block] = (dt.toordinal(), dt.hour)
+    return info
+
+
+def bucket(ms):
+    """(day id, hour) of an epoch-ms timestamp."""
+    return _block(int(ms // BLOCK_MS))
+
+
+def day_label(day_id):
+    """"%Y-%m-%d" of a day id."""
+    label = _labels.get(day_id)
+    if label is None:
+        label = _labels[day_id] = date.fromordinal(day_id).isoformat()
+    return label
+
+
+def day_of(ms):
+    """"%Y-%m-%d" day of an epoch-ms timestamp."""
+    return day_label(_block(int(ms // BLOCK_MS))[0])
+
+
+def today():
+    return day_of(time.time() * 1000)
+
+
+def buckets(timestamps):
+    """(day ids, hours) of a batch of epoch-ms timestamps, -1 for both where a timestamp is
+    unknown (None or negative). NumPy int64 arrays when NumPy is installed, lists otherwise."""
+    if np is None:
+        days, hours = [], []
+        for ts in timestamps:
+            day, hour = (-1, -1) if ts is None or ts < 0 else bucket(ts)
+            days.append(day)
+            hours.append(hour)
+        return days, hours
+    if not isinstance(timestamps, np.ndarray):
+        timestamps = np.array([-1 if ts is None else ts for ts in timestamps], dtype=np.int64)
+    known = timestamps >= 0
+    blocks, inverse = np.unique(timestamps[known] // BLOCK_MS, return_inverse=True)
+    info = np.array([_block(block) for block in blocks.tolist()], dtype=np.int64).reshape(-1, 2)
+    days = np.full(len(timestamps), -1, dtype=np.int64)
+    hours = np.full(len(timestamps), -1, dtype=np.int64)
+    days[known] = info[inverse.ravel(), 0]
+    hours[known] = info[inverse.ravel(), 1]
+    return days, hours
+
+
+def hours_of(timestamps):
+    """Hour of day (0-23) of each epoch-ms timestamp; None where it is unknown."""
+    hours = buckets(timestamps)[1]
+    return [None if hour < 0 else hour for hour in (hours.tolist() if np is not None else hours)]
+
+
+def iso_to_ms(ts):
+    """Epoch ms of an ISO-8601 timestamp ("Z" or another offset; times without one are local)."""
+    return int(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() * 1000)
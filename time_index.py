@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Usage on a dense hourly time axis: slot 24 * d + h holds hour h (see time_buckets) of the d-th
+# day after the first day with usage. Every metric is kept as a prefix-sum array over the slots, so
+# the total of any [start, end) range - a day, a week, a month to date, a moving-average
+# window - is one subtraction however long the history. Built from a priced EventStore's
+# ("day", "hour") group-by, so costs are priced per model and day exactly as in the daily series.
+
+METRICS = ("cost", "input", "output", "cached", "cache_write", "events")
+
+
+def _cumulative(values):
+    if np is not None:
+        prefix = np.zeros(len(values) + 1, dtype=np.float64 if values.dtype.kind == "f" else np.int64)
+        np.cumsum(values, out=prefix[1:])
+        return prefix
+    prefix = [0] * (len(values) + 1)
+    running = 0
+    for idx, value in enumerate(values):
+        running += value
+        prefix[idx + 1] = running
+    return prefix
+
+
+class TimeIndex:
+    """Prefix sums of every metric per hour, plus an hour-of-day x weekday heatmap.
+
+    Events without a timestamp count at hour 0 of their day, so day, week and month totals
+    include them, but they are left out of the heatmap. Events without a day are left out.
+    """
+
+    def __init__(self, first_day, prefix, heatmap):
+        self.first_day = first_day  # date of slot 0, None when there is no usage
+        self.prefix = prefix        # {metric: cumulative sums, len(slots) + 1 long}
+        self.heatmap = heatmap      # {"costs": 7 x 24, "events": 7 x 24}, Monday first
+
+    @classmethod
+    def from_store(cls, store):
+        groups = [(day, hour, totals) for (day, hour), totals in store.group_by(("day", "hour"), dropna=False).items()
+                  if day is not None]
+        heatmap = {"costs": [[0.0] * 24 for _ in range(7)], "events": [[0] * 24 for _ in range(7)]}
+        if not groups:
+            return cls(None, {m: [0] for m in METRICS}, heatmap)
+
+        ordinals = {day: date.fromisoformat(day).toordinal() for day in {day for day, _, _ in groups}}
+        first = min(ordinals.values())
+        slots = 24 * (max(ordinals.values()) - first + 1)
+        metrics = [m for m in METRICS if m in groups[0][2]]
+        if np is not None:
+            series = {m: np.zeros(slots, dtype=np.float64 if m == "cost" else np.int64) for m in metrics}
+        else:
+            series = {m: [0.0 if m == "cost" else 0] * slots for m in metrics}
+        for day, hour, totals in groups:
+            slot = 24 * (ordinals[day] - first) + (hour or 0)
+            for m in metrics:
+                series[m][slot] += totals[m]
+            if hour is not None:
+                weekday = date.fromordinal(ordinals[day]).weekday()
+                heatmap["costs"][weekday][hour] += totals.get("cost", 0.0)
+                heatmap["events"][weekday][hour] += totals["events"]
+        return cls(date.fromordinal(first), {m: _cumulative(series[m]) for m in metrics}, heatmap)
+
+    def __len__(self):
+        return len(self.prefix["events"]) - 1
+
+    def slot(self, day, hour=0):
+        """Slot of hour `hour` of `day` (a date or "%Y-%m-%d"), clamped to [0, len(self)]."""
+        if self.first_day is None:
+            return 0
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return min(max(24 * (day - self.first_day).days + hour, 0), len(self))
+
+    def total(self, metric, start, end):
+        """Sum of metric over slots [start, end)."""
+        prefix = self.prefix[metric]
+        start, end = min(max(start, 0), len(self)), min(max(end, 0), len(self))
+        if end <= start:
+            return 0
+        value = prefix[end] - prefix[start]
+        return value.item() if np is not None and hasattr(value, "item") else value
+
+    def totals(self, since=None, until=None):
+        """{metric: sum} over the days since..until (inclusive, "%Y-%m-%d" or dates; open when None)."""
+        start = 0 if since is None else self.slot(since)
+        end = len(self) if until is None else self.slot(_next_day(until))
+        return {m: self.total(m, start, end) for m in self.prefix}
+
+    def month_to_date(self, day):
+        """Totals from the first of day's month through day."""
+        day = date.fromisoformat(day) if isinstance(day, str) else day
+        return self.totals(day.replace(day=1), day)
+
+    def moving_average(self, metric, day, days=7):
+        """Mean daily metric over the `days` days ending with day."""
+        day = date.fromisoformat(day) if isinstance(day, str) else day
+        return self.total(metric, self.slot(day - timedelta(days=days - 1)), self.slot(_next_day(day))) / days
+
+
+def _next_day(day):
+    return (date.fromisoformat(day) if isinstance(day, str) else day) + timedelta(days=1)
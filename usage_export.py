@@ -0,0 +1,126 @@
+import os
+import gzip
+import json
+
+from event_store import UsageEvent, _priced_cost
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    # pyarrow is optional: without it events are exported as NDJSON
+    pa = ipc = pq = None
+
+# Streams usage events, one row per event with its cost, to a file other tools can load:
+# Parquet or Arrow IPC (pyarrow), or NDJSON (gzipped when the file name ends in .gz). Rows are written BATCH_ROWS at a time, so
+# memory stays flat however many events there are. `timestamp` is epoch ms (a UTC timestamp
+# column in Parquet/Arrow), `day` the "%Y-%m-%d" the dashboard buckets the event in, and `cost`
+# the reported cost, or else the tokens priced for the model and day like the dashboard does.
+
+FORMATS = ("parquet", "arrow", "ndjson")
+# Extensions that pick the format when none is given
+EXTENSIONS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+              ".gz": "ndjson", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+BATCH_ROWS = 65_536
+
+FIELDS = UsageEvent._fields + ("cost",)
+
+
+def _schema():
+    strings = {"cli", "ide", "session", "day", "project", "model"}
+    types = []
+    for name in FIELDS:
+        if name in strings:
+            types.append((name, pa.string()))
+        elif name == "timestamp":
+            types.append((name, pa.timestamp("ms", tz="UTC")))
+        elif name in ("reported_cost", "cost"):
+            types.append((name, pa.float64()))
+        else:
+            types.append((name, pa.int64()))
+    return pa.schema(types)
+
+
+def pick_format(path, fmt=None):
+    """Format to write path in: fmt, else the one its extension names, else Parquet when pyarrow
+    is installed and NDJSON otherwise (gzipped only when path ends in .gz)."""
+    if fmt is None:
+        fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        fmt = "parquet" if pa is not None else "ndjson"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if fmt != "ndjson" and pa is None:
+        raise RuntimeError(f"Exporting {fmt} needs pyarrow (pip install pyarrow); "
+                           f"export to a .ndjson.gz file instead")
+    return fmt
+
+
+def _rows(events, pricing_for):
+    for cli, ide, session, timestamp, day, project, model, i, o, c, cw, reported in events:
+        # As in EventStore.price: a reported cost stands, otherwise tokens are priced
+        cost = reported if reported else _priced_cost(pricing_for(model, day), max(0, i - c - cw), o, c, cw)
+        yield (cli, ide, session, timestamp, day, project, model, i, o, c, cw, reported, cost)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _ArrowWriter:
+    def __init__(self, path, fmt):
+        self.schema = _schema()
+        if fmt == "parquet":
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self.writer = ipc.new_file(path, self.schema)
+
+    def write(self, batch):
+        columns = [pa.array(column, type=field.type) for column, field in zip(zip(*batch), self.schema)]
+        self.writer.write_batch(pa.record_batch(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _NDJSONWriter:
+    def __init__(self, path, compress):
+        if compress:
+            self.file = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, batch):
+        self.file.write("".join(json.dumps(dict(zip(FIELDS, row)), separators=(",", ":")) + "\n" for row in batch))
+
+    def close(self):
+        self.file.close()
+
+
+def write_events(events, path, fmt=None, pricing_for=None, batch_rows=BATCH_ROWS):
+    """Write UsageEvents (any iterable, consumed once) to path, pricing them with
+    pricing_for(model, day); returns the number of rows written. The file only appears once
+    complete."""
+    fmt = pick_format(path, fmt)
+    tmp_path = path + ".tmp"
+    writer = _ArrowWriter(tmp_path, fmt) if fmt != "ndjson" else _NDJSONWriter(tmp_path, path.endswith(".gz"))
+    written = 0
+    try:
+        for batch in _batches(_rows(events, pricing_for), batch_rows):
+            writer.write(batch)
+            written += len(batch)
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return written
@@ -0,0 +1,316 @@
+import os
+import sqlite3
+import threading
+
+import time_buckets
+from event_store import EventStore, UsageEvent, DIMENSIONS, MEASURES
+
+# Optional local SQLite warehouse of usage events (`--warehouse`), which keeps history the CLIs
+# have since pruned from their own storage. Every event is stored under a stable id: its
+# source (the file it was read from), its timestamp and its position among the source's events
+# with that timestamp. A file that is read again (grown, shortened or rewritten) replaces its
+# rows as a whole; rows of files that are gone stay. A source is only re-ingested when its
+# signature (file sizes and mtimes, reader version) changes. WarehouseStore answers the
+# EventStore queries (price, filter, group_by) with SQL group-bys over indexed columns.
+
+# Bump when the schema changes (and have _migrate() bring older files up to date)
+WAREHOUSE_FORMAT = 2
+# Rows inserted per transaction while ingesting
+BATCH_ROWS = 50_000
+
+COLUMNS = ("source", "timestamp", "occurrence", "cli", "ide", "session", "day", "hour", "project", "model",
+           "input", "output", "cached", "cache_write", "reported_cost")
+
+# (source, timestamp, occurrence) is the event id. Rows are appended in ingest order, so the
+# rowid orders groups by their first event like EventStore.group_by.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, signature TEXT);
+CREATE TABLE IF NOT EXISTS events (
+    source INTEGER NOT NULL,      -- sources.id
+    timestamp INTEGER NOT NULL,   -- epoch ms, -1 when unknown
+    occurrence INTEGER NOT NULL,  -- position among the source's events with this timestamp
+    cli TEXT, ide TEXT, session TEXT, day TEXT, hour INTEGER, project TEXT, model TEXT,
+    input INTEGER, output INTEGER, cached INTEGER, cache_write INTEGER, reported_cost REAL
+);
+"""
+# Built after the first load into an empty warehouse rather than updated row by row during it;
+# events_id also serves the deletion of a re-read source's rows
+_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS events_id ON events (source, timestamp, occurrence);
+CREATE INDEX IF NOT EXISTS events_day_model ON events (day, model);
+CREATE INDEX IF NOT EXISTS events_project_day ON events (project, day);
+CREATE INDEX IF NOT EXISTS events_cli_day ON events (cli, day);
+"""
+
+_INSERT = f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+# SQL for the columns group_by sums: EventStore's token columns, and its price() columns
+_PRICED = "(reported_cost IS NULL OR reported_cost = 0)"
+_SUMS = dict({m: m for m in MEASURES}, **{
+    "billed_input": f"CASE WHEN {_PRICED} THEN MAX(0, input - cached - cache_write) ELSE 0 END",
+    "priced_output": f"CASE WHEN {_PRICED} THEN output ELSE 0 END",
+    "priced_cached": f"CASE WHEN {_PRICED} THEN cached ELSE 0 END",
+    "priced_cache_write": f"CASE WHEN {_PRICED} THEN cache_write ELSE 0 END",
+    "reported_cost": f"CASE WHEN {_PRICED} THEN 0.0 ELSE reported_cost END",
+})
+# The dimensions WarehouseStore rolls up in one query; group-bys over them are folded from it
+ROLLUP = tuple(dim for dim in DIMENSIONS if dim != "session")
+
+
+def get_data_dir():
+    """Directory for data kept across runs (~/.local/share/ai-cli-stats unless XDG_DATA_HOME is set)."""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "ai-cli-stats")
+
+
+def default_path():
+    return os.path.join(get_data_dir(), "usage.sqlite")
+
+
+def _where(clauses):
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+
+class Warehouse:
+    """A SQLite file of usage events (WAL mode, so readers don't block a running ingest).
+
+    The connection is shared between threads (--serve --watch ingests while requests query),
+    with every use serialized on a lock.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if meta.get("format", str(WAREHOUSE_FORMAT)) != str(WAREHOUSE_FORMAT):
+            self._migrate(meta["format"])
+        if meta.get("zone", time_buckets.ZONE) != time_buckets.ZONE:
+            self._rebucket()
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                  [("format", str(WAREHOUSE_FORMAT)), ("zone", time_buckets.ZONE)])
+        self.sources = {path: (source, signature) for source, path, signature
+                        in self.conn.execute("SELECT id, path, signature FROM sources")}
+        # An empty warehouse gets its indexes once the first commit() has loaded it
+        self.bulk = self.conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+        if self.bulk:
+            for (name,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                             "AND tbl_name = 'events' AND name LIKE 'events_%'").fetchall():
+                self.conn.execute(f"DROP INDEX {name}")
+        else:
+            self.conn.executescript(_INDEXES)
+        self.rows = []
+        self.replaced = []
+        self.signatures = []
+        self.inserted = 0
+
+    def _migrate(self, version):
+        """Bring a warehouse written in an older format up to date, keeping its rows."""
+        if version != "1":
+            raise RuntimeError(f"{self.path} was written by an incompatible version (format {version})")
+        # Format 1 kept the event id as a UNIQUE constraint, which can't be dropped for a bulk load
+        columns = ", ".join(COLUMNS)
+        try:
+            self.conn.executescript(f"BEGIN; ALTER TABLE events RENAME TO events_v1; {_SCHEMA} "
+                                    f"INSERT INTO events ({columns}) SELECT {columns} FROM events_v1 ORDER BY rowid; "
+                                    f"DROP TABLE events_v1; COMMIT;")
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+
+    def _rebucket(self):
+        """Re-derive day and hour from the timestamps after the time zone setting changed (Codex
+        days come from file names and stay)."""
+        updates = []
+        for rowid, timestamp, cli in self.conn.execute(
+                "SELECT rowid, timestamp, cli FROM events WHERE timestamp >= 0"):
+            day, hour = time_buckets.bucket(timestamp)
+            updates.append((cli, time_buckets.day_label(day), hour, rowid))
+        with self.conn:
+            self.conn.executemany("UPDATE events SET day = CASE WHEN ? = 'Codex CLI' THEN day ELSE ? END, "
+                                  "hour = ? WHERE rowid = ?", updates)
+
+    def unchanged(self, path, signature):
+        """True when the source at path was ingested with this signature before."""
+        known = self.sources.get(path)
+        return known is not None and known[1] == signature
+
+    def ingest(self, path, signature, events):
+        """Queue the UsageEvents read from path to replace the rows it held before; rows are
+        written BATCH_ROWS at a time, and the rest by commit()."""
+        known = self.sources.get(path)
+        if known is None:
+            with self.lock:
+                source = self.conn.execute("INSERT INTO sources (path) VALUES (?)", (path,)).lastrowid
+        else:
+            source = known[0]
+            if any(queued == source for queued, in self.replaced):
+                # Read twice before a commit: the first read's rows go before they are replaced
+                self._write()
+            self.replaced.append((source,))
+        self.sources[path] = (source, signature)
+        occurrences = {}
+        rows = self.rows
+        for cli, ide, session, timestamp, day, project, model, i, o, c, cw, reported in events:
+            if timestamp is None:
+                timestamp, hour = -1, None
+            else:
+                hour = time_buckets.bucket(timestamp)[1]
+            occurrence = occurrences.get(timestamp, 0)
+            occurrences[timestamp] = occurrence + 1
+            rows.append((source, timestamp, occurrence, cli, ide, session, day, hour, project, model,
+                         i, o, c, cw, reported))
+        self.signatures.append((signature, source))
+        if len(rows) >= BATCH_ROWS:
+            self._write()
+
+    def _write(self):
+        """Write the queued rows, the deletion of the rows they replace and the source signatures
+        in one transaction."""
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM events WHERE source = ?", self.replaced)
+            self.conn.executemany(_INSERT, self.rows)
+            self.conn.executemany("UPDATE sources SET signature = ? WHERE id = ?", self.signatures)
+        self.inserted += len(self.rows)
+        self.rows = []
+        self.replaced = []
+        self.signatures = []
+
+    def commit(self):
+        """Write everything queued, then build the indexes if this was the first load."""
+        self._write()
+        if self.bulk:
+            with self.lock, self.conn:
+                self.conn.executescript(_INDEXES)
+            self.bulk = False
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def stream(self, sql, params=(), size=BATCH_ROWS):
+        """Yield the rows of a query, fetched `size` at a time."""
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+
+    def store(self, since=None, until=None):
+        """WarehouseStore of the events from since to until ("%Y-%m-%d", inclusive; open when None)."""
+        where, params = [], []
+        if since is not None:
+            where.append("day >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("day <= ?")
+            params.append(until)
+        if since is not None or until is not None:
+            where.append("day IS NOT NULL")
+        return WarehouseStore(self, where, params)
+
+    def close(self):
+        self.commit()
+        with self.lock:
+            self.conn.close()
+
+
+class WarehouseStore(EventStore):
+    """The warehouse events matching `where`, queried like an EventStore (price, filter and
+    group_by return the same results) with SQL; no event is loaded into memory.
+
+    The first group_by runs one SQL group-by over all dimensions but session, and every
+    group_by without session is folded from its rows, so a dashboard (a handful of group-bys)
+    reads the table once.
+    """
+
+    def __init__(self, warehouse, where=(), params=()):
+        self.warehouse = warehouse
+        self.where = list(where)
+        self.params = list(params)
+        self.measures = {m: _SUMS[m] for m in MEASURES}
+        self.pricing_for = None
+        self.priced = {}
+        self.rollup = None
+
+    def __len__(self):
+        return self.warehouse.query(f"SELECT COUNT(*) FROM events{_where(self.where)}", self.params)[0][0]
+
+    def events(self):
+        """Yield the events as UsageEvent field tuples, in the order they were ingested."""
+        fields = ", ".join("NULLIF(timestamp, -1)" if f == "timestamp" else f for f in UsageEvent._fields)
+        yield from self.warehouse.stream(f"SELECT {fields} FROM events{_where(self.where)} ORDER BY rowid",
+                                         self.params)
+
+    def price(self, pricing_for):
+        self.pricing_for = pricing_for
+        self.priced = {name: _SUMS[name] for name in ("billed_input", "priced_output", "priced_cached",
+                                                      "priced_cache_write", "reported_cost")}
+
+    def filter(self, conditions):
+        where, params = list(self.where), list(self.params)
+        for dims, accept in conditions:
+            clauses, values = [], []
+            for dim in (dims,) if isinstance(dims, str) else dims:
+                _check(dim)
+                allowed = [value for (value,) in self.warehouse.query(
+                    f"SELECT DISTINCT {dim} FROM events{_where(where)}", params) if accept(value)]
+                if None in allowed:
+                    clauses.append(f"{dim} IS NULL")
+                    allowed.remove(None)
+                if allowed:
+                    clauses.append(f"{dim} IN ({', '.join('?' * len(allowed))})")
+                    values += allowed
+            where.append("(" + " OR ".join(clauses) + ")" if clauses else "0")
+            params += values
+        store = WarehouseStore(self.warehouse, where, params)
+        store.pricing_for = self.pricing_for
+        store.priced = self.priced
+        return store
+
+    def _query(self, dims, drop, columns):
+        for dim in dims:
+            _check(dim)
+        keys = ", ".join(dims)
+        sums = ", ".join(f"COALESCE(SUM({expr}), 0)" for _, expr in columns)
+        where = self.where + [f"{dim} IS NOT NULL" for dim in drop]
+        rows = self.warehouse.query(f"SELECT {keys}, {sums}, COUNT(*) FROM events{_where(where)} "
+                                    f"GROUP BY {keys} ORDER BY MIN(rowid)", self.params)
+        names = [name for name, _ in columns] + ["events"]
+        return [(tuple(row[:len(dims)]), dict(zip(names, row[len(dims):]))) for row in rows]
+
+    def _groups(self, dims, drop, columns):
+        if any(dim not in ROLLUP for dim in dims):
+            return self._query(dims, drop, columns)
+        if self.rollup is None:
+            self.rollup = self._query(ROLLUP, (), list(_SUMS.items()))
+        at = [ROLLUP.index(dim) for dim in dims]
+        dropped = [ROLLUP.index(dim) for dim in drop]
+        names = [name for name, _ in columns] + ["events"]
+        groups = {}
+        for key, totals in self.rollup:
+            if any(key[idx] is None for idx in dropped):
+                continue
+            group = tuple(key[idx] for idx in at)
+            into = groups.get(group)
+            if into is None:
+                groups[group] = {name: totals[name] for name in names}
+            else:
+                for name in names:
+                    into[name] += totals[name]
+        return list(groups.items())
+
+
+def _check(dim):
+    # Dimension names are put into the SQL text, so only known ones are allowed
+    if dim not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension: {dim}")
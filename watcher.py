@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# File-change notification for watch mode: inotify on Linux (through libc, no extra
+# dependency), and a polling fallback everywhere else or when inotify is unavailable
+# (e.g. the per-user watch limit is exhausted). Both report changed paths under a set of roots;
+# roots that don't exist yet are picked up once they appear.
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+               IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+# How often missing roots are looked for (inotify) or all roots are re-scanned (polling)
+POLL_INTERVAL = 2.0
+
+
+class InotifyWatcher:
+    """Recursive inotify watches over existing roots."""
+
+    def __init__(self, roots):
+        self.roots = list(roots)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}
+        self.missing = []
+        try:
+            for root in self.roots:
+                if os.path.isdir(root):
+                    self._watch_tree(root)
+                else:
+                    self.missing.append(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, top):
+        """Watch top and every directory below it; returns the files found (for new trees)."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(err, f"inotify_add_watch failed for {dirpath}")
+            self.paths[wd] = dirpath
+            found.extend(os.path.join(dirpath, name) for name in filenames)
+        return found
+
+    def _check_missing(self, changed):
+        for root in list(self.missing):
+            if os.path.isdir(root):
+                self.missing.remove(root)
+                changed.update(self._watch_tree(root))
+                changed.add(root)
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds; returns the set of paths changed (empty on timeout)."""
+        changed = set()
+        self._check_missing(changed)
+        if changed:
+            return changed
+        if self.missing:
+            timeout = POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: report the roots so the caller rescans everything
+                changed.update(self.roots)
+                continue
+            directory = self.paths.get(wd)
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Files may have been written before the new directory was watched
+                changed.update(self._watch_tree(path))
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Detects changes by comparing (size, mtime) snapshots of every file under the roots."""
+
+    def __init__(self, roots, interval=POLL_INTERVAL):
+        self.roots = list(roots)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        current = self._scan()
+        changed = {path for path, sig in current.items() if self.snapshot.get(path) != sig}
+        changed.update(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots, polling=False):
+    """inotify watcher on Linux, falling back to polling when it can't be set up."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            print(f"[WARN] inotify unavailable ({e}); polling for changes every {POLL_INTERVAL:g}s")
+    return PollingWatcher(roots)
+
+
+def wait_for_changes(watcher, debounce=0.3, max_delay=2.0):
+    """Block until something changes, then keep collecting until changes stop for `debounce`
+    seconds (or `max_delay` passed), so a burst of writes causes a single refresh."""
+    changed = set()
+    while not changed:
+        changed = watcher.poll(None)
+    deadline = time.monotonic() + max_delay
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return changed
+        more = watcher.poll(min(debounce, remaining))
+        if not more:
+            return changed
+        changed.update(more)